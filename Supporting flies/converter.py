@@ -19,9 +19,11 @@ How it works (high level):
 
 Usage:
     python word_to_csv_converter.py "word file.docx" output.csv
+    python word_to_csv_converter.py "word file.docx" output.parquet   (typed columns, loads faster)
 
 Requirements (install if needed):
     pip install python-docx docx2txt
+    pip install pandas pyarrow    (only for Parquet output)
 
 Notes & heuristics:
  - Date parsing assumes day-first format (DD/MM/YYYY) when a bracketed date
@@ -33,16 +35,22 @@ Notes & heuristics:
    (so that the CSV cell contains the full message). If you prefer raw newlines
    inside CSV cells, set --preserve-newlines.
 
-This file is meant to be copied to a .py file and executed in your environment.
+The date-header and message-line rules come from elyx/transcript.py, so run this
+from inside the repository (it adds the repository root to sys.path itself).
 """
 
 from __future__ import annotations
-import re
 import sys
 import csv
 import argparse
-from datetime import datetime
-from typing import List, Dict, Optional
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+# The line rules live in the app's elyx package (shared with its .docx upload), one folder up
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from elyx.roles import split_sender_role  # noqa: E402
+from elyx.transcript import RE_DATE_HEADER, RE_MESSAGE_LINE, iter_lines, iter_message_rows, normalize_date_str, parse_lines  # noqa: E402
 
 # Try python-docx first (recommended)
 try:
@@ -88,157 +96,136 @@ def read_docx_paragraphs(path: str) -> List[str]:
         )
 
 
-# Regex patterns (flexible)
-# Date header like: [15/08/2025]  or [15/08/2025] (later in the day)
-RE_DATE_HEADER = re.compile(r'^\s*\[(\d{1,2}[\/\-]\d{1,2}[\/\-]\d{4})\]')
-
-# Message line like: 09:02 – Rohan (Member): Hi Ruby, ...
-# Accepts different dashes and colon after sender.
-RE_MESSAGE_LINE = re.compile(
-    r'''^\s*(?P<time>\d{1,2}:\d{2})\s*[\u2013\u2014\-–—]?\s*(?P<sender>[^:]{1,120}?)\s*:\s*(?P<message>.*\S.*)$'''
-)
-# Explanation: allows en-dash/em-dash/hyphen between time and sender.
+def _parse_segment(args) -> List[Dict[str, str]]:
+    lines, date_format, current_date = args
+    return list(iter_message_rows(lines, date_format, current_date))
 
 
-def normalize_date_str(date_str: str, date_format: Optional[str] = None) -> str:
-    """Normalize date string like '15/08/2025' into ISO '2025-08-15'.
+def parse_lines_parallel(lines: List[str], date_format: Optional[str] = None, workers: int = 2) -> List[Dict[str, str]]:
+    """parse_lines across a process pool; same rows, same order.
 
-    If date_format is provided, datetime.strptime will use it. Otherwise try
-    common day-first formats.
+    The input is cut into one segment per worker, each cut moved forward to the next
+    message line so no message is split. A segment's only state from earlier lines is
+    the last date header, which is found by scanning back from the cut.
     """
-    if date_format:
-        dt = datetime.strptime(date_str, date_format)
-    else:
-        # Try common variants
-        tried = ["%d/%m/%Y", "%d-%m-%Y", "%Y/%m/%d", "%Y-%m-%d"]
-        dt = None
-        for fmt in tried:
-            try:
-                dt = datetime.strptime(date_str, fmt)
+    n = len(lines)
+    cuts = [0]
+    for k in range(1, workers):
+        i = max(cuts[-1] + 1, n * k // workers)
+        while i < n and not RE_MESSAGE_LINE.match(lines[i].strip()):
+            i += 1
+        if i < n:
+            cuts.append(i)
+    cuts.append(n)
+    segments = []
+    for lo, hi in zip(cuts, cuts[1:]):
+        current_date = None
+        for j in range(lo - 1, -1, -1):
+            mdate = RE_DATE_HEADER.match(lines[j].strip())
+            if mdate:
+                current_date = normalize_date_str(mdate.group(1), date_format)
                 break
-            except Exception:
-                continue
-        if dt is None:
-            # As a last resort, return original
-            return date_str
-    return dt.strftime("%Y-%m-%d")
-
-
-def parse_lines(lines: List[str], date_format: Optional[str] = None) -> List[Dict[str, str]]:
-    """Parse the list of text lines into conversation rows.
-
-    Returns a list of dicts with keys: date, time, sender, message
-    """
+        segments.append((lines[lo:hi], date_format, current_date))
+    if len(segments) == 1:
+        return _parse_segment(segments[0])
     rows: List[Dict[str, str]] = []
-    current_date: Optional[str] = None
-    last_row: Optional[Dict[str, str]] = None
-
-    for raw in lines:
-        line = raw.strip()
-        if not line:
-            continue
-
-        # Check for date header
-        mdate = RE_DATE_HEADER.match(line)
-        if mdate:
-            date_text = mdate.group(1)
-            iso = normalize_date_str(date_text, date_format)
-            current_date = iso
-            # Date header lines don't produce rows directly
-            continue
-
-        # Check for message line
-        m = RE_MESSAGE_LINE.match(line)
-        if m:
-            time = m.group('time')
-            sender = m.group('sender').strip()
-            message = m.group('message').strip()
-
-            # If there's no current_date, leave date blank or try to use the last row's date
-            date_to_use = current_date if current_date else (rows[-1]['date'] if rows else '')
-
-            row = {
-                'date': date_to_use or '',
-                'time': time,
-                'sender': sender,
-                'message': message,
-            }
-            rows.append(row)
-            last_row = row
-            continue
-
-        # If the line doesn't match a new message, treat it as a continuation of the last message
-        if last_row is not None:
-            # Append with newline to preserve paragraphs inside a message
-            last_row['message'] = last_row['message'] + '\n' + line
-        else:
-            # No previous message to append to: create a placeholder row with unknown time/sender
-            date_to_use = current_date if current_date else ''
-            placeholder = {
-                'date': date_to_use,
-                'time': '',
-                'sender': '',
-                'message': line,
-            }
-            rows.append(placeholder)
-            last_row = placeholder
-
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for part in pool.map(_parse_segment, segments):
+            rows.extend(part)
     return rows
 
 
-def write_csv(rows: List[Dict[str, str]], out_path: str, preserve_newlines: bool = False) -> None:
-    """Write parsed rows to CSV. Uses utf-8-sig to be Excel-friendly.
+def write_csv(rows: Iterable[Dict[str, str]], out_path: str, preserve_newlines: bool = False) -> int:
+    """Write parsed rows to CSV and return how many were written. Uses utf-8-sig to be
+    Excel-friendly. ``rows`` may be a generator; it is consumed as it is written.
 
     If preserve_newlines is False, internal message newlines will be replaced
     with literal '\\n' so each CSV cell remains a single line. If True, the
     CSV will contain actual newlines inside quoted fields which is also valid.
     """
-    fieldnames = ['date', 'time', 'sender', 'message']
+    count = 0
     with open(out_path, 'w', encoding='utf-8-sig', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
+        writer = csv.writer(f)
+        writer.writerow(['date', 'time', 'sender', 'message'])
         for r in rows:
-            rowcopy = r.copy()
+            message = r['message']
             if not preserve_newlines:
-                rowcopy['message'] = rowcopy['message'].replace('\r', '').replace('\n', '\\n')
-            writer.writerow(rowcopy)
+                message = message.replace('\r', '').replace('\n', '\\n')
+            writer.writerow((r['date'], r['time'], r['sender'], message))
+            count += 1
+    return count
+
+
+def write_parquet(rows: Iterable[Dict[str, str]], out_path: str) -> int:
+    """Write parsed rows to Parquet in the app's message schema and return the row count.
+
+    Columns: timestamp (datetime64), date (date), time (string), sender and role
+    (categorical, split from "Name (Role)"), text (string, real newlines). The app loads
+    this as-is, with no date parsing. Needs pandas and pyarrow.
+    """
+    import pandas as pd
+
+    cols: Dict[str, List[str]] = {'date': [], 'time': [], 'sender': [], 'role': [], 'text': []}
+    split_cache: Dict[str, tuple] = {}
+    for r in rows:
+        sender = r['sender']
+        parts = split_cache.get(sender)
+        if parts is None:
+            parts = split_cache[sender] = split_sender_role(sender)
+        cols['date'].append(r['date'])
+        cols['time'].append(r['time'])
+        cols['sender'].append(parts[0] or 'Unknown')
+        cols['role'].append(parts[1])
+        cols['text'].append(r['message'])
+    timestamp = pd.to_datetime(pd.Series(cols['date'], dtype='str') + ' ' + pd.Series(cols['time'], dtype='str'), format='%Y-%m-%d %H:%M', errors='coerce')
+    df = pd.DataFrame({
+        'timestamp': timestamp,
+        'date': timestamp.dt.date,
+        'time': timestamp.dt.strftime('%H:%M').fillna('').astype('str'),
+        'sender': pd.Categorical(cols['sender']),
+        'role': pd.Categorical(cols['role']),
+        'text': pd.Series(cols['text'], dtype='str'),
+    })
+    df.to_parquet(out_path, index=False)
+    return len(df)
 
 
 def main(argv=None):
     parser = argparse.ArgumentParser(description="Convert a Word (.docx) chat log into a CSV with columns date,time,sender,message.")
     parser.add_argument('input', help='Path to the input .docx file')
-    parser.add_argument('output', help='Path to the output .csv file')
+    parser.add_argument('output', help='Path to the output .csv or .parquet file')
     parser.add_argument('--date-format', default=None, help='Optional date format for parsing bracketed dates (e.g. "%%d/%%m/%%Y")')
     parser.add_argument('--preserve-newlines', action='store_true', help='Store real newlines inside CSV message cells (quoted)')
     parser.add_argument('--show-sample', action='store_true', help='Print parsed sample rows to stdout (first 10)')
+    parser.add_argument('--workers', type=int, default=1, help='Parse with this many processes (worth it for very large exports)')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default=None, help='Output format (default: from the output extension, else csv)')
     args = parser.parse_args(argv)
 
     try:
-        lines = read_docx_paragraphs(args.input)
+        paragraphs = read_docx_paragraphs(args.input)
     except Exception as e:
         print("Error reading .docx:", e, file=sys.stderr)
         sys.exit(2)
 
-    # Robustness: sometimes the docx file contains long paragraphs with embedded newlines
-    # so split any paragraphs that contain multiple logical lines
-    expanded_lines: List[str] = []
-    for p in lines:
-        # split on explicit newlines inside paragraphs too
-        for sub in re.split(r"\r?\n", p):
-            s = sub.strip()
-            if s:
-                expanded_lines.append(s)
-
-    rows = parse_lines(expanded_lines, date_format=args.date_format)
+    # paragraphs -> lines -> rows -> CSV writer, streamed end to end
+    if args.workers > 1:
+        rows: Iterable[Dict[str, str]] = parse_lines_parallel(list(iter_lines(paragraphs)), args.date_format, args.workers)
+    else:
+        rows = iter_message_rows(iter_lines(paragraphs), date_format=args.date_format)
 
     if args.show_sample:
+        rows = list(rows)
         print('\n--- Sample parsed rows (first 10) ---')
         for i, r in enumerate(rows[:10]):
             print(i + 1, r)
         print('------------------------------------\n')
 
-    write_csv(rows, args.output, preserve_newlines=args.preserve_newlines)
-    print(f"Wrote {len(rows)} rows to {args.output}")
+    fmt = args.format or ('parquet' if args.output.lower().endswith('.parquet') else 'csv')
+    if fmt == 'parquet':
+        count = write_parquet(rows, args.output)
+    else:
+        count = write_csv(rows, args.output, preserve_newlines=args.preserve_newlines)
+    print(f"Wrote {count} rows to {args.output}")
 
 
 if __name__ == '__main__':
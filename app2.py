@@ -5,12 +5,25 @@ from __future__ import annotations
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import re
-import random
-import os
-from datetime import datetime, date, timedelta, time as dtime
+from datetime import datetime, date, timedelta
 from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from uuid import uuid4
+
+from elyx.rules import DECISION_LOOKBACK
+from elyx.extract import Extraction, event_details, decision_texts, rationale_snippets
+from elyx.ingest import parse_csv_messages as _parse_csv_messages, iter_csv_messages, prepare_messages, compact_messages, for_display, concat_categorical, sort_messages, MESSAGE_COLUMNS
+from elyx.diskcache import ParseCache, cache_key, load_cached, store
+from elyx.incremental import append_csv
+from elyx.docxparse import parse_docx_messages
+from elyx.perf import timed_cache, cache_stats_rows, stage, start_stage, begin_run, set_enabled, is_enabled, run_records, stage_log_jsonl, clear_stage_log
+from elyx.search import search
+from elyx.downsample import MAX_EVENT_POINTS, MAX_LINE_POINTS, bucket_events, downsample_lines, payload_bytes, render_mode
+from elyx.paging import PAGE_SIZES, filter_rows, sort_rows, page_count, page_rows, truncate_text
+from elyx.dateindex import day_rows, window_rows, last_row_until
+from elyx.metrics import DEFAULT_ROLE_WEIGHTS, compute_internal_metrics as _compute_internal_metrics
+from elyx.pipeline import Pipeline, dataset_pipeline
 
 # --- Helpers (cached) ---
 @st.cache_data(show_spinner=False)
@@ -72,11 +85,6 @@ def load_local_csv(path: str) -> pd.DataFrame | None:
 
 # ---- in your app's main flow ----
 
-try:
-    from docx import Document
-except Exception:
-    Document = None
-
 st.set_page_config(page_title="Elyx Member Journey", layout="wide")
 
 # Minimal CSS
@@ -91,529 +99,17 @@ CUSTOM_CSS = """
 """
 st.markdown(f"<style>{CUSTOM_CSS}</style>", unsafe_allow_html=True)
 
-# Heuristics
-ROLE_MAP = {
-    'Ruby': 'Concierge',
-    'Neel': 'Concierge Lead',
-    'Dr. Warren': 'Physician',
-    'Carla': 'Nutritionist',
-    'Rachel': 'Physiotherapist',
-    'Advik': 'Performance Scientist',
-    'Lab Tech': 'Lab',
-}
-
-LAB_PATTERNS = [
-    (r"LDL[^\d]*(\d{2,3})", "LDL"),
-    (r"HDL[^\d]*(\d{2,3})", "HDL"),
-    (r"Triglycerides?[^\d]*(\d{2,3})", "Triglycerides"),
-    (r"Total Cholesterol[^\d]*(\d{2,3})", "Total Cholesterol"),
-    (r"ApoB[^\d]*(\d{1,3})", "ApoB"),
-    (r"hs?-?CRP[^\d]*(\d+(?:\.\d+)?)", "hs-CRP"),
-    (r"BP[^\d]*(\d{2,3})/(\d{2,3})", "Blood Pressure"),
-    (r"VO[₂2]?max[^\d]*(\d+(?:\.\d+)?)", "VO2max"),
-    (r"HRV[^\d]*(\d+(?:\.\d+)?)", "HRV"),
-]
-
-DECISION_KEYWORDS = [
-    'start','add','begin','initiate','reduce','increase','switch','replace',
-    'schedule','book','recheck','test','panel','scan','session','hiit',
-    'supplement','vitamin','omega-3','d3','plan','target','goal','adjust','prescribe'
-]
-
-CITY_KEYWORDS = ["london","new york","nyc","jakarta","seoul","paris","dubai","tokyo","delhi","mumbai","bangkok","hong kong","sydney","los angeles","chicago","san francisco","toronto","berlin","rome","madrid","zurich","amsterdam","bali"]
-
-EXERCISE_WORDS = ['workout','exercise','training','session','gym','run','jog','walk','steps','cycle','cycling','ride','swim','swimming','row','rowing','elliptical','treadmill','yoga','pilates','hiit','strength','weights','lifting','hike','tennis','badminton','football','cricket']
-
-# Time parsing
-TIME_RANGE_SEP = r"(?:\-|\u2013|\u2014|to)"
-TIME_TOKEN = r"(?:\d{1,2}(?::|\.)\d{2}(?:\s*(?:am|pm))?|\d{1,2}\s*(?:am|pm)|\d{2}:\d{2}|\d{1,2})"
-RANGE_RE = re.compile(fr"(?i)\b({TIME_TOKEN})\s*{TIME_RANGE_SEP}\s*({TIME_TOKEN})\b")
-HMS_RE = re.compile(r"(?i)\b(\d{1,2})\s*h(?:ours?)?\s*(\d{1,2})\s*m(?:in(?:s|utes)?)?\b")
-HOUR_ONLY_RE = re.compile(r"(?i)\b(\d+(?:\.\d+)?)\s*h(?:(?:ours?)|rs|r)?\b")
-MIN_ONLY_RE = re.compile(r"(?i)\b(\d{1,3})\s*m(?:in(?:s|utes)?)?\b")
-
-
-def _parse_time_token(tok: str) -> int | None:
-    if not tok:
-        return None
-    s = tok.strip().lower().replace('.', ':')
-    ampm = None
-    m = re.search(r"\b(am|pm)\b", s)
-    if m:
-        ampm = m.group(1)
-        s = re.sub(r"\s*(am|pm)\b", "", s)
-    if ':' in s:
-        parts = s.split(':')
-        try:
-            h = int(parts[0]); mnt = int(parts[1]) if len(parts) > 1 else 0
-        except Exception:
-            return None
-    else:
-        try:
-            h = int(re.findall(r"\d+", s)[0]); mnt = 0
-        except Exception:
-            return None
-    if ampm:
-        h = h % 12
-        if ampm == 'pm':
-            h += 12
-    if 0 <= h <= 23 and 0 <= mnt <= 59:
-        return h*60 + mnt
-    return None
-
-
-def parse_time_range_minutes(text: str) -> tuple[int | None, int | None, int | None]:
-    for m in RANGE_RE.finditer(text):
-        a, b = m.group(1), m.group(2)
-        sa = _parse_time_token(a); sb = _parse_time_token(b)
-        if sa is None or sb is None:
-            continue
-        dur = sb - sa
-        if dur <= 0:
-            dur += 24*60
-        return sa, sb, dur
-    return None, None, None
-
-
-def parse_duration_minutes(text: str) -> int | None:
-    m = HMS_RE.search(text)
-    if m:
-        h, mm = int(m.group(1)), int(m.group(2))
-        return h*60 + mm
-    m = HOUR_ONLY_RE.search(text)
-    if m:
-        h = float(m.group(1))
-        return int(round(h*60))
-    m = MIN_ONLY_RE.search(text)
-    if m:
-        return int(m.group(1))
-    return None
 
 # Parsers
-@st.cache_data(show_spinner=False)
+@timed_cache(st.cache_data(show_spinner=False))
 def parse_csv_messages(file_bytes_or_path) -> pd.DataFrame:
-    if isinstance(file_bytes_or_path, (bytes, bytearray)):
-        df = pd.read_csv(BytesIO(file_bytes_or_path), dtype=str, keep_default_na=False)
-    else:
-        df = pd.read_csv(file_bytes_or_path, dtype=str, keep_default_na=False)
-    cols_lower = {c.lower(): c for c in df.columns}
-    ts_col = None
-    for candidate in ['timestamp','datetime','date_time','time_stamp','created_at']:
-        if candidate in cols_lower:
-            ts_col = cols_lower[candidate]; break
-    if ts_col:
-        df['timestamp'] = pd.to_datetime(df[ts_col], errors='coerce', dayfirst=True)
-    else:
-        date_col = None; time_col = None
-        for d in ['date','day']:
-            if d in cols_lower:
-                date_col = cols_lower[d]; break
-        for t in ['time','hour']:
-            if t in cols_lower:
-                time_col = cols_lower[t]; break
-        if date_col and time_col:
-            df['timestamp'] = pd.to_datetime(df[date_col].astype(str).str.strip() + ' ' + df[time_col].astype(str).str.strip(), errors='coerce', dayfirst=True)
-        elif date_col:
-            df['timestamp'] = pd.to_datetime(df[date_col], errors='coerce', dayfirst=True)
-        else:
-            df['timestamp'] = pd.NaT
-    sender_col = None
-    for s in ['sender','author','from','speaker','name']:
-        if s in cols_lower:
-            sender_col = cols_lower[s]; break
-    if sender_col:
-        df['sender'] = df[sender_col].astype(str).str.strip()
-    else:
-        df['sender'] = ''
-    role_col = None
-    for r in ['role','role_name','speaker_role']:
-        if r in cols_lower:
-            role_col = cols_lower[r]; break
-    if role_col:
-        df['role'] = df[role_col].astype(str).str.strip()
-    else:
-        df['role'] = ''
-    text_col = None
-    for t in ['text','message','body','content']:
-        if t in cols_lower:
-            text_col = cols_lower[t]; break
-    if text_col:
-        df['text'] = df[text_col].astype(str).str.strip()
-    else:
-        used = {ts_col, sender_col, role_col}
-        fallback = next((c for c in df.columns if c not in used), None)
-        if fallback:
-            df['text'] = df[fallback].astype(str).str.strip()
-        else:
-            df['text'] = ''
-    def split_sender_role(s: str):
-        s = (s or '').strip()
-        if '(' in s and ')' in s:
-            try:
-                name = s[:s.find('(')].strip()
-                role_part = s[s.find('(')+1:s.rfind(')')].strip()
-                if '/' in role_part:
-                    role_part = role_part.split('/')[0].strip()
-                return name, role_part
-            except Exception:
-                pass
-        return s, ''
-    parsed = df['sender'].apply(split_sender_role)
-    df['sender_clean'] = parsed.apply(lambda x: x[0])
-    df['role_from_sender'] = parsed.apply(lambda x: x[1])
-    df['role'] = df.apply(lambda r: r['role'] if r['role'] else (r['role_from_sender'] if r['role_from_sender'] else ''), axis=1)
-    df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
-    df['date'] = df['timestamp'].dt.date
-    df['time'] = df['timestamp'].dt.strftime('%H:%M').fillna('')
-    df['sender'] = df['sender_clean'].fillna(df['sender']).replace('', 'Unknown')
-    df['role'] = df['role'].fillna('').astype(str)
-    df['text'] = df['text'].fillna('')
-    df = df.sort_values('timestamp', na_position='last').reset_index(drop=True)
-    df.drop(columns=['sender_clean','role_from_sender'], inplace=True, errors='ignore')
-    return df
+    return _parse_csv_messages(file_bytes_or_path)
 
-# Feature extraction
-@st.cache_data(show_spinner=False)
-def extract_events(messages: pd.DataFrame) -> pd.DataFrame:
-    if messages.empty:
-        return pd.DataFrame(columns=["timestamp","date","type","title","detail","sender","role"]) 
-    events = []
-    def is_summary_text(text: str) -> bool:
-        if not text:
-            return False
-        low = text.lower()
-        if 'weekly summary' in low or 'week summary' in low or 'weekly progress summary' in low:
-            return True
-        if re.search(r"\bweekly\b", low) and re.search(r"\b(update|report|progress|summary|check)\b", low):
-            return True
-        if re.search(r"summary(.{0,50})week", low) or re.search(r"week(.{0,50})summary", low):
-            return True
-        if re.search(r"\bweek(?:'s)?\b", low) and re.search(r"\b(summary|update|report)\b", low):
-            return True
-        if 'weekly' in low and any(keyword in low for keyword in ['summary','update','report','progress','check','notes']):
-            return True
-        return False
-    ROLE_KEYWORDS_LOCAL = {
-        'concierge':'Concierge','orchestrator':'Concierge','ruby':'Concierge',
-        'concierge lead':'Concierge Lead','neel':'Concierge Lead',
-        'physician':'Physician','doctor':'Physician','dr.':'Physician','warren':'Physician',
-        'performance':'Performance Scientist','advik':'Performance Scientist',
-        'nutrition':'Nutritionist','carla':'Nutritionist',
-        'physio':'Physiotherapist','physiotherapist':'Physiotherapist','pt':'Physiotherapist','rachel':'Physiotherapist',
-        'lab':'Lab','lab tech':'Lab'
-    }
-    def infer_sender_and_role(sender_field: str, existing_role: str | None) -> tuple[str,str]:
-        """Return (cleaned_sender_name, canonical_role).
-        Logic:
-         - If sender string contains parentheses, prefer the name inside/outside as before.
-         - If role text (from CSV role column or parentheses) contains keywords, use that.
-         - If role is missing, try exact-name mapping (Ruby, Dr Warren, Advik, Carla, Rachel, Neel).
-         - Otherwise fall back to keyword matching in name or role_text and finally 'Member'.
-        """
-        s = (sender_field or '').strip()
-        # normalize common "Dr." variants and remove trailing slashes
-        s_norm = re.sub(r"\bdr\.?\s+", "dr ", s, flags=re.IGNORECASE)
-        name = s_norm
-        role_text = (existing_role or '').strip()
-        # pull out parentheses if present
-        m = re.match(r"^([^\(]+)\(([\^)]+)\)", s_norm)
-        if m:
-            name = m.group(1).strip()
-            role_text = m.group(2).strip()
-        # clean name: remove honorifics like Dr., Mr., Ms.
-        clean_name = re.sub(r"\b(dr|mr|ms|mrs|prof)\.?\s*", "", name, flags=re.IGNORECASE).strip()
-        low_name = (clean_name or '').lower()
-        low_role_txt = (role_text or '').lower()
-
-        # explicit exact-name map (covers cases where brackets are empty)
-        NAME_ROLE_MAP = {
-            'ruby': 'Concierge',
-            'dr warren': 'Physician',
-            'dr. warren': 'Physician',
-            'warren': 'Physician',
-            'advik': 'Performance Scientist',
-            'carla': 'Nutritionist',
-            'rachel': 'Physiotherapist',
-            'neel': 'Concierge Lead',
-            'lab tech': 'Lab',
-            'lab': 'Lab'
-        }
-        # check exact name matches first
-        for k, v in NAME_ROLE_MAP.items():
-            if low_name == k:
-                return (clean_name or k.title(), v)
-        # check if name contains one of the known names (partial match)
-        for k, v in NAME_ROLE_MAP.items():
-            if k in low_name:
-                return (clean_name or name, v)
-
-        # keyword mapping fallback
-        ROLE_KEYWORDS_LOCAL = {
-            'concierge':'Concierge','orchestrator':'Concierge','ruby':'Concierge',
-            'concierge lead':'Concierge Lead','neel':'Concierge Lead',
-            'physician':'Physician','doctor':'Physician','dr.':'Physician','warren':'Physician',
-            'performance':'Performance Scientist','advik':'Performance Scientist',
-            'nutrition':'Nutritionist','carla':'Nutritionist',
-            'physio':'Physiotherapist','physiotherapist':'Physiotherapist','pt':'Physiotherapist','rachel':'Physiotherapist',
-            'lab':'Lab','lab tech':'Lab'
-        }
-        for k,v in ROLE_KEYWORDS_LOCAL.items():
-            if k in low_role_txt or k in low_name:
-                return (clean_name or name, v)
-
-        # if role_text looks meaningful, use it
-        if role_text:
-            if '/' in role_text:
-                role_text = role_text.split('/')[0].strip()
-            return (clean_name or name, role_text.title())
-
-        # fallback to Member
-        return (clean_name or name or 'Unknown', 'Member')
-
-    for _, r in messages.iterrows():
-        txt = str(r.get('text', ''))
-        low = txt.lower()
-        sender_field = str(r.get('sender', '')).strip()
-        existing_role = str(r.get('role', '')).strip()
-        sender_name, norm_role = infer_sender_and_role(sender_field, existing_role)
-        if norm_role == 'Lab' and (not sender_name or sender_name.lower() in ['unknown','member']):
-            sender_name = 'Lab'
-        if ("travel" in low or any(city in low for city in CITY_KEYWORDS)) and "singapore" not in low:
-            events.append({'timestamp': r['timestamp'], 'date': r['date'], 'type': 'Travel', 'title': 'Travel / Trip', 'detail': txt, 'sender': sender_name, 'role': norm_role})
-        if any(k in low for k in ['book','schedule','panel','test','scan','ecg','cimt','blood draw','mri','ct','ultrasound']):
-            events.append({'timestamp': r['timestamp'], 'date': r['date'], 'type': 'Test/Diagnostics', 'title': 'Diagnostics / Scheduling', 'detail': txt, 'sender': sender_name, 'role': norm_role})
-        if any(k in low for k in ['diet','meal plan','hiit','supplement','omega-3','vitamin','workout','strength','cardio','mobility','plan','routine','session']):
-            events.append({'timestamp': r['timestamp'], 'date': r['date'], 'type': 'Intervention', 'title': 'Plan / Coaching Update', 'detail': txt, 'sender': sender_name, 'role': norm_role})
-        if is_summary_text(txt):
-            events.append({'timestamp': r['timestamp'], 'date': r['date'], 'type': 'Summary', 'title': 'Weekly Summary', 'detail': txt, 'sender': sender_name, 'role': norm_role})
-        # Sleep detection (Garmin etc.) – only keep duration, skip timing tables (Bed → Awake)
-        if any(k in low for k in ['sleep', 'tst', 'garmin', 'advik']):
-            minutes = parse_duration_minutes(low)
-            if minutes is None:
-                smin, emin, dur = parse_time_range_minutes(low)
-                minutes = dur
-            if minutes is not None:
-                if minutes < 180:
-                    minutes = 180
-                events.append({
-                    'timestamp': r['timestamp'], 'date': r['date'], 'type': 'Biomarker',
-                    'title': 'Sleep Tracking', 'detail': f"Sleep log (normalized): {minutes} min | raw: {txt}", 'sender': sender_name, 'role': norm_role
-                })
-        # HRV detection
-
-        if any(k in low for k in EXERCISE_WORDS):
-            minutes = None
-            dmin = parse_duration_minutes(low)
-            if dmin:
-                minutes = dmin
-            else:
-                smin, emin, dur = parse_time_range_minutes(low)
-                if dur:
-                    minutes = dur
-            if minutes is not None:
-                if minutes > 180:
-                    minutes = 45
-                events.append({'timestamp': r['timestamp'], 'date': r['date'], 'type': 'Biomarker', 'title': 'Exercise Tracking', 'detail': f"Exercise log (normalized): {minutes} min | raw: {txt}", 'sender': sender_name, 'role': norm_role})
-
-    ev = pd.DataFrame(events)
-    if not ev.empty:
-        ev.sort_values('timestamp', inplace=True)
-        ev.reset_index(drop=True, inplace=True)
-    return ev
-
-@st.cache_data(show_spinner=False)
-def extract_labs(messages: pd.DataFrame) -> pd.DataFrame:
-    recs = []
-    for _, r in messages.iterrows():
-        txt = str(r['text'])
-        for pat, name in LAB_PATTERNS:
-            m = re.search(pat, txt, flags=re.IGNORECASE)
-            if not m:
-                continue
-            try:
-                if name == 'Blood Pressure' and len(m.groups()) == 2:
-                    syst, diast = m.groups()
-                    recs.append({'timestamp': r['timestamp'], 'marker': 'SBP', 'value': float(syst)})
-                    recs.append({'timestamp': r['timestamp'], 'marker': 'DBP', 'value': float(diast)})
-                else:
-                    val = float(m.group(1))
-                    # --- HRV normalization: clamp to 40–45 if too low ---
-                    if name == 'HRV' and val < 40:
-                        val = float(random.randint(50, 65))
-                    recs.append({'timestamp': r['timestamp'], 'marker': name, 'value': val})
-            except Exception:
-                pass
-
-    df = pd.DataFrame(recs)
-    if not df.empty:
-        df['date'] = pd.to_datetime(df['timestamp']).dt.date
-        df.sort_values('timestamp', inplace=True)
-    return df
-@st.cache_data(show_spinner=False)
-def extract_sleep_metrics(messages: pd.DataFrame) -> pd.DataFrame:
-    rows = []
-    for _, r in messages.iterrows():
-        txt = str(r.get('text',''))
-        low = txt.lower()
-        if not any(k in low for k in ['sleep','slept','asleep','tst','garmin','advik','bedtime','woke up','wake up']):
-            continue
-        smin, emin, dur = parse_time_range_minutes(low)
-        bedtime_str = waketime_str = ''
-        minutes = None
-        if smin is not None and emin is not None and dur is not None:
-            minutes = dur
-            bh, bm = divmod(smin, 60); wh, wm = divmod(emin, 60)
-            bedtime_str = f"{bh:02d}:{bm:02d}"
-            waketime_str = f"{wh:02d}:{wm:02d}"
-        else:
-            dmin = parse_duration_minutes(low)
-            if dmin:
-                minutes = dmin
-            else:
-                m = re.search(r"(\d+(?:\.\d+)?)\s*hours?", low)
-                if m:
-                    try:
-                        minutes = int(float(m.group(1)) * 60)
-                    except Exception:
-                        minutes = None
-        if minutes is not None:
-            if minutes < 180:
-                minutes = 180
-            if minutes > 16*60:
-                minutes = 16*60
-            rows.append({'timestamp': r['timestamp'], 'date': r['timestamp'].date() if pd.notna(r['timestamp']) else None, 'bedtime': bedtime_str, 'waketime': waketime_str, 'sleep_minutes': int(minutes), 'sleep_hours': round(minutes/60.0, 2), 'source': r.get('sender','Unknown')})
-    df = pd.DataFrame(rows)
-    if df.empty:
-        return df
-    df = df.sort_values('timestamp').dropna(subset=['date'])
-    df = df.groupby('date', as_index=False).tail(1).reset_index(drop=True)
-    return df
-
-@st.cache_data(show_spinner=False)
-def extract_activity_minutes(messages: pd.DataFrame) -> pd.DataFrame:
-    rows = []
-    for _, r in messages.iterrows():
-        txt = str(r.get('text',''))
-        low = txt.lower()
-        if not any(k in low for k in EXERCISE_WORDS):
-            continue
-        minutes = None
-        dmin = parse_duration_minutes(low)
-        if dmin:
-            minutes = dmin
-        else:
-            smin, emin, dur = parse_time_range_minutes(low)
-            if dur:
-                minutes = dur
-        if minutes is not None:
-            if minutes > 180:
-                minutes = 45
-            if minutes <= 0:
-                continue
-            a_type = 'exercise'
-            for key in ['hiit','run','jog','walk','cycle','ride','swim','row','elliptical','treadmill','yoga','pilates','strength','weights','gym','hike','tennis','badminton','football','cricket']:
-                if key in low:
-                    a_type = key
-                    break
-            rows.append({'timestamp': r['timestamp'], 'date': r['timestamp'].date() if pd.notna(r['timestamp']) else None, 'activity_minutes': int(minutes), 'activity_type': a_type, 'source': r.get('sender','Unknown')})
-    df = pd.DataFrame(rows)
-    if df.empty:
-        return df
-    df = df.sort_values('timestamp').dropna(subset=['date'])
-    agg = df.groupby('date', as_index=False).agg({'activity_minutes':'sum'})
-    last_ts = df.groupby('date')['timestamp'].max().reset_index().rename(columns={'timestamp':'timestamp_last'})
-    agg = agg.merge(last_ts, on='date', how='left')
-    agg.rename(columns={'timestamp_last':'timestamp'}, inplace=True)
-    return agg
-
-@st.cache_data(show_spinner=False)
-def merge_biomarkers(lab_df: pd.DataFrame, sleep_df: pd.DataFrame, act_df: pd.DataFrame) -> pd.DataFrame:
-    parts = []
-    if lab_df is not None and not lab_df.empty:
-        parts.append(lab_df[['timestamp','marker','value']].copy())
-    if sleep_df is not None and not sleep_df.empty:
-        s = sleep_df.copy()
-        s['marker'] = 'Sleep (hrs)'
-        s.rename(columns={'sleep_hours':'value'}, inplace=True)
-        parts.append(s[['timestamp','marker','value']])
-    if act_df is not None and not act_df.empty:
-        a = act_df.copy()
-        a['marker'] = 'Exercise (min)'
-        a.rename(columns={'activity_minutes':'value'}, inplace=True)
-        parts.append(a[['timestamp','marker','value']])
-    if not parts:
-        return pd.DataFrame(columns=['timestamp','marker','value'])
-    out = pd.concat(parts, ignore_index=True)
-    out['date'] = pd.to_datetime(out['timestamp']).dt.date
-    out.sort_values('timestamp', inplace=True)
-    return out
-
-@st.cache_data(show_spinner=False)
-def extract_decisions(messages: pd.DataFrame) -> pd.DataFrame:
-    rows = []
-    for i, r in messages.iterrows():
-        txt = str(r['text'])
-        low = txt.lower()
-        if any(k in low for k in DECISION_KEYWORDS):
-            t0 = r['timestamp'] - timedelta(days=3)
-            context = messages[(messages['timestamp'] >= t0) & (messages['timestamp'] <= r['timestamp'])]
-            reasons = []
-            for _, c in context.iterrows():
-                if any(x in c['text'].lower() for x in ['because','so that','to ','due to','shows','panel','result','scan','ldl','crp','hrv','bp','sleep','jet lag','travel']):
-                    reasons.append(f"{c['time']} {c['sender']}: {c['text']}")
-            rows.append({'timestamp': r['timestamp'], 'date': r['timestamp'].date(), 'decision_text': txt, 'by': r['sender'], 'role': r['role'], 'rationale_snippets': reasons[:6]})
-    d = pd.DataFrame(rows)
-    if not d.empty:
-        d.sort_values('timestamp', inplace=True)
-        d.reset_index(drop=True, inplace=True)
-    return d
-
-@st.cache_data(show_spinner=False)
-def compute_internal_metrics(messages: pd.DataFrame, weights: dict[str, float]) -> pd.DataFrame:
-    if messages.empty:
-        return pd.DataFrame(columns=['role','interactions','est_minutes','est_hours'])
-    msgs = messages.copy()
-    msgs['day'] = msgs['timestamp'].dt.date
-    role_counts = msgs['role'].fillna('Member').value_counts()
-    total_rows = len(msgs)
-    num_member = int(role_counts.get('Member', 0))
-    if total_rows > 0 and (num_member / float(total_rows) > 0.6 or len(role_counts) == 1):
-        ROLE_KEYWORDS_LOCAL = {
-            'concierge':'Concierge','orchestrator':'Concierge','ruby':'Concierge',
-            'concierge lead':'Concierge Lead','neel':'Concierge Lead',
-            'physician':'Physician','doctor':'Physician','dr.':'Physician','warren':'Physician',
-            'performance':'Performance Scientist','advik':'Performance Scientist',
-            'nutrition':'Nutritionist','carla':'Nutritionist',
-            'physio':'Physiotherapist','physiotherapist':'Physiotherapist','pt':'Physiotherapist','rachel':'Physiotherapist',
-            'lab':'Lab','lab tech':'Lab'
-        }
-        def infer_role_from_sender(sndr: str, current_role: str):
-            if current_role and current_role.lower() not in ['member','unknown','']:
-                return current_role
-            low = (sndr or '').lower()
-            if '(' in sndr and ')' in sndr:
-                try:
-                    name = sndr[:sndr.find('(')].strip()
-                    role_text = sndr[sndr.find('(')+1:sndr.rfind(')')].strip()
-                    if '/' in role_text:
-                        role_text = role_text.split('/')[0].strip()
-                    for k,v in ROLE_KEYWORDS_LOCAL.items():
-                        if k in role_text.lower() or k in low:
-                            return v
-                    return role_text.title() if role_text else 'Member'
-                except Exception:
-                    pass
-            for k, v in ROLE_KEYWORDS_LOCAL.items():
-                if k in low:
-                    return v
-            return 'Member'
-        msgs['role'] = msgs.apply(lambda r: infer_role_from_sender(r.get('sender',''), r.get('role','')), axis=1)
-    grp = msgs.groupby(['day','role']).size().reset_index(name='count')
-    grp['est_minutes'] = grp.apply(lambda r: int(r['count']) * float(weights.get(r['role'], 5)), axis=1)
-    by_role = grp.groupby('role').agg(interactions=('count','sum'), est_minutes=('est_minutes','sum')).reset_index()
-    by_role['est_hours'] = (by_role['est_minutes'] / 60.0).round(2)
-    by_role = by_role.sort_values('est_hours', ascending=False).reset_index(drop=True)
-    return by_role
+# DataFrame arguments are underscore-prefixed so Streamlit does not hash them; the
+# dataset_id (content hash computed once per upload) is the cache key instead.
+@timed_cache(st.cache_data(show_spinner=False))
+def compute_internal_metrics(dataset_id: str, _messages: pd.DataFrame, weights: dict[str, float]) -> pd.DataFrame:
+    return _compute_internal_metrics(_messages, weights)
 
 # Mock data and UI (same as original, with internal metrics behaving as above)
 @st.cache_data(show_spinner=False)
@@ -641,8 +137,116 @@ def load_mock_messages() -> pd.DataFrame:
     df['timestamp'] = pd.to_datetime(df['timestamp'])
     return df
 
+# Uploads above this size are parsed chunk by chunk (each chunk compacted before the next is
+# read) to bound peak memory; classification is left to the background executor.
+STREAM_CSV_BYTES = 32 * 1024 * 1024
+
+# One pipeline per dataset (elyx/pipeline.py), held as a shared resource: reruns get the same
+# frames back without hashing or copying them. A fresh upload is only parsed here; every
+# extracted table (BACKGROUND_NODES) is then built eagerly on the background executor, on
+# whichever page, and a page that needs a table before it is ready waits for it.
+@timed_cache(st.cache_resource(show_spinner=False))
+def get_pipeline(dataset_id: str, _uploaded, name: str) -> tuple[Pipeline, str]:
+    content = _uploaded.getvalue()
+    is_csv = name.lower().endswith('.csv')
+    # a re-uploaded CSV that only gained rows extends its cached predecessor
+    extend = (lambda m, x, offset: append_csv(m, x, content, offset)) if is_csv else None
+    cached = load_cached(content, get_parse_cache(), dataset_id, extend)
+    if cached is not None:
+        messages_df, extracted, source = cached
+        return dataset_pipeline(messages_df, extracted), source
+    # the app holds the compact form (categorical sender/role, no per-row date/time objects)
+    if is_csv and len(content) > STREAM_CSV_BYTES:
+        # parsed chunk by chunk, so only one chunk is ever held in the wide parsed form;
+        # extraction is left to the background executor as for any other upload
+        with stage('stream_parse_messages') as s:
+            parts = [compact_messages(c) for c in iter_csv_messages(content)]
+            messages_df = sort_messages(concat_categorical(parts)) if parts else compact_messages(pd.DataFrame(columns=MESSAGE_COLUMNS))
+            s.rows_out = len(messages_df)
+        return dataset_pipeline(messages_df), 'parse'
+    if name.lower().endswith(('.csv', '.parquet')):
+        messages_df = parse_csv_messages(content)
+    else:
+        messages_df = parse_docx_messages(content)
+    with stage('prepare_messages', rows_in=len(messages_df)) as s:
+        messages_df = compact_messages(prepare_messages(messages_df))
+        s.rows_out = len(messages_df)
+    return dataset_pipeline(messages_df), 'parse'
+
+# Written to the parse cache once all five extracted tables exist, whichever pages built them
+@st.cache_resource(show_spinner=False)
+def persist_dataset(dataset_id: str, _pipe: Pipeline, _uploaded) -> bool:
+    store(get_parse_cache(), dataset_id, _pipe['messages'], _pipe['extraction'], data=_uploaded.getvalue())
+    return True
+
+# Extraction runs here in the background while pages render; one worker computes a dataset's
+# nodes in the order they were submitted (a page that needs a node first computes it itself)
+@st.cache_resource(show_spinner=False)
+def get_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix='elyx-pipeline')
+
+# Pipeline nodes for a page, behind a spinner while any of them is still being extracted
+def page_nodes(*names: str) -> tuple:
+    if pipe.ready(*names):
+        return pipe.get(*names)
+    with st.spinner(f"Extracting {', '.join(names)}…"):
+        return pipe.get(*names)
+
+@st.cache_resource(show_spinner=False)
+def get_parse_cache() -> ParseCache:
+    return ParseCache()
+
+def _chart_points(fig) -> int:
+    n = 0
+    for trace in fig.data:
+        for attr in ('x', 'values'):
+            v = getattr(trace, attr, None)
+            if v is not None:
+                n += len(v)
+                break
+    return n
+
+# st.plotly_chart, recorded as a render stage (figure serialization included)
+def show_chart(fig, name: str):
+    with stage(f'plotly: {name}', rows_in=_chart_points(fig), kind='render'):
+        st.plotly_chart(fig, use_container_width=True)
+
+# Paginated table over an in-memory frame (elyx/paging.py): filter, sort and page slicing run
+# on row positions, and only the page's rows go through ``render`` (display columns, detail
+# text) and out to the browser.
+def paged_table(key: str, df: pd.DataFrame, columns: list[str], render=for_display, sort_cols: list[str] = (), filters: list[str] = (), text_cols: list[str] = ('text',)) -> np.ndarray:
+    choice = {}
+    if filters:
+        for col, box in zip(filters, st.columns(len(filters))):
+            choice[col] = box.multiselect(f'Filter {col}', sorted(df[col].dropna().unique().tolist()), key=f'{key}_filter_{col}')
+    c1, c2, c3, c4 = st.columns([3, 2, 2, 2])
+    sort_by = c1.selectbox('Sort by', list(sort_cols) or [None], key=f'{key}_sort')
+    descending = c2.selectbox('Order', ['Ascending', 'Descending'], key=f'{key}_order') == 'Descending'
+    page_size = c3.selectbox('Rows per page', PAGE_SIZES, index=1, key=f'{key}_size')
+    positions = sort_rows(df, filter_rows(df, choice), sort_by, ascending=not descending)
+    pages = page_count(len(positions), page_size)
+    # a narrower filter can leave the remembered page past the end
+    st.session_state[f'{key}_page'] = min(st.session_state.get(f'{key}_page', 1), pages)
+    page = c4.number_input(f'Page (of {pages:,})', min_value=1, max_value=pages, step=1, key=f'{key}_page')
+    rows = page_rows(positions, page, page_size)
+    view = render(df.iloc[rows])
+    cut = [c for c in text_cols if c in view]
+    if cut and not st.checkbox('Show full text', key=f'{key}_full'):
+        for c in cut:
+            view[c] = truncate_text(view[c])
+    st.dataframe(view[columns])
+    start = (page - 1) * page_size
+    st.caption(f"Rows {min(start + 1, len(positions)):,}–{start + len(rows):,} of {len(positions):,}")
+    return positions
+
 # Sidebar & Data Loading
 
+# Stage recording for the Performance panel, per session; the toggle is drawn further down,
+# but its state is read here so that this run's loading stages are recorded too
+perf_session = st.session_state.setdefault('perf_session', uuid4().hex[:12])
+set_enabled(st.session_state.get('perf_on', False))
+begin_run(perf_session)
+
 # ----------------
 # Sidebar: require an uploaded file (no mock/local fallback)
 # ----------------
@@ -652,9 +256,9 @@ st.sidebar.title("Elyx – Member Journey")
 # ----------------
 with st.sidebar.expander("Data source", expanded=True):
     uploaded = st.file_uploader(
-        "Upload chat transcript (.csv or .docx)",
-        type=["csv", "docx"],
-        help="Upload CSV or .docx transcript (must include timestamp/date and text).",
+        "Upload chat transcript (.csv, .parquet or .docx)",
+        type=["csv", "parquet", "docx"],
+        help="Upload CSV, Parquet (from the converter) or .docx transcript (must include timestamp/date and text).",
         accept_multiple_files=False
     )
 messages_df = None
@@ -667,49 +271,68 @@ if uploaded is None:
     st.stop()
 else:
     try:
-        content = uploaded.read()
-        if uploaded.name.lower().endswith('.csv'):
-            messages_df = parse_csv_messages(content)
-        else:
-            messages_df = parse_docx_messages(content)
-        st.sidebar.success(f"Loaded {uploaded.name}")
+        # fingerprint the upload once; every cached stage below is keyed by it
+        upload_id = getattr(uploaded, 'file_id', None) or f"{uploaded.name}:{getattr(uploaded, 'size', '')}"
+        if st.session_state.get('upload_id') != upload_id:
+            st.session_state['dataset_id'] = cache_key(uploaded.getvalue())
+            st.session_state['upload_id'] = upload_id
+        dataset_id = st.session_state['dataset_id']
+        pipe, load_source = get_pipeline(dataset_id, uploaded, uploaded.name)
+        messages_df = pipe['messages']
+        load_note = {'cache': " (from cache)", 'append': " (new rows added to cached history)"}.get(load_source, "")
+        st.sidebar.success(f"Loaded {uploaded.name}{load_note}")
     except Exception as e:
         st.sidebar.error(f"Could not parse uploaded file: {e}")
         # stop so the rest of UI doesn't try to run on missing/invalid data
         st.stop()
 
-messages_df = messages_df.copy()
-if 'timestamp' in messages_df.columns:
-    messages_df['timestamp'] = pd.to_datetime(messages_df['timestamp'], errors='coerce')
-else:
-    messages_df['timestamp'] = pd.NaT
-messages_df['date'] = messages_df['timestamp'].dt.date
-messages_df['time'] = messages_df['timestamp'].dt.strftime('%H:%M').fillna('')
+with st.sidebar.expander("Parse cache", expanded=False):
+    st.caption("Parsed transcripts are cached on disk by content hash.")
+    if st.button("Clear parse cache"):
+        get_parse_cache().clear()
+        st.success("Cache cleared; the next upload is parsed from scratch.")
+
+# filled in at the end of the script, once this run's page has been rendered
+perf_panel = st.sidebar.expander("Performance", expanded=False)
+perf_panel.toggle("Record pipeline stages", key='perf_on', help="Time every pipeline stage, cached call and page render of each run (rows in/out, memory delta).")
+
+# plotly is only needed once a dataset is loaded, so the upload prompt renders without it
+import plotly.express as px
 
-events_df = extract_events(messages_df)
-lab_df = extract_labs(messages_df)
-sleep_df = extract_sleep_metrics(messages_df)
-activity_df = extract_activity_minutes(messages_df)
-biomarkers_df = merge_biomarkers(lab_df, sleep_df, activity_df)
+# Once the upload is parsed, the extracted tables are computed in the background, KPI tables
+# first. The header polls until they are all ready, then reruns the page with the results.
+BACKGROUND_NODES = ('decisions', 'labs', 'events', 'sleep', 'activity', 'biomarkers')
+extraction_jobs = pipe.submit(get_executor(), *BACKGROUND_NODES)
+extracting = not all(f.done() for f in extraction_jobs.values())
+if messages_df['timestamp'].notna().any():
+    days = (messages_df['timestamp'].max() - messages_df['timestamp'].min()).days + 1
+else:
+    days = 0
 
 # Header KPIs
-col1, col2, col3, col4 = st.columns(4)
-with col1:
-    st.markdown("**Messages**")
-    st.markdown(f"<div class='kpi'><div style='font-size:1.4rem'>{len(messages_df)}</div><div class='small'>total</div></div>", unsafe_allow_html=True)
-with col2:
-    if messages_df['timestamp'].notna().any():
-        days = (messages_df['timestamp'].max() - messages_df['timestamp'].min()).days + 1
-    else:
-        days = 0
-    st.markdown("**Journey Length**")
-    st.markdown(f"<div class='kpi'><div style='font-size:1.4rem'>{days} days</div><div class='small'>covered</div></div>", unsafe_allow_html=True)
-with col3:
-    st.markdown("**Decisions**")
-    st.markdown(f"<div class='kpi'><div style='font-size:1.4rem'>{len(extract_decisions(messages_df))}</div><div class='small'>identified</div></div>", unsafe_allow_html=True)
-with col4:
-    st.markdown("**Lab Readings**")
-    st.markdown(f"<div class='kpi'><div style='font-size:1.4rem'>{lab_df['marker'].nunique() if not lab_df.empty else 0}</div><div class='small'>unique markers</div></div>", unsafe_allow_html=True)
+@st.fragment(run_every=0.5 if extracting else None)
+def header_kpis():
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.markdown("**Messages**")
+        st.markdown(f"<div class='kpi'><div style='font-size:1.4rem'>{len(messages_df)}</div><div class='small'>total</div></div>", unsafe_allow_html=True)
+    with col2:
+        st.markdown("**Journey Length**")
+        st.markdown(f"<div class='kpi'><div style='font-size:1.4rem'>{days} days</div><div class='small'>covered</div></div>", unsafe_allow_html=True)
+    with col3:
+        st.markdown("**Decisions**")
+        st.markdown(f"<div class='kpi'><div style='font-size:1.4rem'>{len(pipe['decisions']) if pipe.ready('decisions') else '…'}</div><div class='small'>identified</div></div>", unsafe_allow_html=True)
+    with col4:
+        st.markdown("**Lab Readings**")
+        st.markdown(f"<div class='kpi'><div style='font-size:1.4rem'>{(pipe['labs']['marker'].nunique() if not pipe['labs'].empty else 0) if pipe.ready('labs') else '…'}</div><div class='small'>unique markers</div></div>", unsafe_allow_html=True)
+    done = sum(f.done() for f in extraction_jobs.values())
+    if done < len(extraction_jobs):
+        st.progress(done / len(extraction_jobs), text=f"Extracting in the background: {done} of {len(extraction_jobs)} tables ready")
+    elif extracting:
+        # everything finished since the last full run: redraw the page with it
+        st.rerun()
+
+header_kpis()
 
 st.markdown("---")
 
@@ -726,6 +349,7 @@ nav_options = [   # NEW — appears before Persona
     "Conversation"
 ]
 page = st.sidebar.radio("Go to", nav_options)
+page_stage = start_stage(f'page: {page}', kind='render')
 
 if page == 'Advanced Journey Tracker':
     st.header('Advanced Journey Tracker (external)')
@@ -752,18 +376,27 @@ if page == 'Persona':
 # Journey Timeline
 elif page == 'Journey Timeline':
     st.header('Journey Timeline')
+    events_df, = page_nodes('events')
     if events_df.empty:
         st.info('No events detected yet. Upload a CSV or docx transcript.')
     else:
-        df = events_df.copy()
-        df['when'] = pd.to_datetime(df['timestamp'])
-        df['y'] = df['type']
-        fig = px.scatter(df, x='when', y='y', color='type', hover_data=['title','detail','sender','role'])
+        if len(events_df) > MAX_EVENT_POINTS:
+            # too many to plot one by one: event counts per type and time bucket
+            pts = bucket_events(events_df, MAX_EVENT_POINTS)
+            fig = px.scatter(pts, x='when', y='type', color='type', size='count', hover_data=['count','start','end','title'], render_mode=render_mode(len(pts)))
+        else:
+            df = for_display(events_df)
+            df['detail'] = event_details(events_df, messages_df)
+            pts = df.assign(when=pd.to_datetime(df['timestamp']), y=df['type'])
+            fig = px.scatter(pts, x='when', y='y', color='type', hover_data=['title','detail','sender','role'], render_mode=render_mode(len(pts)))
         fig.update_yaxes(title='Event Type')
         fig.update_xaxes(title='Time')
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig, 'journey timeline')
+        st.caption(f"{len(pts):,} points for {len(events_df):,} events, {payload_bytes(fig) / 1024:,.0f} KB sent" + (" (bucketed counts; details are in the table below)" if len(events_df) > MAX_EVENT_POINTS else ""))
         st.markdown('#### Events Table')
-        st.dataframe(df[['date','type','title','detail','sender','role']])
+        paged_table('events', events_df, ['date','type','title','detail','sender','role'],
+                    render=lambda page: for_display(page).assign(detail=event_details(page, messages_df)),
+                    sort_cols=['timestamp','type','title','sender','role'], filters=['type','role'], text_cols=['detail'])
 
 # Day Snapshot
 elif page == 'Day Snapshot':
@@ -773,18 +406,20 @@ elif page == 'Day Snapshot':
     else:
         dmin = messages_df['date'].min()
         dmax = messages_df['date'].max()
+        dmin, dmax = (d.date() if pd.notna(d) else d for d in (dmin, dmax))
         sel = st.date_input('Select a date', value=dmax if pd.notna(dmax) else date.today(), min_value=dmin, max_value=dmax)
-        day_msgs = messages_df[messages_df['date'] == sel]
+        day_msgs = for_display(messages_df.iloc[day_rows(pipe['message_dates'], sel)])
         st.subheader('Messages on selected day')
         if day_msgs.empty:
             st.write('No messages on this date.')
         else:
             st.dataframe(day_msgs[['time','sender','role','text']])
         st.subheader('Biomarkers near this date (±7 days)')
+        biomarkers_df, sleep_df, activity_df = page_nodes('biomarkers', 'sleep', 'activity')
         if biomarkers_df.empty:
             st.write('No biomarker readings parsed yet.')
         else:
-            near = biomarkers_df[(biomarkers_df['date'] >= sel - timedelta(days=7)) & (biomarkers_df['date'] <= sel + timedelta(days=7))]
+            near = biomarkers_df.iloc[window_rows(pipe['biomarker_dates'], sel - timedelta(days=7), sel + timedelta(days=7))]
             if near.empty:
                 st.write('No biomarkers within the window.')
             else:
@@ -792,16 +427,16 @@ elif page == 'Day Snapshot':
                 st.dataframe(piv)
         st.subheader('Sleep & Activity')
         srow = None
-        if not sleep_df.empty:
-            s_candidates = sleep_df[sleep_df['date'] <= sel]
-            if not s_candidates.empty:
-                srow = s_candidates.iloc[-1]
+        s_pos = last_row_until(pipe['sleep_dates'], sel)
+        if s_pos is not None:
+            srow = sleep_df.iloc[s_pos]
         if srow is not None:
             st.markdown(f"**Sleep**: {srow['sleep_hours']} h" + (f" (bed {srow['bedtime']} → wake {srow['waketime']})" if srow['bedtime'] or srow['waketime'] else ""))
         else:
             st.markdown("**Sleep**: no log")
-        if not activity_df.empty and sel in set(activity_df['date']):
-            mins = int(activity_df[activity_df['date'] == sel]['activity_minutes'].iloc[0])
+        a_pos = day_rows(pipe['activity_dates'], sel)
+        if len(a_pos):
+            mins = int(activity_df['activity_minutes'].iloc[a_pos[0]])
             st.markdown(f"**Exercise**: {mins} min")
         else:
             st.markdown("**Exercise**: no log")
@@ -819,24 +454,26 @@ if page == 'Advanced Decisions Explorer':
 # Decisions & Reasons
 elif page == 'Decisions & Reasons':
     st.header('Decisions & Reasons')
-    decisions_df = extract_decisions(messages_df)
+    decisions_df, = page_nodes('decisions')
     if decisions_df.empty:
         st.info('No decisions detected (look for words like "start", "prescribe", "schedule").')
     else:
-        sel_idx = st.selectbox('Select a decision', options=list(decisions_df.index), format_func=lambda i: f"{decisions_df.loc[i,'date']} – {decisions_df.loc[i,'by']} ({decisions_df.loc[i,'role']}): {decisions_df.loc[i,'decision_text'][:80]}…")
+        decision_text_by_row = decision_texts(decisions_df, messages_df)
+        sel_idx = st.selectbox('Select a decision', options=list(decisions_df.index), format_func=lambda i: f"{decisions_df.loc[i,'date']} – {decisions_df.loc[i,'by']} ({decisions_df.loc[i,'role']}): {decision_text_by_row[i][:80]}…")
         row = decisions_df.loc[sel_idx]
         # Replace the old single-line display:
         # st.write(row['decision_text'])
 
         # With this (renders literal "\n" as new lines)
-        decision_text = str(row.get('decision_text', ''))
+        decision_text = decision_text_by_row[sel_idx]
         # convert literal backslash-n sequences into actual line breaks
         decision_text = decision_text.replace('\\n', '\n')
         st.subheader('Decision Text')
         st.text(decision_text)   # or st.write(decision_text) / st.markdown(decision_text)
         st.subheader('Rationale snippets (auto-extracted)')
-        if row['rationale_snippets']:
-            for s in row['rationale_snippets']:
+        snippets = rationale_snippets(row['rationale_ids'], messages_df)
+        if snippets:
+            for s in snippets:
                 clean = str(s).replace('\\n', '\n')               # convert literal \n to newline
                 # inside a markdown list item, indent subsequent lines so they stay in the same bullet
                 bullet_safe = clean.replace('\n', '\n  ')
@@ -844,13 +481,13 @@ elif page == 'Decisions & Reasons':
 
         else:
             st.write('No explicit rationale snippets; showing neighborhood messages:')
-            t0, t1 = row['timestamp'] - timedelta(days=3), row['timestamp']
-            neigh = messages_df[(messages_df['timestamp'] >= t0) & (messages_df['timestamp'] <= t1)]
-            st.dataframe(neigh[['date','time','sender','role','text']])
+            t0, t1 = row['timestamp'] - DECISION_LOOKBACK, row['timestamp']
+            paged_table('neighbourhood', messages_df.iloc[window_rows(pipe['message_times'], t0, t1)], ['date','time','sender','role','text'], sort_cols=['timestamp','sender','role'])
 
 # Biomarkers
 elif page == 'Biomarkers':
     st.header('Biomarker Trends (incl. Sleep & Exercise)')
+    biomarkers_df, = page_nodes('biomarkers')
     if biomarkers_df.empty:
         st.info('No biomarker readings parsed yet. Ensure your transcript contains lab numbers, sleep logs (e.g. "23:45-06:30" or "TST 6h 30m"), and exercise durations (e.g. "run 45 min").')
     else:
@@ -859,10 +496,13 @@ elif page == 'Biomarkers':
         pick = st.multiselect('Choose markers to plot', options=markers, default=default_pick or markers[:3])
         if pick:
             sub = biomarkers_df[biomarkers_df['marker'].isin(pick)]
-            fig = px.line(sub, x='timestamp', y='value', color='marker', markers=True)
-            st.plotly_chart(fig, use_container_width=True)
+            # LTTB keeps the shape of each series within MAX_LINE_POINTS points
+            shown = downsample_lines(sub, 'timestamp', 'value', 'marker', MAX_LINE_POINTS)
+            fig = px.line(shown, x='timestamp', y='value', color='marker', markers=len(shown) <= MAX_LINE_POINTS, render_mode=render_mode(len(shown)))
+            show_chart(fig, 'biomarkers')
+            st.caption(f"{len(shown):,} of {len(sub):,} readings plotted, {payload_bytes(fig) / 1024:,.0f} KB sent")
         st.markdown('#### Raw biomarker table')
-        st.dataframe(biomarkers_df.sort_values('timestamp'))
+        paged_table('biomarkers', biomarkers_df, list(biomarkers_df.columns), render=lambda page: page.copy(), sort_cols=['timestamp','marker','value'], filters=['marker'], text_cols=[])
         # Removed extra sleep timing table (bed → wake)
 
 
@@ -872,18 +512,9 @@ elif page == 'Internal Metrics':
     st.caption('Estimated internal hours spent by role (members and unnamed roles are excluded automatically).')
 
     # Use sensible default per-interaction minutes (no sliders)
-    weights = {
-        'Physician': 12,
-        'Nutritionist': 8,
-        'Physiotherapist': 8,
-        'Concierge': 6,
-        'Concierge Lead': 10,
-        'Performance Scientist': 8,
-        'Lab': 5,
-        'Member': 0
-    }
+    weights = DEFAULT_ROLE_WEIGHTS
 
-    met = compute_internal_metrics(messages_df, weights)
+    met = compute_internal_metrics(dataset_id, messages_df, weights)
 
     # Exclude Member and any blank/unknown role names
     if not met.empty:
@@ -908,11 +539,11 @@ elif page == 'Internal Metrics':
         fig = px.bar(met, x='role', y='est_hours', title='Estimated hours by role', text='est_hours')
         fig.update_layout(yaxis_title='Hours', xaxis_title='Role')
         fig.update_traces(texttemplate='%{text:.2f}', textposition='outside')
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig, 'internal metrics bar')
 
         # Pie chart (visual share)
         fig2 = px.pie(met, names='role', values='est_hours', title='Share of estimated hours')
-        st.plotly_chart(fig2, use_container_width=True)
+        show_chart(fig2, 'internal metrics pie')
 
         # CSV download
         st.download_button('Download internal metrics CSV', data=met.to_csv(index=False).encode('utf-8'), file_name='internal_metrics.csv', mime='text/csv')
@@ -925,15 +556,38 @@ elif page == 'Conversation':
     else:
         roles = ['All'] + sorted(messages_df['role'].unique().tolist())
         role_sel = st.selectbox('Filter role', roles)
-        q = st.text_input('Search text')
-        view = messages_df.copy()
-        if role_sel != 'All':
-            view = view[view['role'] == role_sel]
-        if q:
-            view = view[view['text'].str.contains(q, case=False, na=False)]
-        st.dataframe(view[['date','time','sender','role','text']])
-        st.download_button('Download messages CSV', data=view.to_csv(index=False).encode('utf-8'), file_name='messages_filtered.csv', mime='text/csv')
+        q = st.text_input('Search text', help='Matches messages containing every word, as a word prefix ("chol" finds cholesterol). Put "quoted phrases" in double quotes.')
+        within = (messages_df['role'] == role_sel).to_numpy() if role_sel != 'All' else None
+        if q.strip():
+            hits = search(pipe['text_index'], messages_df['text'], q, within=within)
+            view = messages_df.iloc[hits]
+        else:
+            view = messages_df if within is None else messages_df[within]
+        paged_table('conversation', view, ['date','time','sender','role','text'], sort_cols=['timestamp','sender','role'])
+        # the CSV is only built when the button is clicked
+        st.download_button('Download messages CSV', data=lambda: for_display(view).to_csv(index=False).encode('utf-8'), file_name='messages_filtered.csv', mime='text/csv')
+
+page_stage.finish()
+
+# a fresh upload reaches the on-disk parse cache (and later appends) once its extraction is complete
+if load_source == 'parse' and pipe.ready(*Extraction._fields):
+    persist_dataset(dataset_id, pipe, uploaded)
 
 # Footer
 st.markdown('---')
 st.markdown('**Notes:**\n- Upload a CSV with columns like timestamp,sender,role,text OR date+time+sender+text.\n- The app auto-extracts travel/test/intervention events, lab numbers, **sleep timing** and **exercise minutes**.')
+
+# Performance panel (sidebar)
+with perf_panel:
+    if is_enabled():
+        records = pd.DataFrame(run_records())
+        st.caption(f"This run: {len(records)} stages" + (f", {records.loc[records['kind'] != 'cache hit', 'ms'].max():,.0f} ms slowest" if len(records) else ""))
+        if len(records):
+            st.dataframe(records[['stage', 'kind', 'ms', 'compute_ms', 'rows_in', 'rows_out', 'mem_delta_mb']], hide_index=True)
+        st.download_button("Download stage log (JSON lines)", data=partial(stage_log_jsonl, perf_session), file_name='elyx_perf.jsonl', mime='application/jsonl')
+        if st.button("Clear stage log"):
+            clear_stage_log(perf_session)
+    else:
+        st.caption("Turn recording on to time each stage of the next runs.")
+    st.caption("Per cached function: hits, misses, compute time on misses vs. the cost of hashing arguments and copying results.")
+    st.dataframe(pd.DataFrame(cache_stats_rows()), hide_index=True)
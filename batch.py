@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Headless batch run over many members
+------------------------------------
+Runs the same pipeline as the app (parse, events, labs, sleep, activity, decisions,
+biomarkers, internal metrics) over a directory of per-member transcripts in the
+`Messages Database.csv` format, one member per worker process.
+
+Usage:
+    python batch.py transcripts/ out/ --workers 8
+
+Output:
+    out/<member>/<table>.csv   one file per table, <member> being the transcript file name
+    out/timings.csv            per-member row counts and stage timings (seconds)
+
+Members are independent, so throughput scales with the number of worker processes
+(default: one per CPU core). A transcript that fails to parse is reported in
+timings.csv and does not stop the batch.
+"""
+
+from __future__ import annotations
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+from elyx.extract import extract_all, extract_chunks, with_text
+from elyx.ingest import compact_messages, parse_csv_messages, iter_csv_messages
+from elyx.metrics import DEFAULT_ROLE_WEIGHTS, compute_internal_metrics, merge_biomarkers
+
+# transcripts above this size are parsed and classified chunk by chunk (as in the app)
+STREAM_CSV_BYTES = 32 * 1024 * 1024
+
+
+def process_member(path: str, out_dir: str) -> dict:
+    """Run the full pipeline for one transcript and write its tables; returns a timings row."""
+    member = Path(path).stem
+    row = {'member': member, 'pid': os.getpid()}
+    t0 = time.perf_counter()
+    try:
+        if os.path.getsize(path) > STREAM_CSV_BYTES:
+            messages, extracted = extract_chunks(compact_messages(c) for c in iter_csv_messages(path))
+            t1 = t2 = time.perf_counter()
+        else:
+            messages = compact_messages(parse_csv_messages(path))
+            t1 = time.perf_counter()
+            extracted = extract_all(messages)
+            t2 = time.perf_counter()
+        # written tables are self-contained: message text instead of row references
+        tables = with_text(extracted, messages)._asdict()
+        tables['biomarkers'] = merge_biomarkers(extracted.labs, extracted.sleep, extracted.activity)
+        tables['internal_metrics'] = compute_internal_metrics(messages, DEFAULT_ROLE_WEIGHTS)
+        t3 = time.perf_counter()
+        member_dir = Path(out_dir) / member
+        member_dir.mkdir(parents=True, exist_ok=True)
+        for name, df in tables.items():
+            df.to_csv(member_dir / f'{name}.csv', index=False)
+        t4 = time.perf_counter()
+    except Exception as e:
+        row.update(error=repr(e), total_s=round(time.perf_counter() - t0, 3))
+        return row
+    row.update(
+        messages=len(messages), events=len(extracted.events), labs=len(extracted.labs), decisions=len(extracted.decisions),
+        parse_s=round(t1 - t0, 3), extract_s=round(t2 - t1, 3), metrics_s=round(t3 - t2, 3), write_s=round(t4 - t3, 3),
+        total_s=round(t4 - t0, 3), error='',
+    )
+    return row
+
+
+def run_batch(input_dir: str, out_dir: str, workers: int | None = None) -> pd.DataFrame:
+    paths = sorted(str(p) for p in Path(input_dir).glob('*.csv'))
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(process_member, p, out_dir) for p in paths]
+        for done, fut in enumerate(as_completed(futures), 1):
+            row = fut.result()
+            rows.append(row)
+            status = f"error: {row['error']}" if row.get('error') else f"{row['messages']} messages in {row['total_s']:.2f}s"
+            print(f"[{done}/{len(paths)}] {row['member']}: {status}")
+    timings = pd.DataFrame(rows)
+    if not timings.empty:
+        timings = timings.sort_values('member').reset_index(drop=True)
+    timings.to_csv(Path(out_dir) / 'timings.csv', index=False)
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the member-journey pipeline over a directory of transcript CSVs.")
+    parser.add_argument('input_dir', help='Directory of per-member transcript .csv files')
+    parser.add_argument('output_dir', help='Directory to write per-member tables and timings.csv into')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: number of CPU cores)')
+    args = parser.parse_args(argv)
+
+    if not Path(args.input_dir).is_dir():
+        print(f"Not a directory: {args.input_dir}", file=sys.stderr)
+        sys.exit(2)
+    t0 = time.perf_counter()
+    timings = run_batch(args.input_dir, args.output_dir, args.workers)
+    wall = time.perf_counter() - t0
+    if timings.empty:
+        print("No .csv transcripts found.")
+        return
+    failed = int((timings['error'] != '').sum()) if 'error' in timings else 0
+    print(f"Processed {len(timings)} members ({failed} failed) in {wall:.2f}s ({len(timings) / wall:.1f} members/s); "
+          f"timings in {Path(args.output_dir) / 'timings.csv'}")
+
+
+if __name__ == '__main__':
+    main()
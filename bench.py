@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite over synthetic transcripts
+------------------------------------------
+Generates seeded synthetic transcripts (elyx/synth.py) at the requested sizes and times
+every pipeline stage on them: CSV parsing, each extractor, biomarker merging, internal
+metrics and the converter's parse_lines. Each stage records its wall time and its peak
+memory. The memory stage records the deep size of the tables the app holds instead: the
+transcript in its legacy shape vs compact_messages, and events/decisions as row references
+vs with the message text copied in (with_text). Results are appended to a JSON-lines file,
+tagged with the git commit, so runs can be compared across commits.
+
+Usage:
+    python bench.py --rows 10000 100000 1000000
+    python bench.py --rows 100000 --stages parse extract_all --repeat 3
+    python bench.py --compare HEAD~3        # this run vs the stored results of a commit
+
+Output:
+    bench_results.jsonl    one line per (run, rows, stage): commit, seconds, peak_mb, rows out
+                           (memory_* stages: frame_mb, the table's deep memory_usage)
+
+Peak memory is the stage's resident-set high-water mark above what the process held when
+the stage started. It is read from /proc on Linux (the mark is reset before each stage) and
+from tracemalloc elsewhere, which only sees Python-level allocations.
+"""
+
+from __future__ import annotations
+import argparse
+import gc
+import importlib.util
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+from elyx import extract
+from elyx.ingest import compact_messages, parse_csv_messages
+from elyx.metrics import DEFAULT_ROLE_WEIGHTS, compute_internal_metrics, merge_biomarkers
+from elyx.synth import iter_synthetic_messages, transcript_lines, write_synthetic_csv
+
+ROOT = Path(__file__).resolve().parent
+RESULTS = ROOT / 'bench_results.jsonl'
+STAGES = ['generate', 'parse', 'compact', 'extract_events', 'extract_labs', 'extract_sleep_metrics',
+          'extract_activity_minutes', 'extract_decisions', 'extract_all', 'memory', 'merge_biomarkers',
+          'compute_internal_metrics', 'converter_parse_lines']
+
+
+def frame_mb(df: pd.DataFrame) -> float:
+    return df.memory_usage(index=True, deep=True).sum() / 2**20
+
+
+def legacy_frame(parsed: pd.DataFrame) -> pd.DataFrame:
+    """The parsed transcript as the app held it before compact_messages: every parsed
+    column kept, text columns as Python str objects."""
+    return parsed.astype({c: object for c in parsed.columns if c != 'timestamp'})
+
+
+def load_converter():
+    """Supporting flies/converter.py as a module (its folder name is not importable)."""
+    spec = importlib.util.spec_from_file_location('converter', ROOT / 'Supporting flies' / 'converter.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _status_kb(field: str) -> int | None:
+    try:
+        with open('/proc/self/status') as f:
+            m = re.search(rf'^{field}:\s+(\d+) kB', f.read(), re.MULTILINE)
+        return int(m.group(1)) if m else None
+    except OSError:
+        return None
+
+
+def _reset_peak() -> bool:
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def measure(fn):
+    """Run ``fn()``; returns (result, seconds, peak MB above the starting footprint)."""
+    gc.collect()
+    use_proc = _reset_peak() and _status_kb('VmHWM') is not None
+    if use_proc:
+        base = _status_kb('VmRSS')
+    else:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - t0
+    if use_proc:
+        peak_mb = (_status_kb('VmHWM') - base) / 1024
+    else:
+        peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    return result, seconds, max(peak_mb, 0.0)
+
+
+def git_commit() -> str:
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, timeout=10)
+        commit = out.stdout.strip() or 'unknown'
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT, capture_output=True, text=True, timeout=30)
+        return commit + ('-dirty' if dirty.stdout.strip() else '')
+    except (OSError, subprocess.SubprocessError):
+        return 'unknown'
+
+
+def resolve_commit(ref: str) -> str:
+    out = subprocess.run(['git', 'rev-parse', '--short', ref], cwd=ROOT, capture_output=True, text=True)
+    return out.stdout.strip() or ref
+
+
+def run_size(rows: int, seed: int, stages: list[str], repeat: int, workdir: str, converter) -> list[dict]:
+    """Time the stages on one transcript size; returns one record per stage (best of ``repeat``
+    for time, largest peak)."""
+    csv_path = os.path.join(workdir, f'synthetic_{rows}_{seed}.csv')
+    state = {}
+
+    def step(name, fn):
+        best = None
+        for _ in range(repeat if name in stages else 1):
+            result, seconds, peak = measure(fn)
+            best = (result, min(seconds, best[1]), max(peak, best[2])) if best else (result, seconds, peak)
+        result, seconds, peak = best
+        state[name] = result
+        if name in stages:
+            out_rows = len(result) if hasattr(result, '__len__') and not isinstance(result, tuple) else None
+            if isinstance(result, extract.Extraction):
+                out_rows = sum(len(t) for t in result)
+            records.append({'stage': name, 'seconds': round(seconds, 4), 'peak_mb': round(peak, 1), 'rows_out': out_rows})
+            print(f'  {name:26} {seconds:9.3f} s {peak:9.1f} MB', flush=True)
+
+    def sizes(**tables):
+        for name, df in tables.items():
+            mb = frame_mb(df)
+            records.append({'stage': f'memory_{name}', 'seconds': None, 'peak_mb': None, 'frame_mb': round(mb, 2), 'rows_out': len(df)})
+            print(f'  {"memory_" + name:26} {mb:9.1f} MB deep', flush=True)
+
+    records = []
+    step('generate', lambda: write_synthetic_csv(csv_path, rows, seed))
+    step('parse', lambda: parse_csv_messages(csv_path))
+    step('compact', lambda: compact_messages(state['parse']))
+    messages = state['compact']
+    if 'memory' in stages:
+        sizes(messages_legacy=legacy_frame(state['parse']), messages_compact=messages)
+    del state['parse']
+    for name in ['extract_events', 'extract_labs', 'extract_sleep_metrics', 'extract_activity_minutes', 'extract_decisions']:
+        if name in stages:
+            step(name, lambda name=name: getattr(extract, name)(messages))
+            del state[name]
+    step('extract_all', lambda: extract.extract_all(messages))
+    ex = state['extract_all']
+    if 'memory' in stages:
+        texts = extract.with_text(ex, messages)
+        sizes(events_refs=ex.events, events_text=texts.events, decisions_refs=ex.decisions, decisions_text=texts.decisions)
+        del texts
+    if 'merge_biomarkers' in stages:
+        step('merge_biomarkers', lambda: merge_biomarkers(ex.labs, ex.sleep, ex.activity))
+    if 'compute_internal_metrics' in stages:
+        step('compute_internal_metrics', lambda: compute_internal_metrics(messages, DEFAULT_ROLE_WEIGHTS))
+    if 'converter_parse_lines' in stages:
+        state.clear()
+        del messages, ex
+        gc.collect()
+        # chunk by chunk: a repeated date header at a chunk boundary is harmless to the parser
+        lines = [line for chunk in iter_synthetic_messages(rows, seed) for line in transcript_lines(chunk)]
+        step('converter_parse_lines', lambda: converter.parse_lines(lines))
+    os.remove(csv_path)
+    return records
+
+
+def load_results(path: Path) -> pd.DataFrame:
+    if not path.exists():
+        return pd.DataFrame()
+    with open(path, encoding='utf-8') as f:
+        return pd.DataFrame([json.loads(line) for line in f if line.strip()])
+
+
+def compare(current: pd.DataFrame, stored: pd.DataFrame, commit: str) -> pd.DataFrame:
+    """Stage-by-stage ratio of this run to the stored results of ``commit`` (same sizes)."""
+    if stored.empty:
+        return pd.DataFrame()
+    base = stored[stored['commit'].str.startswith(commit)]
+    if base.empty:
+        return pd.DataFrame()
+    # the latest stored measurement of each (size, stage)
+    base = base.sort_values('run', kind='stable').drop_duplicates(['rows', 'stage'], keep='last')
+    merged = current.merge(base, on=['rows', 'stage'], suffixes=('', '_base'))
+    merged['time_ratio'] = (merged['seconds'] / merged['seconds_base']).round(2)
+    merged['mem_ratio'] = (merged['peak_mb'] / merged['peak_mb_base'].where(merged['peak_mb_base'] > 0)).round(2)
+    cols = ['rows', 'stage', 'seconds_base', 'seconds', 'time_ratio', 'peak_mb_base', 'peak_mb', 'mem_ratio']
+    if 'frame_mb' in merged and 'frame_mb_base' in merged:
+        merged['frame_ratio'] = (merged['frame_mb'] / merged['frame_mb_base']).round(2)
+        cols += ['frame_mb_base', 'frame_mb', 'frame_ratio']
+    return merged[cols]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description='Benchmark the pipeline on seeded synthetic transcripts.')
+    ap.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000], help='transcript sizes (messages)')
+    ap.add_argument('--seed', type=int, default=0)
+    ap.add_argument('--stages', nargs='+', default=STAGES, choices=STAGES, help='stages to record (default: all)')
+    ap.add_argument('--repeat', type=int, default=1, help='runs per stage; the best time is kept')
+    ap.add_argument('--results', default=str(RESULTS), help='JSON-lines results file to append to')
+    ap.add_argument('--no-save', action='store_true', help='print results without storing them')
+    ap.add_argument('--compare', metavar='COMMIT', help='compare with the stored results of this commit')
+    ap.add_argument('--workdir', default=None, help='where generated transcripts are written (default: a temp dir)')
+    args = ap.parse_args(argv)
+
+    commit = git_commit()
+    run = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+    env = {'python': platform.python_version(), 'pandas': pd.__version__, 'machine': platform.machine(), 'cpus': os.cpu_count()}
+    converter = load_converter()
+    records = []
+    with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+        for rows in args.rows:
+            print(f'{rows:,} messages (seed {args.seed}, commit {commit})', flush=True)
+            for rec in run_size(rows, args.seed, args.stages, args.repeat, workdir, converter):
+                records.append({'run': run, 'commit': commit, 'rows': rows, 'seed': args.seed, **rec, **env})
+
+    results = Path(args.results)
+    stored = load_results(results)
+    if not args.no_save:
+        with open(results, 'a', encoding='utf-8') as f:
+            for rec in records:
+                f.write(json.dumps(rec) + '\n')
+        print(f'Appended {len(records)} results to {results}')
+    if args.compare:
+        table = compare(pd.DataFrame(records), stored, resolve_commit(args.compare))
+        if table.empty:
+            print(f'No stored results for {args.compare} at these sizes.')
+        else:
+            print(table.to_string(index=False))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
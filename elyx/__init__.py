@@ -0,0 +1,42 @@
+"""Elyx member-journey core: parsing and extraction without the Streamlit UI.
+
+Names are resolved lazily, so ``import elyx`` is cheap and only the submodules that are
+actually used get imported (pandas is loaded by the first parser or extractor used).
+"""
+
+import importlib
+
+_EXPORTS = {
+    'Extraction': 'extract', 'extract_all': 'extract', 'extract_chunks': 'extract', 'classify_messages': 'extract',
+    'extract_events': 'extract', 'extract_labs': 'extract', 'extract_sleep_metrics': 'extract',
+    'extract_activity_minutes': 'extract', 'extract_decisions': 'extract',
+    'event_details': 'extract', 'decision_texts': 'extract', 'rationale_snippets': 'extract', 'with_text': 'extract',
+    'parse_csv_messages': 'ingest', 'iter_csv_messages': 'ingest', 'prepare_messages': 'ingest',
+    'compact_messages': 'ingest', 'for_display': 'ingest',
+    'DateIndex': 'dateindex', 'build_date_index': 'dateindex', 'day_rows': 'dateindex', 'window_rows': 'dateindex',
+    'last_row_until': 'dateindex',
+    'lttb': 'downsample', 'downsample_lines': 'downsample', 'bucket_events': 'downsample',
+    'filter_rows': 'paging', 'sort_rows': 'paging', 'page_rows': 'paging', 'truncate_text': 'paging',
+    'synthetic_messages': 'synth', 'iter_synthetic_messages': 'synth', 'write_synthetic_csv': 'synth',
+    'TextIndex': 'search', 'build_text_index': 'search', 'search': 'search',
+    'Pipeline': 'pipeline', 'Node': 'pipeline', 'DATASET_NODES': 'pipeline', 'dataset_pipeline': 'pipeline',
+    'parse_docx_messages': 'docxparse', 'iter_docx_messages': 'docxparse',
+    'merge_biomarkers': 'metrics', 'compute_internal_metrics': 'metrics', 'DEFAULT_ROLE_WEIGHTS': 'metrics',
+    'infer_sender_and_role': 'roles',
+    'parse_time_range_minutes': 'timeparse', 'parse_duration_minutes': 'timeparse', 'parse_time_columns': 'timeparse',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
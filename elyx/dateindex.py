@@ -0,0 +1,48 @@
+# Sorted date indexes for day and window lookups (Day Snapshot, decision neighbourhoods).
+#
+# Each index is the frame's dates as datetime64, sorted once, plus the row positions in that
+# order (a stable sort, so rows sharing a date keep their frame order). A day or a date window
+# is then two binary searches and a slice instead of a comparison over the whole column.
+# Lookups return ascending row positions for .iloc, so results keep the frame's own order.
+# Missing dates (NaT) sort last and never match a lookup.
+
+from __future__ import annotations
+from datetime import date, datetime
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+
+class DateIndex(NamedTuple):
+    keys: np.ndarray    # datetime64[ns], ascending (NaT last)
+    order: np.ndarray   # row positions of the frame, in key order
+
+
+def _key(value) -> np.datetime64:
+    return np.datetime64(pd.Timestamp(value).as_unit('ns'))
+
+
+def build_date_index(values) -> DateIndex:
+    """Index a column of dates or timestamps (date objects, datetime64 or strings)."""
+    keys = pd.to_datetime(pd.Series(values), errors='coerce').to_numpy(dtype='datetime64[ns]')
+    order = np.argsort(keys, kind='stable')
+    return DateIndex(keys=keys[order], order=order)
+
+
+def window_rows(index: DateIndex, start, end) -> np.ndarray:
+    """Positions of the rows with start <= date <= end."""
+    lo = np.searchsorted(index.keys, _key(start), side='left')
+    hi = np.searchsorted(index.keys, _key(end), side='right')
+    return np.sort(index.order[lo:hi])
+
+
+def day_rows(index: DateIndex, day: date | datetime) -> np.ndarray:
+    """Positions of the rows dated ``day`` (for an index built on calendar dates)."""
+    return window_rows(index, day, day)
+
+
+def last_row_until(index: DateIndex, day: date | datetime) -> int | None:
+    """Position of the last row dated on or before ``day`` (ties: the last in frame order)."""
+    hi = np.searchsorted(index.keys, _key(day), side='right')
+    return int(index.order[hi - 1]) if hi else None
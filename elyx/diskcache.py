@@ -0,0 +1,164 @@
+# Persistent parse cache: parsed messages + every extractor output, stored as Parquet.
+#
+# Entries are content-addressed: SHA-256 of the uploaded bytes plus the extractor version,
+# which is itself a hash of the elyx sources, so editing any rule or extractor invalidates
+# old entries automatically. Total size is capped with least-recently-used eviction.
+# Each entry also records the size and digest of its source bytes, so a later upload that
+# starts with those bytes (the same export with rows appended) can extend it instead of
+# being parsed from scratch.
+
+from __future__ import annotations
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .extract import Extraction
+
+CACHE_DIR = os.environ.get('ELYX_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'elyx'))
+CACHE_MAX_BYTES = int(os.environ.get('ELYX_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+
+FRAMES = ('messages',) + Extraction._fields
+
+
+def extractor_version() -> str:
+    """Hash of the elyx package sources; changes whenever parsing or extraction rules change."""
+    h = hashlib.sha256()
+    for path in sorted(Path(__file__).parent.glob('*.py')):
+        h.update(path.name.encode())
+        h.update(path.read_bytes())
+    return h.hexdigest()[:16]
+
+
+EXTRACTOR_VERSION = extractor_version()
+
+
+def cache_key(data: bytes, version: str = EXTRACTOR_VERSION) -> str:
+    h = hashlib.sha256(data)
+    h.update(version.encode())
+    return h.hexdigest()
+
+
+class ParseCache:
+    """Directory of ``<key>/<frame>.parquet`` entries with size-based LRU eviction."""
+
+    def __init__(self, root: str = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+
+    def _entry(self, key: str) -> Path:
+        return self.root / key
+
+    def get(self, key: str) -> tuple[pd.DataFrame, Extraction] | None:
+        entry = self._entry(key)
+        if not entry.is_dir():
+            return None
+        try:
+            frames = {name: pd.read_parquet(entry / f'{name}.parquet') for name in FRAMES}
+        except Exception:
+            shutil.rmtree(entry, ignore_errors=True)
+            return None
+        d = frames['decisions']
+        if 'rationale_ids' in d:
+            d['rationale_ids'] = [np.asarray(ids, dtype=np.int64) for ids in d['rationale_ids']]
+        os.utime(entry)  # mark as recently used
+        return frames.pop('messages'), Extraction(**frames)
+
+    def put(self, key: str, messages: pd.DataFrame, extracted: Extraction, source: bytes | None = None) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(dir=self.root, prefix='.tmp-'))
+        try:
+            messages.to_parquet(tmp / 'messages.parquet')
+            for name, frame in zip(Extraction._fields, extracted):
+                frame.to_parquet(tmp / f'{name}.parquet')
+            if source is not None:
+                manifest = {'size': len(source), 'sha256': hashlib.sha256(source).hexdigest(), 'version': EXTRACTOR_VERSION}
+                (tmp / 'source.json').write_text(json.dumps(manifest))
+            entry = self._entry(key)
+            shutil.rmtree(entry, ignore_errors=True)
+            os.replace(tmp, entry)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict()
+
+    def find_prefix(self, data: bytes) -> tuple[str, int] | None:
+        """(key, size) of the largest current-version entry whose source is a proper prefix
+        of ``data`` ending on a line boundary, or None."""
+        candidates = []
+        for entry, _, _ in self.entries():
+            try:
+                manifest = json.loads((entry / 'source.json').read_text())
+            except (OSError, ValueError):
+                continue
+            size = manifest.get('size', 0)
+            if manifest.get('version') == EXTRACTOR_VERSION and 0 < size < len(data) and data[size - 1:size] == b'\n':
+                candidates.append((size, entry.name, manifest['sha256']))
+        for size, key, digest in sorted(candidates, reverse=True):
+            if hashlib.sha256(memoryview(data)[:size]).hexdigest() == digest:
+                return key, size
+        return None
+
+    def entries(self) -> list[tuple[Path, int, float]]:
+        """(path, size in bytes, last used) for every complete entry."""
+        if not self.root.is_dir():
+            return []
+        out = []
+        for entry in self.root.iterdir():
+            if entry.is_dir() and not entry.name.startswith('.'):
+                size = sum(f.stat().st_size for f in entry.iterdir())
+                out.append((entry, size, entry.stat().st_mtime))
+        return out
+
+    def evict(self) -> None:
+        entries = sorted(self.entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        while entries and total > self.max_bytes:
+            entry, size, _ = entries.pop(0)
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def clear(self) -> None:
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def load_cached(data: bytes, cache: ParseCache | None = None, key: str | None = None, extend=None) -> tuple[pd.DataFrame, Extraction, str] | None:
+    """(messages, extraction, source) from the cache entry of ``data`` ('cache') or from
+    extending the entry of a prefix ('append', stored under ``data``'s key), or None when
+    neither applies and the caller has to parse. Pass ``key`` when the cache_key of ``data``
+    is already known.
+
+    ``extend(messages, extraction, offset)`` is tried when an entry for a prefix of
+    ``data`` exists; it returns the updated (messages, extraction), or None."""
+    cache = cache or ParseCache()
+    key = key or cache_key(data)
+    try:
+        hit = cache.get(key)
+    except Exception:
+        hit = None
+    if hit is not None:
+        return hit[0], hit[1], 'cache'
+    if extend is None:
+        return None
+    try:
+        prefix = cache.find_prefix(data)
+        base = cache.get(prefix[0]) if prefix else None
+    except Exception:
+        base = None
+    built = extend(base[0], base[1], prefix[1]) if base is not None else None
+    if built is None:
+        return None
+    store(cache, key, *built, data=data)
+    return built[0], built[1], 'append'
+
+
+def store(cache: ParseCache, key: str, messages: pd.DataFrame, extracted: Extraction, data: bytes | None = None) -> None:
+    """cache.put that never fails the caller (the cache is only an accelerator)."""
+    try:
+        cache.put(key, messages, extracted, source=data)
+    except Exception:
+        pass
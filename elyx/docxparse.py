@@ -0,0 +1,94 @@
+# .docx transcript ingestion (the in-app form of Supporting flies/converter.py).
+#
+# Paragraphs are streamed straight out of word/document.xml with iterparse, each element
+# being discarded once read, so memory stays flat however long the document is (python-docx
+# would build the whole XML tree first). The line rules shared with the converter
+# (transcript.py) run as a generator over those paragraphs, and rows go into the same
+# normalization as CSV uploads in fixed-size chunks, so there is no intermediate CSV file.
+
+from __future__ import annotations
+import zipfile
+from io import BytesIO
+from typing import Iterator
+from xml.etree.ElementTree import iterparse
+
+import pandas as pd
+
+from .ingest import CSV_CHUNK_ROWS, MESSAGE_COLUMNS, normalize_messages, sort_messages
+from .transcript import iter_lines, iter_message_rows
+
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_BODY, _P, _R, _HYPERLINK = W + 'body', W + 'p', W + 'r', W + 'hyperlink'
+# text equivalents of run content, as python-docx's Paragraph.text renders them
+_RUN_TEXT = {W + 'tab': '\t', W + 'ptab': '\t', W + 'cr': '\n', W + 'noBreakHyphen': '-'}
+
+# rows carry ISO dates (transcript.normalize_date_str) and HH:MM times
+DOCX_FORMATS = {'date': '%Y-%m-%d', 'time': '%H:%M'}
+
+
+def _run_text(run) -> str:
+    out = []
+    for e in run:
+        if e.tag == W + 't':
+            out.append(e.text or '')
+        elif e.tag == W + 'br':
+            out.append('\n' if e.get(W + 'type', 'textWrapping') == 'textWrapping' else '')
+        else:
+            out.append(_RUN_TEXT.get(e.tag, ''))
+    return ''.join(out)
+
+
+def _paragraph_text(p) -> str:
+    out = []
+    for child in p:
+        if child.tag == _R:
+            out.append(_run_text(child))
+        elif child.tag == _HYPERLINK:
+            out.extend(_run_text(r) for r in child if r.tag == _R)
+    return ''.join(out)
+
+
+def iter_docx_paragraphs(file_bytes_or_path) -> Iterator[str]:
+    """Yield the non-empty body paragraphs of a .docx, split into lines (the converter's
+    read_docx_paragraphs plus its newline expansion)."""
+    src = BytesIO(file_bytes_or_path) if isinstance(file_bytes_or_path, (bytes, bytearray)) else file_bytes_or_path
+    with zipfile.ZipFile(src) as z, z.open('word/document.xml') as xml:
+        depth = 0
+        body_depth = None
+        for event, elem in iterparse(xml, events=('start', 'end')):
+            if event == 'start':
+                depth += 1
+                if elem.tag == _BODY:
+                    body_depth = depth
+                continue
+            depth -= 1
+            if elem.tag == _P and body_depth is not None and depth == body_depth:
+                yield from iter_lines((_paragraph_text(elem).replace('\u00a0', ' '),))
+            if body_depth is not None and depth == body_depth:
+                elem.clear()  # top-level block done; drop its subtree
+
+
+def iter_docx_messages(file_bytes_or_path, chunksize: int = CSV_CHUNK_ROWS, date_format: str | None = None) -> Iterator[pd.DataFrame]:
+    """Yield normalized message chunks (canonical columns only, document order) of a .docx."""
+    formats = dict(DOCX_FORMATS)
+    cols = {'date': [], 'time': [], 'sender': [], 'message': []}
+
+    def flush():
+        chunk = pd.DataFrame(cols, dtype='str')
+        for v in cols.values():
+            v.clear()
+        return normalize_messages(chunk, formats)[MESSAGE_COLUMNS].reset_index(drop=True)
+
+    for row in iter_message_rows(iter_docx_paragraphs(file_bytes_or_path), date_format):
+        for k, v in cols.items():
+            v.append(row[k])
+        if len(cols['date']) >= chunksize:
+            yield flush()
+    if cols['date']:
+        yield flush()
+
+
+def parse_docx_messages(file_bytes_or_path, date_format: str | None = None) -> pd.DataFrame:
+    parts = list(iter_docx_messages(file_bytes_or_path, date_format=date_format))
+    df = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=MESSAGE_COLUMNS)
+    return sort_messages(df)
@@ -0,0 +1,87 @@
+# Point caps for the Journey Timeline and Biomarkers charts.
+#
+# However long the journey, a chart is sent at most a fixed number of points. Line series are
+# thinned with Largest-Triangle-Three-Buckets (LTTB), which keeps the points that give the
+# line its shape (peaks, troughs, steps) rather than every n-th reading. Past the cap, the
+# event scatter becomes counts per (type, time bucket), so density stays visible; per-event
+# detail text then stays out of the chart payload and is read from the events table instead.
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+MAX_LINE_POINTS = 2000      # per series
+MAX_EVENT_POINTS = 4000     # per chart
+WEBGL_POINTS = 1000         # traces above this many points render as scattergl
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Positions of the ``n_out`` points LTTB keeps from a series with ascending ``x``."""
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1][:n_out])
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # first and last points are kept; the rest fall into n_out - 2 equal-count buckets
+    edges = (1 + np.arange(n_out - 1) * (n - 2) / (n_out - 2)).astype(np.int64)
+    cx, cy = np.r_[0, np.cumsum(x)], np.r_[0, np.cumsum(y)]
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # the next bucket's centroid (the last point, for the final bucket)
+        nlo, nhi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        bx, by = (cx[nhi] - cx[nlo]) / (nhi - nlo), (cy[nhi] - cy[nlo]) / (nhi - nlo)
+        area = np.abs((x[a] - bx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (by - y[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def downsample_lines(df: pd.DataFrame, x: str, y: str, by: str, max_points: int = MAX_LINE_POINTS) -> pd.DataFrame:
+    """Rows of ``df`` kept by LTTB, at most ``max_points`` per ``by`` group (in ``x`` order)."""
+    keep = []
+    for _, group in df.groupby(by, sort=False, observed=True):
+        group = group.dropna(subset=[x, y]).sort_values(x, kind='stable')
+        xs = pd.to_datetime(group[x]).to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        keep.append(group.iloc[lttb(xs, group[y].to_numpy(dtype=np.float64), max_points)])
+    return pd.concat(keep) if keep else df.iloc[:0]
+
+
+def bucket_events(events: pd.DataFrame, max_points: int = MAX_EVENT_POINTS) -> pd.DataFrame:
+    """Event counts per (type, time bucket): columns when (bucket middle), type, count,
+    start, end and title (the bucket's first event title, as an example). Bucket width is
+    chosen so that there are at most ``max_points`` rows."""
+    ev = events.dropna(subset=['timestamp'])
+    cols = ['when', 'type', 'count', 'start', 'end', 'title']
+    if ev.empty:
+        return pd.DataFrame(columns=cols)
+    t = ev['timestamp'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+    n_types = max(int(ev['type'].nunique()), 1)
+    n_buckets = max(max_points // n_types, 1)
+    # whole-second bucket edges, so the bucket bounds serialize without sub-second noise
+    second = 10**9
+    t0 = int(t.min()) // second * second
+    width = max(-(-(int(t.max()) - t0 + 1) // n_buckets // second), 1) * second
+    bucket = (t - t0) // width
+    grouped = ev.assign(_bucket=bucket).groupby(['type', '_bucket'], sort=True, observed=True)
+    out = grouped.agg(count=('title', 'size'), title=('title', 'first')).reset_index()
+    start = t0 + out['_bucket'].to_numpy() * width
+    out['start'] = pd.to_datetime(start)
+    out['end'] = pd.to_datetime(start + width - second)
+    out['when'] = pd.to_datetime(start + width // 2)
+    return out[cols]
+
+
+def render_mode(points: int) -> str:
+    """Plotly Express render_mode for a trace of ``points`` points."""
+    return 'webgl' if points > WEBGL_POINTS else 'svg'
+
+
+def payload_bytes(fig) -> int:
+    """Size of the figure JSON the browser receives."""
+    return len(fig.to_json().encode('utf-8'))
@@ -0,0 +1,380 @@
+# Single-pass extraction engine.
+#
+# classify_messages() lowercases every message once, flags every keyword category in a
+# single scan (keywords.MATCHER), and parses times and durations column-wise (timeparse)
+# for the rows that need them.
+# The events / labs / sleep / activity / decisions tables are then built from that frame,
+# so one pass over the transcript feeds all five outputs. extract_chunks() does the same
+# for a transcript that arrives in chunks (ingest.iter_csv_messages), classifying each
+# chunk as it is read; batch.py uses it, while the app parses large uploads in chunks and
+# leaves extraction to its background pipeline.
+#
+# Events and decisions refer to their messages by row position (msg_id, rationale_ids)
+# rather than carrying copies of the text; event_details(), decision_texts() and
+# rationale_snippets() render the text for the rows being shown, and with_text() restores
+# the full-text tables for export.
+
+from __future__ import annotations
+import re
+import random
+from datetime import timedelta
+from typing import Iterable, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from .rules import DECISION_LOOKBACK, MAX_RATIONALE_SNIPPETS
+from .keywords import MATCHER
+from .ingest import MESSAGE_COLUMNS, clock_strings, concat_categorical
+from .labs import lab_readings
+from .perf import stage
+from .rationale import build_rationale_index, window_bounds, window_slice
+from .roles import infer_sender_and_role, map_unique
+from .timeparse import TIME_COLUMNS, parse_time_columns
+
+EVENT_COLUMNS = ["timestamp","date","type","title","sender","role","msg_id","minutes"]
+
+# events whose detail carries the normalized minutes ahead of the message text
+_LOG_DETAIL = {'Sleep Tracking': 'Sleep log', 'Exercise Tracking': 'Exercise log'}
+
+SLEEP_HOURS_RE = re.compile(r"(\d+(?:\.\d+)?)\s*hours?")
+
+
+class Extraction(NamedTuple):
+    events: pd.DataFrame
+    labs: pd.DataFrame
+    sleep: pd.DataFrame
+    activity: pd.DataFrame
+    decisions: pd.DataFrame
+
+
+def _any_of(words: list[str]) -> str:
+    return '|'.join(re.escape(w) for w in words)
+
+
+def _contains(low: pd.Series, pattern: str) -> np.ndarray:
+    return low.str.contains(pattern, regex=True).to_numpy(dtype=bool, copy=True)
+
+
+def _summary_mask(low: pd.Series) -> np.ndarray:
+    """Vectorized weekly-summary detection (same rules, same precedence as the row-wise check)."""
+    m = _contains(low, r"weekly summary|week summary|weekly progress summary")
+    m |= _contains(low, r"\bweekly\b") & _contains(low, r"\b(?:update|report|progress|summary|check)\b")
+    m |= _contains(low, r"summary.{0,50}week|week.{0,50}summary")
+    m |= _contains(low, r"\bweek(?:'s)?\b") & _contains(low, r"\b(?:summary|update|report)\b")
+    m |= _contains(low, r"weekly") & _contains(low, _any_of(['summary','update','report','progress','check','notes']))
+    return m
+
+
+def classify_messages(messages: pd.DataFrame) -> pd.DataFrame:
+    """Return one feature row per message (positional index): text, category flags and the
+    parsed time columns (timeparse.TIME_COLUMNS) for the rows that mention sleep or exercise."""
+    texts = pd.Series([str(t) for t in messages['text']], dtype=object) if 'text' in messages else pd.Series([''] * len(messages), dtype=object)
+    # 'str' is Arrow-backed when pyarrow is installed, which runs the summary regexes natively
+    low = texts.astype('str').str.lower()
+    f = pd.DataFrame({'text': texts})
+    hits = MATCHER.match_series(low)
+    f['travel'] = hits['travel'].to_numpy() & ~hits['home_city'].to_numpy()
+    for cat in ['diagnostic', 'intervention', 'sleep_event', 'sleep', 'exercise', 'decision', 'rationale']:
+        f[cat] = hits[cat].to_numpy()
+    f['summary'] = _summary_mask(low)
+    # times and durations are parsed once per dataset and shared by events, sleep and activity
+    need = np.flatnonzero(f['sleep_event'].to_numpy() | f['sleep'].to_numpy() | f['exercise'].to_numpy())
+    f[TIME_COLUMNS] = parse_time_columns(low.iloc[need])
+    return f
+
+
+def _event_sender(sender, role) -> tuple[str, str]:
+    name, role = infer_sender_and_role(str(sender).strip(), str(role).strip())
+    if role == 'Lab' and (not name or name.lower() in ['unknown','member']):
+        name = 'Lab'
+    return name, role
+
+
+def _event_senders(messages: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """Resolve (sender, role) for every row, running the inference once per distinct pair."""
+    n = len(messages)
+    if n == 0:
+        return np.array([], dtype=object), np.array([], dtype=object)
+    senders = messages['sender'] if 'sender' in messages else pd.Series([''] * n)
+    roles = messages['role'] if 'role' in messages else pd.Series([''] * n)
+    names, roles = map_unique(_event_sender, senders, roles)
+    return names, roles
+
+
+def _minutes(f: pd.DataFrame, col: str) -> np.ndarray:
+    return f[col].to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _exercise_minutes(duration: np.ndarray, range_minutes: np.ndarray) -> np.ndarray:
+    # the stated duration, else the time range's length; zero counts as missing
+    out = np.where(np.nan_to_num(range_minutes) != 0, range_minutes, np.nan)
+    return np.where(np.nan_to_num(duration) != 0, duration, out)
+
+
+def build_events(messages: pd.DataFrame, f: pd.DataFrame) -> pd.DataFrame:
+    if messages.empty:
+        return pd.DataFrame(columns=EVENT_COLUMNS)
+    pos_parts, rank_parts, type_parts, title_parts, minutes_parts = [], [], [], [], []
+
+    def add(pos, rank, etype, title, minutes):
+        pos_parts.append(np.asarray(pos, dtype=np.int64))
+        rank_parts.append(np.full(len(pos), rank, dtype=np.int64))
+        type_parts.append(np.full(len(pos), etype, dtype=object))
+        title_parts.append(np.full(len(pos), title, dtype=object))
+        minutes_parts.append(np.asarray(minutes, dtype=np.float64))
+
+    for rank, (col, etype, title) in enumerate([
+        ('travel', 'Travel', 'Travel / Trip'),
+        ('diagnostic', 'Test/Diagnostics', 'Diagnostics / Scheduling'),
+        ('intervention', 'Intervention', 'Plan / Coaching Update'),
+        ('summary', 'Summary', 'Weekly Summary'),
+    ]):
+        pos = np.flatnonzero(f[col].to_numpy())
+        add(pos, rank, etype, title, np.full(len(pos), np.nan))
+    # Sleep detection (Garmin etc.) – only keep duration, skip timing tables (Bed → Awake)
+    duration, range_minutes = _minutes(f, 'duration'), _minutes(f, 'range_minutes')
+    pos = np.flatnonzero(f['sleep_event'].to_numpy())
+    mins = np.where(np.isnan(duration[pos]), range_minutes[pos], duration[pos])
+    pos, mins = pos[~np.isnan(mins)], mins[~np.isnan(mins)]
+    add(pos, 4, 'Biomarker', 'Sleep Tracking', np.maximum(mins, 180))
+    pos = np.flatnonzero(f['exercise'].to_numpy())
+    mins = _exercise_minutes(duration[pos], range_minutes[pos])
+    pos, mins = pos[~np.isnan(mins)], mins[~np.isnan(mins)]
+    mins[mins > 180] = 45
+    add(pos, 5, 'Biomarker', 'Exercise Tracking', mins)
+
+    pos = np.concatenate(pos_parts)
+    if len(pos) == 0:
+        return pd.DataFrame()
+    # message order first, then the per-message event order of the row-wise extractor
+    order = np.lexsort((np.concatenate(rank_parts), pos))
+    pos = pos[order]
+    ts = pd.Series(messages['timestamp'].to_numpy()[pos])
+    by_time = ts.sort_values().index.to_numpy()
+    order = order[by_time]; pos = pos[by_time]
+    names, roles = _event_senders(messages)
+    return pd.DataFrame({
+        'timestamp': ts.to_numpy()[by_time],
+        'date': messages['date'].to_numpy()[pos],
+        'type': pd.Categorical(np.concatenate(type_parts)[order]),
+        'title': pd.Categorical(np.concatenate(title_parts)[order]),
+        'sender': pd.Categorical(names[pos]),
+        'role': pd.Categorical(roles[pos]),
+        'msg_id': pos,
+        'minutes': pd.array(np.concatenate(minutes_parts)[order], dtype='Int64'),
+    })
+
+
+def event_details(events: pd.DataFrame, messages: pd.DataFrame) -> pd.Series:
+    """The 'detail' text of ``events`` (any subset of an events table): the message, with the
+    normalized minutes ahead of it for sleep and exercise logs."""
+    if events.empty:
+        return pd.Series([], index=events.index, dtype=object)
+    texts = messages['text'].iloc[events['msg_id'].to_numpy()].to_numpy()
+    minutes = events['minutes'].to_numpy(dtype=object, na_value=None)
+    out = []
+    for text, title, m in zip(texts, events['title'].to_numpy(), minutes):
+        log = _LOG_DETAIL.get(title)
+        out.append(f"{log} (normalized): {m} min | raw: {text}" if log and m is not None else str(text))
+    return pd.Series(out, index=events.index, dtype=object)
+
+
+def build_labs(messages: pd.DataFrame, f: pd.DataFrame) -> pd.DataFrame:
+    readings = lab_readings(f['text'])
+    if readings.empty:
+        return pd.DataFrame()
+    pos = readings['pos'].to_numpy()
+    markers = readings['marker'].to_numpy()
+    values = readings['value'].to_numpy(copy=True)
+    # --- HRV normalization: low readings replaced in message order ---
+    for j in np.flatnonzero((markers == 'HRV') & (values < 40)):
+        values[j] = float(random.randint(50, 65))
+    df = pd.DataFrame({'timestamp': messages['timestamp'].to_numpy()[pos], 'marker': markers, 'value': values})
+    df['date'] = pd.to_datetime(df['timestamp']).dt.date
+    df.sort_values('timestamp', inplace=True)
+    return df
+
+
+def _row_date(ts):
+    return ts.date() if pd.notna(ts) else None
+
+
+def _clock(minutes: np.ndarray) -> list[str]:
+    h, m = divmod(minutes.astype(np.int64), 60)
+    return [f"{a:02d}:{b:02d}" for a, b in zip(h.tolist(), m.tolist())]
+
+
+def build_sleep_metrics(messages: pd.DataFrame, f: pd.DataFrame) -> pd.DataFrame:
+    pos = np.flatnonzero(f['sleep'].to_numpy())
+    bed, wake, length, duration = (_minutes(f, col)[pos] for col in TIME_COLUMNS)
+    ranged = ~np.isnan(length)
+    # a time range gives the minutes and the bed/wake times; else a stated duration, else "N hours"
+    minutes = np.where(ranged, length, np.where(np.nan_to_num(duration) != 0, duration, np.nan))
+    rest = np.flatnonzero(np.isnan(minutes))
+    if len(rest):
+        hours = pd.Series(f['text'].to_numpy()[pos[rest]], dtype=object).str.lower().str.extract(SLEEP_HOURS_RE)[0]
+        minutes[rest] = np.trunc(hours.astype(np.float64).to_numpy() * 60)
+    keep = ~np.isnan(minutes)
+    if not keep.any():
+        return pd.DataFrame()
+    pos, ranged, minutes = pos[keep], ranged[keep], np.clip(minutes[keep], 180, 16*60)
+    bedtime = np.full(len(pos), '', dtype=object); waketime = bedtime.copy()
+    bedtime[ranged] = _clock(bed[keep][ranged]); waketime[ranged] = _clock(wake[keep][ranged])
+    ts = messages['timestamp'].iloc[pos]
+    df = pd.DataFrame({
+        'timestamp': ts.to_numpy(), 'date': [_row_date(t) for t in ts], 'bedtime': bedtime, 'waketime': waketime,
+        'sleep_minutes': minutes.astype(np.int64), 'sleep_hours': np.round(minutes / 60.0, 2),
+        'source': messages['sender'].to_numpy()[pos] if 'sender' in messages else 'Unknown',
+    })
+    df = df.sort_values('timestamp').dropna(subset=['date'])
+    df = df.groupby('date', as_index=False).tail(1).reset_index(drop=True)
+    return df
+
+
+def build_activity_minutes(messages: pd.DataFrame, f: pd.DataFrame) -> pd.DataFrame:
+    pos = np.flatnonzero(f['exercise'].to_numpy())
+    minutes = _exercise_minutes(_minutes(f, 'duration')[pos], _minutes(f, 'range_minutes')[pos])
+    minutes[minutes > 180] = 45
+    keep = minutes > 0
+    if not keep.any():
+        return pd.DataFrame()
+    ts = messages['timestamp'].iloc[pos[keep]]
+    df = pd.DataFrame({'timestamp': ts.to_numpy(), 'date': [_row_date(t) for t in ts], 'activity_minutes': minutes[keep].astype(np.int64)})
+    df = df.sort_values('timestamp').dropna(subset=['date'])
+    agg = df.groupby('date', as_index=False).agg({'activity_minutes':'sum'})
+    last_ts = df.groupby('date')['timestamp'].max().reset_index().rename(columns={'timestamp':'timestamp_last'})
+    agg = agg.merge(last_ts, on='date', how='left')
+    agg.rename(columns={'timestamp_last':'timestamp'}, inplace=True)
+    return agg
+
+
+def build_decisions(messages: pd.DataFrame, f: pd.DataFrame, lookback: timedelta = DECISION_LOOKBACK, max_snippets: int = MAX_RATIONALE_SNIPPETS) -> pd.DataFrame:
+    dec = np.flatnonzero(f['decision'].to_numpy())
+    if len(dec) == 0:
+        return pd.DataFrame()
+    index = build_rationale_index(messages['timestamp'], f['rationale'].to_numpy())
+    ts = messages['timestamp']
+    lo, hi = window_bounds(index, ts.to_numpy()[dec], lookback)
+    # views into the index's position array: no per-decision copies
+    rationale_ids = [window_slice(index, a, b, max_snippets) for a, b in zip(lo.tolist(), hi.tolist())]
+    dec_ts = ts.iloc[dec]
+    d = pd.DataFrame({
+        'timestamp': dec_ts.to_numpy(),
+        'date': [t.date() for t in dec_ts],
+        'msg_id': dec,
+        'by': messages['sender'].iloc[dec].reset_index(drop=True),
+        'role': messages['role'].iloc[dec].reset_index(drop=True),
+        'rationale_ids': rationale_ids,
+    })
+    d.sort_values('timestamp', inplace=True)
+    d.reset_index(drop=True, inplace=True)
+    return d
+
+
+def decision_texts(decisions: pd.DataFrame, messages: pd.DataFrame) -> pd.Series:
+    """The message text of each decision in ``decisions``."""
+    if decisions.empty:
+        return pd.Series([], index=decisions.index, dtype=object)
+    texts = messages['text'].iloc[decisions['msg_id'].to_numpy()].to_numpy()
+    return pd.Series([str(t) for t in texts], index=decisions.index, dtype=object)
+
+
+def rationale_snippets(ids, messages: pd.DataFrame) -> list[str]:
+    """The "HH:MM sender: text" lines for one decision's rationale_ids."""
+    ids = np.asarray(ids, dtype=np.int64)
+    if len(ids) == 0:
+        return []
+    rows = messages.iloc[ids]
+    times = clock_strings(rows['timestamp']).to_numpy()
+    return [f"{t} {s}: {x}" for t, s, x in zip(times, rows['sender'].to_numpy(), rows['text'].to_numpy())]
+
+
+def with_text(extracted: Extraction, messages: pd.DataFrame) -> Extraction:
+    """``extracted`` with the message text written into the tables (events 'detail',
+    decisions 'decision_text' and 'rationale_snippets') in place of the row references,
+    for exports and anything else that needs self-contained tables."""
+    events, decisions = extracted.events, extracted.decisions
+    if 'msg_id' in events:
+        events = events.assign(detail=event_details(events, messages))
+        events = events[["timestamp","date","type","title","detail","sender","role"]]
+    if 'msg_id' in decisions:
+        # all snippets rendered in one batch, then split back per decision
+        ids = list(decisions['rationale_ids'])
+        lines = rationale_snippets(np.concatenate(ids) if ids else [], messages)
+        ends = np.cumsum([len(i) for i in ids]).tolist()
+        decisions = decisions.assign(
+            decision_text=decision_texts(decisions, messages),
+            rationale_snippets=[lines[a:b] for a, b in zip([0] + ends[:-1], ends)],
+        )[['timestamp','date','decision_text','by','role','rationale_snippets']]
+    return extracted._replace(events=events, decisions=decisions)
+
+
+def extract_all(messages: pd.DataFrame, lookback: timedelta = DECISION_LOOKBACK, max_snippets: int = MAX_RATIONALE_SNIPPETS) -> Extraction:
+    """Classify the transcript once and build every extractor output from that pass."""
+    return _build_all(messages, _classify(messages), lookback, max_snippets)
+
+
+def _classify(messages: pd.DataFrame) -> pd.DataFrame:
+    with stage('classify_messages', rows_in=len(messages)) as s:
+        f = classify_messages(messages)
+        s.rows_out = len(f)
+    return f
+
+
+def _build_all(messages: pd.DataFrame, f: pd.DataFrame, lookback: timedelta, max_snippets: int) -> Extraction:
+    # each builder is a stage of its own in the performance log (perf.stage)
+    def build(name, builder, *args):
+        with stage(name, rows_in=len(messages)) as s:
+            out = builder(messages, f, *args)
+            s.rows_out = len(out)
+        return out
+
+    return Extraction(
+        events=build('build_events', build_events),
+        labs=build('build_labs', build_labs),
+        sleep=build('build_sleep_metrics', build_sleep_metrics),
+        activity=build('build_activity_minutes', build_activity_minutes),
+        decisions=build('build_decisions', build_decisions, lookback, max_snippets),
+    )
+
+
+def extract_chunks(chunks: Iterable[pd.DataFrame], lookback: timedelta = DECISION_LOOKBACK, max_snippets: int = MAX_RATIONALE_SNIPPETS) -> tuple[pd.DataFrame, Extraction]:
+    """Streaming form of extract_all: classify each message chunk as it arrives, then sort the
+    combined transcript by timestamp (as parse_csv_messages does) and build every output.
+    Returns (messages, extraction)."""
+    parts, feats = [], []
+    for chunk in chunks:
+        chunk = chunk.reset_index(drop=True)
+        parts.append(chunk)
+        feats.append(_classify(chunk))
+    if not parts:
+        parts = [pd.DataFrame(columns=MESSAGE_COLUMNS)]
+        feats = [classify_messages(parts[0])]
+    messages = concat_categorical(parts)
+    f = pd.concat(feats, ignore_index=True)
+    del parts, feats
+    messages = messages.sort_values('timestamp', na_position='last')
+    f = f.take(messages.index.to_numpy()).reset_index(drop=True)
+    messages.reset_index(drop=True, inplace=True)
+    return messages, _build_all(messages, f, lookback, max_snippets)
+
+
+def extract_events(messages: pd.DataFrame) -> pd.DataFrame:
+    return build_events(messages, classify_messages(messages))
+
+
+def extract_labs(messages: pd.DataFrame) -> pd.DataFrame:
+    return build_labs(messages, classify_messages(messages))
+
+
+def extract_sleep_metrics(messages: pd.DataFrame) -> pd.DataFrame:
+    return build_sleep_metrics(messages, classify_messages(messages))
+
+
+def extract_activity_minutes(messages: pd.DataFrame) -> pd.DataFrame:
+    return build_activity_minutes(messages, classify_messages(messages))
+
+
+def extract_decisions(messages: pd.DataFrame, lookback: timedelta = DECISION_LOOKBACK, max_snippets: int = MAX_RATIONALE_SNIPPETS) -> pd.DataFrame:
+    return build_decisions(messages, classify_messages(messages), lookback, max_snippets)
@@ -0,0 +1,110 @@
+# Incremental refresh for transcripts that only grow.
+#
+# A daily re-upload of the same export is the previous file plus new rows. When the new rows
+# are all later than the stored transcript, the extractors run on those rows alone (plus a
+# lookback's worth of history for decision rationale) and the results are merged into the
+# stored tables. Anything else, such as back-dated or edited rows, returns None and the
+# caller rebuilds from scratch.
+#
+# Events and decisions point at message rows by position (msg_id, rationale_ids), so every
+# reference is translated to the merged transcript's row order before the tables are merged.
+
+from __future__ import annotations
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from .rules import DECISION_LOOKBACK, MAX_RATIONALE_SNIPPETS
+from .extract import (Extraction, build_activity_minutes, build_decisions, build_events, build_labs,
+                      build_sleep_metrics, classify_messages, extract_all)
+from .ingest import COMPACT_COLUMNS, compact_messages, concat_categorical, parse_appended_csv
+
+
+def _stack(old: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    parts = [d for d in (old, new) if not d.empty]
+    if not parts:
+        return old
+    if len(parts) == 1:
+        return parts[0]
+    return concat_categorical(parts)
+
+
+def _remap_events(events: pd.DataFrame, rows: np.ndarray) -> pd.DataFrame:
+    if events.empty or 'msg_id' not in events:
+        return events
+    return events.assign(msg_id=rows[events['msg_id'].to_numpy()])
+
+
+def _remap_decisions(decisions: pd.DataFrame, rows: np.ndarray) -> pd.DataFrame:
+    if decisions.empty or 'msg_id' not in decisions:
+        return decisions
+    return decisions.assign(
+        msg_id=rows[decisions['msg_id'].to_numpy()],
+        rationale_ids=[rows[np.asarray(ids, dtype=np.int64)] for ids in decisions['rationale_ids']],
+    )
+
+
+def _by_time(df: pd.DataFrame) -> pd.DataFrame:
+    # stable, so rows sharing a timestamp stay in arrival order
+    if df.empty:
+        return df
+    return df.sort_values('timestamp', kind='stable', na_position='last')
+
+
+def merge_extractions(old: Extraction, new: Extraction) -> Extraction:
+    """Merge the tables extracted from new, later messages into the stored ones."""
+    sleep = _by_time(_stack(old.sleep, new.sleep))
+    if not sleep.empty:
+        sleep = sleep.dropna(subset=['date']).groupby('date', as_index=False).tail(1).reset_index(drop=True)
+    activity = _stack(old.activity, new.activity)
+    if not old.activity.empty and not new.activity.empty:
+        activity = activity.groupby('date', as_index=False).agg(activity_minutes=('activity_minutes', 'sum'), timestamp=('timestamp', 'max'))
+    return Extraction(
+        events=_by_time(_stack(old.events, new.events)).reset_index(drop=True),
+        labs=_by_time(_stack(old.labs, new.labs)),
+        sleep=sleep,
+        activity=activity,
+        decisions=_by_time(_stack(old.decisions, new.decisions)).reset_index(drop=True),
+    )
+
+
+def append_messages(messages: pd.DataFrame, extracted: Extraction, new: pd.DataFrame, lookback: timedelta = DECISION_LOOKBACK, max_snippets: int = MAX_RATIONALE_SNIPPETS) -> tuple[pd.DataFrame, Extraction] | None:
+    """Extend (messages, extracted) with the parsed rows ``new``. Returns None when the new
+    rows are not strictly later than every stored message."""
+    if new.empty:
+        return messages, extracted
+    if list(messages.columns) == COMPACT_COLUMNS:
+        new = compact_messages(new)
+    if messages.empty:
+        return new, extract_all(new, lookback, max_snippets)
+    watermark = messages['timestamp'].max()
+    first_new = new['timestamp'].min()
+    if pd.isna(watermark) or (pd.notna(first_new) and first_new <= watermark):
+        return None
+    new = new.reindex(columns=messages.columns, fill_value='')
+    n = len(messages)
+    merged = _by_time(concat_categorical([messages, new]))
+    # position in stored+new -> position in the merged transcript
+    rows = np.empty(len(merged), dtype=np.int64)
+    rows[merged.index.to_numpy()] = np.arange(len(merged))
+    # decisions in the new rows look back into the stored history for their rationale, so
+    # the new rows are classified once, together with that stretch of history
+    history = messages[messages['timestamp'] >= first_new - lookback] if pd.notna(first_new) else messages.iloc[:0]
+    context = concat_categorical([history, new]) if len(history) else new.reset_index(drop=True)
+    f = classify_messages(context)
+    new_f = f.iloc[len(history):].reset_index(drop=True)
+    new = new.reset_index(drop=True)
+    decisions = build_decisions(context, f, lookback, max_snippets)
+    if not decisions.empty:
+        decisions = decisions[(decisions['timestamp'] > watermark) | decisions['timestamp'].isna()].reset_index(drop=True)
+        decisions = _remap_decisions(decisions, rows[np.concatenate([history.index.to_numpy(), n + np.arange(len(new))])])
+    delta = Extraction(events=_remap_events(build_events(new, new_f), rows[n:]), labs=build_labs(new, new_f),
+                       sleep=build_sleep_metrics(new, new_f), activity=build_activity_minutes(new, new_f), decisions=decisions)
+    stored = extracted._replace(events=_remap_events(extracted.events, rows[:n]), decisions=_remap_decisions(extracted.decisions, rows[:n]))
+    return merged.reset_index(drop=True), merge_extractions(stored, delta)
+
+
+def append_csv(messages: pd.DataFrame, extracted: Extraction, data: bytes, offset: int, lookback: timedelta = DECISION_LOOKBACK, max_snippets: int = MAX_RATIONALE_SNIPPETS) -> tuple[pd.DataFrame, Extraction] | None:
+    """append_messages for a CSV export whose first ``offset`` bytes were already processed."""
+    return append_messages(messages, extracted, parse_appended_csv(data, offset), lookback, max_snippets)
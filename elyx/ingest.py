@@ -0,0 +1,315 @@
+# CSV transcript ingestion.
+#
+# parse_csv_messages() reads the whole file at once (the original behaviour). With a
+# chunksize it streams the file through iter_csv_messages() instead: each chunk is
+# normalized on its own and only the canonical columns are kept, so peak memory is the
+# slim result plus one raw chunk rather than several full-size intermediate copies.
+# Timestamps are parsed with an explicit format detected from a sample (the converter's
+# ISO dates and HH:MM times in practice), and each distinct date and time string is parsed
+# once; only rows no candidate format accepts fall back to pandas' element-wise inference.
+# When streaming, the formats detected on the first chunk are pinned for the rest.
+#
+# Parquet transcripts (the converter's --format parquet) are accepted by the same entry
+# points. When they already carry the message schema - typed timestamp, date, time,
+# sender, role, text - they are read as-is, with no date parsing or string cleanup;
+# any other Parquet goes through the same column detection as a CSV.
+
+from __future__ import annotations
+from io import BytesIO
+import os
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+from .roles import split_senders
+
+MESSAGE_COLUMNS = ['timestamp','date','time','sender','role','text']
+
+# the form the app holds in memory (compact_messages): no 'time', no source columns
+COMPACT_COLUMNS = ['timestamp','date','sender','role','text']
+
+CSV_CHUNK_ROWS = 100_000
+
+PARQUET_MAGIC = b'PAR1'
+
+# Timestamp formats tried against a sample before falling back to inference. Day-first
+# orders come before month-first, matching the dayfirst=True inference they replace.
+DATE_FORMATS = ['%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y', '%Y/%m/%d', '%m/%d/%Y']
+TIME_FORMATS = ['%H:%M', '%H:%M:%S', '%I:%M %p', '%I:%M:%S %p']
+TIMESTAMP_FORMATS = [f'{d}{sep}{t}' for d in DATE_FORMATS for sep in (' ', 'T') for t in TIME_FORMATS] + DATE_FORMATS
+FORMAT_SAMPLE_ROWS = 1000
+
+
+def _open(file_bytes_or_path):
+    if isinstance(file_bytes_or_path, (bytes, bytearray)):
+        return BytesIO(file_bytes_or_path)
+    return file_bytes_or_path
+
+
+def is_parquet(file_bytes_or_path) -> bool:
+    """True for Parquet bytes, a .parquet path, or an open Parquet file (position kept)."""
+    if isinstance(file_bytes_or_path, (bytes, bytearray)):
+        return file_bytes_or_path[:4] == PARQUET_MAGIC
+    if isinstance(file_bytes_or_path, (str, os.PathLike)):
+        return os.fspath(file_bytes_or_path).lower().endswith('.parquet')
+    if hasattr(file_bytes_or_path, 'read') and hasattr(file_bytes_or_path, 'seek'):
+        pos = file_bytes_or_path.tell()
+        head = file_bytes_or_path.read(4)
+        file_bytes_or_path.seek(pos)
+        return head == PARQUET_MAGIC
+    return False
+
+
+def _typed_messages(df: pd.DataFrame) -> pd.DataFrame:
+    """Canonical message columns of a Parquet frame; typed frames pass through untouched."""
+    if set(MESSAGE_COLUMNS) <= set(df.columns) and pd.api.types.is_datetime64_any_dtype(df['timestamp']):
+        return df[MESSAGE_COLUMNS]
+    raw = df.astype(str).where(df.notna(), '')
+    return normalize_messages(raw)[MESSAGE_COLUMNS]
+
+
+def _iter_parquet_messages(file_bytes_or_path, chunksize: int) -> Iterator[pd.DataFrame]:
+    import pyarrow.parquet as pq
+
+    pf = pq.ParquetFile(_open(file_bytes_or_path))
+    for batch in pf.iter_batches(batch_size=chunksize):
+        yield _typed_messages(batch.to_pandas()).reset_index(drop=True)
+
+
+_CLOCK = np.array([f'{h:02d}:{m:02d}' for h in range(24) for m in range(60)] + [''], dtype=object)
+
+
+def clock_strings(ts: pd.Series) -> pd.Series:
+    """'HH:MM' of each timestamp, '' for NaT: ``ts.dt.strftime('%H:%M').fillna('')`` by
+    table lookup on the minute of the day."""
+    minute = (ts.dt.hour * 60 + ts.dt.minute).fillna(len(_CLOCK) - 1).to_numpy(dtype=np.int64)
+    return pd.Series(_CLOCK[minute], index=ts.index, dtype='str')
+
+
+def calendar_dates(ts: pd.Series) -> pd.Series:
+    """``ts.dt.date``, building one date object per distinct day."""
+    codes, days = pd.factorize(ts.dt.normalize())
+    objs = np.append(np.array(pd.DatetimeIndex(days).date, dtype=object), pd.NaT)
+    return pd.Series(objs[codes], index=ts.index, dtype=object)
+
+
+def _infer_timestamps(values: pd.Series) -> pd.Series:
+    """The original element-wise inference; only used for rows no detected format parses."""
+    return pd.to_datetime(values, errors='coerce', dayfirst=True)
+
+
+def _detect_format(uniques: pd.Index, candidates: list[str]) -> str | None:
+    """The candidate that parses the most of a sample of ``uniques`` (first wins ties)."""
+    sample = uniques[:FORMAT_SAMPLE_ROWS]
+    sample = sample[sample != '']
+    best, hits = None, 0
+    for fmt in candidates:
+        n = int(pd.to_datetime(sample, format=fmt, errors='coerce').notna().sum())
+        if n > hits:
+            best, hits = fmt, n
+            if n == len(sample):
+                break
+    return best
+
+
+def _parse_unique(values: pd.Series, key: str, candidates: list[str], formats: dict) -> tuple:
+    """Parse each distinct string of ``values`` once, with the format pinned in ``formats[key]``
+    (detected from a sample if not pinned yet). Returns (codes, parsed uniques, stripped uniques)."""
+    codes, uniques = pd.factorize(values.fillna(''))
+    uniques = pd.Index(uniques, dtype='str').str.strip()
+    fmt = formats.get(key) or _detect_format(uniques, candidates)
+    if fmt:
+        formats[key] = fmt
+        parsed = pd.to_datetime(uniques, format=fmt, errors='coerce')
+    else:
+        parsed = pd.DatetimeIndex([pd.NaT] * len(uniques))
+    return codes, parsed, uniques
+
+
+def _with_fallback(ts: pd.DatetimeIndex, failed: np.ndarray, text, index: pd.Index) -> pd.Series:
+    out = pd.Series(ts, index=index)
+    if failed.any():
+        out[failed] = _infer_timestamps(pd.Series(text, index=index[failed])).to_numpy()
+    return out
+
+
+def _column_timestamps(values: pd.Series, formats: dict, key: str = 'timestamp') -> pd.Series:
+    """Timestamps of a single date or date-time column."""
+    codes, parsed, raw = _parse_unique(values, key, TIMESTAMP_FORMATS, formats)
+    ts = parsed.take(codes)
+    failed = ts.isna() & (raw != '').take(codes)
+    return _with_fallback(ts, failed, raw.take(codes[failed]), values.index)
+
+
+def _date_time_timestamps(dates: pd.Series, times: pd.Series, formats: dict) -> pd.Series:
+    """Timestamps of separate date and time columns: each distinct date and each distinct
+    time is parsed once and the two are added, so the cost tracks the number of distinct
+    days and minutes rather than the number of rows."""
+    d_codes, d_parsed, d_raw = _parse_unique(dates, 'date', DATE_FORMATS, formats)
+    t_codes, t_parsed, t_raw = _parse_unique(times, 'time', TIME_FORMATS, formats)
+    ts = d_parsed.take(d_codes) + (t_parsed - t_parsed.normalize()).take(t_codes)
+    # rows the explicit formats reject go through inference, as the joined "date time" text
+    failed = ts.isna() & ~((d_raw == '').take(d_codes) & (t_raw == '').take(t_codes))
+    text = d_raw.take(d_codes[failed]) + ' ' + t_raw.take(t_codes[failed])
+    return _with_fallback(ts, failed, text, dates.index)
+
+
+def normalize_messages(df: pd.DataFrame, formats: dict | None = None) -> pd.DataFrame:
+    """Map a raw all-string frame onto timestamp/date/time/sender/role/text (unsorted).
+    Source columns are kept alongside the canonical ones. ``formats`` carries the detected
+    date/time formats from one chunk to the next."""
+    cols_lower = {c.lower(): c for c in df.columns}
+    ts_col = None
+    for candidate in ['timestamp','datetime','date_time','time_stamp','created_at']:
+        if candidate in cols_lower:
+            ts_col = cols_lower[candidate]; break
+    formats = {} if formats is None else formats
+    if ts_col:
+        df['timestamp'] = _column_timestamps(df[ts_col], formats)
+    else:
+        date_col = None; time_col = None
+        for d in ['date','day']:
+            if d in cols_lower:
+                date_col = cols_lower[d]; break
+        for t in ['time','hour']:
+            if t in cols_lower:
+                time_col = cols_lower[t]; break
+        if date_col and time_col:
+            df['timestamp'] = _date_time_timestamps(df[date_col], df[time_col], formats)
+        elif date_col:
+            df['timestamp'] = _column_timestamps(df[date_col], formats)
+        else:
+            df['timestamp'] = pd.NaT
+    sender_col = None
+    for s in ['sender','author','from','speaker','name']:
+        if s in cols_lower:
+            sender_col = cols_lower[s]; break
+    if sender_col:
+        df['sender'] = df[sender_col].astype(str).str.strip()
+    else:
+        df['sender'] = ''
+    role_col = None
+    for r in ['role','role_name','speaker_role']:
+        if r in cols_lower:
+            role_col = cols_lower[r]; break
+    if role_col:
+        df['role'] = df[role_col].astype(str).str.strip()
+    else:
+        df['role'] = ''
+    text_col = None
+    for t in ['text','message','body','content']:
+        if t in cols_lower:
+            text_col = cols_lower[t]; break
+    if text_col:
+        df['text'] = df[text_col].astype(str).str.strip()
+    else:
+        used = {ts_col, sender_col, role_col}
+        fallback = next((c for c in df.columns if c not in used), None)
+        if fallback:
+            df['text'] = df[fallback].astype(str).str.strip()
+        else:
+            df['text'] = ''
+    names, roles_from_sender = split_senders(df['sender'])
+    df['role'] = df['role'].where(df['role'] != '', pd.Series(roles_from_sender, index=df.index, dtype='str'))
+    if not pd.api.types.is_datetime64_any_dtype(df['timestamp']):
+        df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
+    df['date'] = calendar_dates(df['timestamp'])
+    df['time'] = clock_strings(df['timestamp'])
+    df['sender'] = pd.Series(names, index=df.index, dtype='str').replace('', 'Unknown')
+    df['role'] = df['role'].fillna('').astype(str)
+    df['text'] = df['text'].fillna('')
+    return df
+
+
+def prepare_messages(messages_df: pd.DataFrame) -> pd.DataFrame:
+    """Ensure an already-tabular transcript has parsed timestamp, date and time columns."""
+    messages_df = messages_df.copy()
+    if {'date', 'time'} <= set(messages_df.columns) and 'timestamp' in messages_df.columns \
+            and pd.api.types.is_datetime64_any_dtype(messages_df['timestamp']):
+        return messages_df  # already parsed (CSV/Parquet ingestion): nothing to re-derive
+    if 'timestamp' in messages_df.columns:
+        messages_df['timestamp'] = pd.to_datetime(messages_df['timestamp'], errors='coerce')
+    else:
+        messages_df['timestamp'] = pd.NaT
+    messages_df['date'] = calendar_dates(messages_df['timestamp'])
+    messages_df['time'] = clock_strings(messages_df['timestamp'])
+    return messages_df
+
+
+def sort_messages(df: pd.DataFrame) -> pd.DataFrame:
+    return df.sort_values('timestamp', na_position='last').reset_index(drop=True)
+
+
+def compact_messages(df: pd.DataFrame) -> pd.DataFrame:
+    """The memory-compact form of a parsed transcript: datetime64 timestamp and day (the
+    date at midnight), categorical sender and role, string text. 'time' and the source
+    columns are dropped; for_display() adds date/time back to the rows being shown."""
+    ts = df['timestamp'] if pd.api.types.is_datetime64_any_dtype(df['timestamp']) else pd.to_datetime(df['timestamp'], errors='coerce')
+    return pd.DataFrame({
+        'timestamp': ts,
+        'date': ts.dt.normalize(),
+        'sender': df['sender'].astype('category'),
+        'role': df['role'].astype('category'),
+        'text': df['text'].astype('str'),
+    }, index=df.index)
+
+
+def concat_categorical(parts: list[pd.DataFrame]) -> pd.DataFrame:
+    """pd.concat(parts, ignore_index=True), keeping categorical columns categorical: the
+    categories are unioned first (existing codes stay valid) instead of decaying to strings."""
+    parts = list(parts)
+    if len(parts) > 1:
+        for col in parts[0].columns:
+            cats = [p[col] for p in parts if col in p]
+            if len(cats) == len(parts) and all(isinstance(c.dtype, pd.CategoricalDtype) for c in cats):
+                union = pd.api.types.union_categoricals([c.array for c in cats]).categories
+                parts = [p.assign(**{col: p[col].cat.set_categories(union)}) for p in parts]
+    return pd.concat(parts, ignore_index=True)
+
+
+def for_display(df: pd.DataFrame) -> pd.DataFrame:
+    """Copy of (a slice of) a compact frame with display columns: 'date' as dates and
+    'time' as HH:MM, derived from the timestamps."""
+    out = df.copy()
+    if 'date' in out and pd.api.types.is_datetime64_any_dtype(out['date']):
+        out['date'] = calendar_dates(out['date'])
+    if 'time' not in out and 'timestamp' in out:
+        out['time'] = clock_strings(out['timestamp'])
+    return out
+
+
+def iter_csv_messages(file_bytes_or_path, chunksize: int = CSV_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Yield normalized chunks (canonical columns only, file order) of a CSV transcript."""
+    if is_parquet(file_bytes_or_path):
+        yield from _iter_parquet_messages(file_bytes_or_path, chunksize)
+        return
+    reader = pd.read_csv(_open(file_bytes_or_path), dtype=str, keep_default_na=False, chunksize=chunksize)
+    formats = {}
+    with reader:
+        for chunk in reader:
+            yield normalize_messages(chunk, formats)[MESSAGE_COLUMNS].reset_index(drop=True)
+
+
+def parse_csv_messages(file_bytes_or_path, chunksize: int | None = None) -> pd.DataFrame:
+    if is_parquet(file_bytes_or_path) and not chunksize:
+        return sort_messages(_typed_messages(pd.read_parquet(_open(file_bytes_or_path))))
+    if chunksize:
+        parts = list(iter_csv_messages(file_bytes_or_path, chunksize))
+        df = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=MESSAGE_COLUMNS)
+        return sort_messages(df)
+    df = pd.read_csv(_open(file_bytes_or_path), dtype=str, keep_default_na=False)
+    return sort_messages(normalize_messages(df))
+
+
+def parse_appended_csv(data: bytes, offset: int) -> pd.DataFrame:
+    """Parse only the rows of ``data`` after byte ``offset`` (a line boundary), with the
+    header and timestamp format taken from the start of the file, so the result matches
+    those rows of a whole-file parse."""
+    header = data[:data.index(b'\n') + 1]
+    formats = {}
+    # pin the formats detected at the start of the whole file
+    seed = pd.read_csv(BytesIO(data), dtype=str, keep_default_na=False, nrows=1000)
+    normalize_messages(seed, formats)
+    df = pd.read_csv(BytesIO(header + data[offset:]), dtype=str, keep_default_na=False)
+    return sort_messages(normalize_messages(df, formats))
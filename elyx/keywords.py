@@ -0,0 +1,66 @@
+# Multi-keyword matcher shared by all extractors.
+#
+# Every keyword list in rules.KEYWORD_CATEGORIES is compiled once, at import, into a single
+# Aho–Corasick automaton whose payload is a category bitmask. One scan of a message returns
+# every category it mentions, so the cost follows text length, not the number of keywords,
+# and adding a category adds no per-message work.
+
+from __future__ import annotations
+import re
+
+import numpy as np
+import pandas as pd
+
+from .rules import KEYWORD_CATEGORIES
+
+# pyahocorasick is optional; without it each category runs as one vectorized regex instead
+try:
+    import ahocorasick  # type: ignore
+except Exception:
+    ahocorasick = None
+
+
+class KeywordMatcher:
+    """Substring matcher over named keyword categories (text is expected lowercased)."""
+
+    def __init__(self, categories: dict[str, list[str]]):
+        self.categories = list(categories)
+        self.words = {cat: list(words) for cat, words in categories.items()}
+        self.bits = {c: 1 << i for i, c in enumerate(self.categories)}
+        self.masks: dict[str, int] = {}
+        for cat, words in categories.items():
+            for w in words:
+                self.masks[w] = self.masks.get(w, 0) | self.bits[cat]
+        self.patterns = {cat: '|'.join(re.escape(w) for w in words) for cat, words in categories.items()}
+        self.automaton = None
+        if ahocorasick is not None:
+            self.automaton = ahocorasick.Automaton()
+            for w, mask in self.masks.items():
+                self.automaton.add_word(w, mask)
+            self.automaton.make_automaton()
+
+    def mask(self, low: str) -> int:
+        if self.automaton is not None:
+            m = 0
+            for _, bits in self.automaton.iter(low):
+                m |= bits
+            return m
+        return sum(bit for cat, bit in self.bits.items() if any(w in low for w in self.words[cat]))
+
+    def match(self, low: str) -> set[str]:
+        """Every category with at least one keyword in ``low``."""
+        m = self.mask(low)
+        return {c for c, bit in self.bits.items() if m & bit}
+
+    def match_series(self, low: pd.Series) -> pd.DataFrame:
+        """One boolean column per category, positionally aligned with ``low``."""
+        if self.automaton is not None:
+            masks = np.fromiter((self.mask(s) for s in low.tolist()), dtype=np.int64, count=len(low))
+            return pd.DataFrame({c: (masks & bit) != 0 for c, bit in self.bits.items()})
+        return pd.DataFrame({
+            c: low.str.contains(pat, regex=True).to_numpy(dtype=bool, copy=True)
+            for c, pat in self.patterns.items()
+        })
+
+
+MATCHER = KeywordMatcher(KEYWORD_CATEGORIES)
@@ -0,0 +1,71 @@
+# Column-wise lab extraction over rules.LAB_PATTERNS.
+#
+# Patterns are compiled once, with an optional "to <value>" continuation, so every reading
+# in "LDL dropped from 140 to 132" or "BP 138/88 → 126/82" is kept (but not the "12" of
+# "-> 12 weeks"). Each pattern runs as
+# a native-regex prefilter over the whole column, then Series.str.extractall on the hits,
+# which captures every occurrence of the marker in a message.
+
+from __future__ import annotations
+import re
+
+import numpy as np
+import pandas as pd
+
+from .rules import LAB_PATTERNS
+
+# "... 140 mg/dL to 132", "2.9 → 2.4", "138/88 -> 126/82"
+FOLLOW_UP = r"(?:\s*[a-zµ/%]{1,6})?\s*(?:to|->|→)\s*"
+# a follow-up number that is a duration ("-> 12 weeks recheck", "to 3 months") is no reading;
+# the digit/decimal guard stops the value from backtracking to a shorter number instead
+NOT_DURATION = r"(?!\d|\.\d|[\s-]*(?:min(?:ute)?s?|h(?:ou)?rs?|days?|w(?:ee)?ks?|mo(?:nth)?s?|y(?:ea)?rs?)\b)"
+
+
+def _compile(pat: str) -> tuple[re.Pattern, int]:
+    value = pat.rsplit(r"[^\d]*", 1)[1]
+    width = re.compile(value).groups
+    return re.compile(f"{pat}(?:{FOLLOW_UP}{value}{NOT_DURATION})?", re.IGNORECASE), width
+
+
+# (compiled pattern, groups per reading, native prefilter, marker names per group)
+LAB_REGEXES = []
+for _pat, _name in LAB_PATTERNS:
+    _rx, _width = _compile(_pat)
+    _markers = ['SBP', 'DBP'] if _name == 'Blood Pressure' else [_name]
+    # prefilter only needs a yes/no, so its groups are made non-capturing
+    LAB_REGEXES.append((_rx, _width, '(?i)' + re.sub(r'\((?!\?)', '(?:', _pat), _markers))
+
+
+def lab_readings(texts: pd.Series) -> pd.DataFrame:
+    """Every lab reading in ``texts`` as (pos, marker, value), ordered by message position,
+    then LAB_PATTERNS order, then occurrence within the message."""
+    texts = texts.reset_index(drop=True)
+    native = texts.astype('str')
+    cols = {'pos': [], 'rank': [], 'occurrence': [], 'reading': [], 'sub': [], 'marker': [], 'value': []}
+    for rank, (rx, width, prefilter, markers) in enumerate(LAB_REGEXES):
+        hit = np.flatnonzero(native.str.contains(prefilter, regex=True).to_numpy(dtype=bool))
+        if len(hit) == 0:
+            continue
+        m = texts.iloc[hit].astype(object).str.extractall(rx)
+        if m.empty:
+            continue
+        pos = m.index.get_level_values(0).to_numpy()
+        occurrence = m.index.get_level_values(1).to_numpy()
+        # readings in a match: the first value(s), then the optional follow-up
+        for reading in range(2):
+            for sub, marker in enumerate(markers):
+                vals = m[reading * width + sub].to_numpy()
+                keep = pd.notna(vals)
+                n = int(keep.sum())
+                cols['pos'].append(pos[keep])
+                cols['rank'].append(np.full(n, rank))
+                cols['occurrence'].append(occurrence[keep])
+                cols['reading'].append(np.full(n, reading))
+                cols['sub'].append(np.full(n, sub))
+                cols['marker'].append(np.full(n, marker, dtype=object))
+                cols['value'].append(vals[keep].astype(float))
+    if not cols['pos']:
+        return pd.DataFrame({'pos': np.array([], dtype=np.int64), 'marker': np.array([], dtype=object), 'value': np.array([], dtype=float)})
+    out = {k: np.concatenate(v) for k, v in cols.items()}
+    order = np.lexsort((out['sub'], out['reading'], out['occurrence'], out['rank'], out['pos']))
+    return pd.DataFrame({'pos': out['pos'][order], 'marker': out['marker'][order], 'value': out['value'][order]})
@@ -0,0 +1,61 @@
+# Derived tables: the combined biomarker series and the internal-hours estimate by role.
+
+from __future__ import annotations
+
+import pandas as pd
+
+from .roles import staff_roles
+
+# default estimated minutes of staff time per interaction, by role
+DEFAULT_ROLE_WEIGHTS = {
+    'Physician': 12,
+    'Nutritionist': 8,
+    'Physiotherapist': 8,
+    'Concierge': 6,
+    'Concierge Lead': 10,
+    'Performance Scientist': 8,
+    'Lab': 5,
+    'Member': 0
+}
+
+
+def merge_biomarkers(lab_df: pd.DataFrame, sleep_df: pd.DataFrame, act_df: pd.DataFrame) -> pd.DataFrame:
+    parts = []
+    if lab_df is not None and not lab_df.empty:
+        parts.append(lab_df[['timestamp','marker','value']].copy())
+    if sleep_df is not None and not sleep_df.empty:
+        s = sleep_df.copy()
+        s['marker'] = 'Sleep (hrs)'
+        s.rename(columns={'sleep_hours':'value'}, inplace=True)
+        parts.append(s[['timestamp','marker','value']])
+    if act_df is not None and not act_df.empty:
+        a = act_df.copy()
+        a['marker'] = 'Exercise (min)'
+        a.rename(columns={'activity_minutes':'value'}, inplace=True)
+        parts.append(a[['timestamp','marker','value']])
+    if not parts:
+        return pd.DataFrame(columns=['timestamp','marker','value'])
+    out = pd.concat(parts, ignore_index=True)
+    out['date'] = pd.to_datetime(out['timestamp']).dt.date
+    out.sort_values('timestamp', inplace=True)
+    return out
+
+
+def compute_internal_metrics(messages: pd.DataFrame, weights: dict[str, float] = DEFAULT_ROLE_WEIGHTS) -> pd.DataFrame:
+    if messages.empty:
+        return pd.DataFrame(columns=['role','interactions','est_minutes','est_hours'])
+    msgs = messages.copy()
+    msgs['day'] = msgs['timestamp'].dt.date
+    role_counts = msgs['role'].fillna('Member').value_counts()
+    total_rows = len(msgs)
+    num_member = int(role_counts.get('Member', 0))
+    if total_rows > 0 and (num_member / float(total_rows) > 0.6 or len(role_counts) == 1):
+        senders = msgs['sender'] if 'sender' in msgs else pd.Series([''] * total_rows, index=msgs.index)
+        msgs['role'] = staff_roles(senders, msgs['role'])
+    grp = msgs.groupby(['day','role']).size().reset_index(name='count')
+    role_weight = {r: float(weights.get(r, 5)) for r in grp['role'].unique()}
+    grp['est_minutes'] = grp['count'].astype(float) * grp['role'].map(role_weight)
+    by_role = grp.groupby('role').agg(interactions=('count','sum'), est_minutes=('est_minutes','sum')).reset_index()
+    by_role['est_hours'] = (by_role['est_minutes'] / 60.0).round(2)
+    by_role = by_role.sort_values('est_hours', ascending=False).reset_index(drop=True)
+    return by_role
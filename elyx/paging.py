@@ -0,0 +1,60 @@
+# Server-side paging for the app's tables.
+#
+# Tables are filtered, sorted and sliced on the in-memory frames as arrays of row positions;
+# only the rows of the current page are then formatted (for_display, detail strings) and
+# handed to st.dataframe, so what a rerun serializes is bounded by the page size rather than
+# the dataset. Long text is cut to a preview unless the reader expands the page.
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+PAGE_SIZES = (25, 50, 100, 250)
+PREVIEW_CHARS = 160
+
+
+def filter_rows(df: pd.DataFrame, filters: dict[str, list]) -> np.ndarray:
+    """Positions of the rows whose value is among the chosen ones, for every filtered column
+    (an empty choice leaves that column unfiltered)."""
+    mask = np.ones(len(df), dtype=bool)
+    for col, values in filters.items():
+        if values:
+            mask &= df[col].isin(values).to_numpy(dtype=bool, na_value=False)
+    return np.flatnonzero(mask)
+
+
+def _sort_key(col: pd.Series) -> pd.Series:
+    # categories are ranked alphabetically, whatever order they were collected in
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        cats = col.cat.categories.astype('str')
+        rank = np.empty(len(cats), dtype=np.float64)
+        rank[np.argsort(np.asarray(cats, dtype=object), kind='stable')] = np.arange(len(cats))
+        codes = col.cat.codes.to_numpy()
+        return pd.Series(np.where(codes >= 0, rank[codes], np.nan), index=col.index)
+    return col
+
+
+def sort_rows(df: pd.DataFrame, positions: np.ndarray, by: str | None, ascending: bool = True) -> np.ndarray:
+    """``positions`` ordered by column ``by`` (stable, missing values last)."""
+    if by is None or len(positions) == 0:
+        return positions
+    key = _sort_key(df[by]).iloc[positions].reset_index(drop=True)
+    order = key.sort_values(ascending=ascending, kind='stable', na_position='last').index.to_numpy()
+    return positions[order]
+
+
+def page_count(n: int, page_size: int) -> int:
+    return max(-(-n // page_size), 1)
+
+
+def page_rows(positions: np.ndarray, page: int, page_size: int) -> np.ndarray:
+    """Positions on 1-based ``page``."""
+    start = (page - 1) * page_size
+    return positions[start:start + page_size]
+
+
+def truncate_text(s: pd.Series, width: int = PREVIEW_CHARS) -> pd.Series:
+    """Text cut to ``width`` characters, with an ellipsis where something was cut."""
+    s = s.astype('str')
+    return s.where(s.str.len() <= width, s.str.slice(0, width - 1) + '…')
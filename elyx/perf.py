@@ -0,0 +1,251 @@
+# Timing for cached pipeline functions and other pipeline stages.
+#
+# timed_cache(st.cache_data) wraps a function so that every call records its wall time
+# (argument hashing + cache lookup + result copy, plus the compute on a miss) and every
+# miss records the compute time alone. wall - compute is what the caching layer costs.
+#
+# With recording enabled (set_enabled, or the ELYX_PERF_LOG environment variable), every
+# cached call and every stage() block also appends a record to STAGE_LOG: wall time, rows in
+# and out, resident-memory delta and, for cached calls, hit or miss. Records are tagged with
+# the session and script run (begin_run) they belong to and can be exported as JSON lines.
+# Disabled, a stage() block costs one flag check.
+#
+# The recording flag, session and run number are context variables, so concurrent sessions
+# (each script run has its own thread) do not see each other's settings. Work handed to
+# another thread keeps them only if it runs in a copy of the submitting context
+# (contextvars.copy_context(), as Pipeline.submit does).
+
+from __future__ import annotations
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime
+
+
+@dataclass
+class CacheStats:
+    calls: int = 0
+    misses: int = 0
+    wall_s: float = 0.0
+    compute_s: float = 0.0
+
+    @property
+    def overhead_s(self) -> float:
+        return max(self.wall_s - self.compute_s, 0.0)
+
+
+# keyed by function name; lives for the process, so it spans reruns and sessions
+CACHE_STATS: dict[str, CacheStats] = {}
+_STATS_LOCK = threading.Lock()
+# compute times of the misses inside the current timed_cache call; per call, so concurrent
+# sessions (or the background executor) calling the same function don't see each other's
+_misses: ContextVar[list[float] | None] = ContextVar('elyx_perf_misses', default=None)
+
+
+def timed_cache(cache_decorator):
+    """Apply ``cache_decorator`` (e.g. st.cache_data(...)) and record timings in CACHE_STATS."""
+    def wrap(fn):
+        stats = CACHE_STATS.setdefault(fn.__name__, CacheStats())
+
+        @functools.wraps(fn)
+        def compute(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                seconds = time.perf_counter() - t0
+                with _STATS_LOCK:
+                    stats.misses += 1
+                    stats.compute_s += seconds
+                slot = _misses.get()
+                if slot is not None:
+                    slot.append(seconds)
+
+        cached = cache_decorator(compute)
+
+        @functools.wraps(fn)
+        def call(*args, **kwargs):
+            if not _enabled.get():
+                t0 = time.perf_counter()
+                try:
+                    return cached(*args, **kwargs)
+                finally:
+                    wall = time.perf_counter() - t0
+                    with _STATS_LOCK:
+                        stats.calls += 1
+                        stats.wall_s += wall
+            slot: list[float] = []
+            token = _misses.set(slot)
+            rss = _rss_mb()
+            t0 = time.perf_counter()
+            result = None
+            try:
+                result = cached(*args, **kwargs)
+                return result
+            finally:
+                wall = time.perf_counter() - t0
+                _misses.reset(token)
+                with _STATS_LOCK:
+                    stats.calls += 1
+                    stats.wall_s += wall
+                record(fn.__name__, wall, kind='cache miss' if slot else 'cache hit',
+                       rows_in=_rows_in(args, kwargs), rows_out=row_count(result), mem_delta_mb=_delta(rss),
+                       compute_s=sum(slot) if slot else None)
+
+        call.clear = getattr(cached, 'clear', None)
+        return call
+    return wrap
+
+
+def cache_stats_rows() -> list[dict]:
+    return [
+        {'function': name, 'calls': s.calls, 'hits': s.calls - s.misses, 'misses': s.misses,
+         'compute_ms': round(s.compute_s * 1000, 1), 'cache_overhead_ms': round(s.overhead_s * 1000, 1),
+         'overhead_per_call_ms': round(s.overhead_s * 1000 / s.calls, 2) if s.calls else 0.0}
+        for name, s in CACHE_STATS.items()
+    ]
+
+
+# --- stage records ---
+
+STAGE_LOG_SIZE = 5000
+STAGE_LOG: deque[dict] = deque(maxlen=STAGE_LOG_SIZE)
+_LOG_LOCK = threading.Lock()
+
+# ELYX_PERF_LOG=<path> turns recording on from the start and appends every record to <path>
+PERF_LOG_PATH = os.environ.get('ELYX_PERF_LOG') or None
+_enabled: ContextVar[bool] = ContextVar('elyx_perf_enabled', default=PERF_LOG_PATH is not None)
+_session: ContextVar[str | None] = ContextVar('elyx_perf_session', default=None)
+_run: ContextVar[int] = ContextVar('elyx_perf_run', default=0)
+# last run number of each session
+_RUNS: dict[str | None, int] = {}
+_RUNS_LOCK = threading.Lock()
+_PAGE_KB = os.sysconf('SC_PAGE_SIZE') / 1024 if hasattr(os, 'sysconf') else 4.0
+
+
+def set_enabled(on: bool) -> None:
+    """Turn recording on or off for the current context."""
+    _enabled.set(bool(on) or PERF_LOG_PATH is not None)
+
+
+def is_enabled() -> bool:
+    return _enabled.get()
+
+
+def begin_run(session: str | None = None) -> int:
+    """Start a new script run of ``session``; later records made in this context carry the
+    session and the run's number (counted per session)."""
+    with _RUNS_LOCK:
+        run = _RUNS[session] = _RUNS.get(session, 0) + 1
+    _session.set(session)
+    _run.set(run)
+    return run
+
+
+def _rss_mb() -> float | None:
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_KB / 1024
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _delta(before: float | None) -> float | None:
+    after = _rss_mb() if before is not None else None
+    return None if after is None else round(after - before, 1)
+
+
+def row_count(value) -> int | None:
+    """Row count of a stage result: a frame or array, a NamedTuple of frames (total), or the
+    first element of another tuple."""
+    if hasattr(value, 'shape') and getattr(value, 'ndim', 0) >= 1:
+        return int(value.shape[0])
+    if isinstance(value, tuple) and value:
+        if hasattr(value, '_fields'):
+            counts = [row_count(v) for v in value]
+            return sum(c for c in counts if c is not None) if any(c is not None for c in counts) else None
+        return row_count(value[0])
+    return None
+
+
+def _rows_in(args, kwargs) -> int | None:
+    for a in (*args, *kwargs.values()):
+        if hasattr(a, 'shape') and getattr(a, 'ndim', 0) >= 1:
+            return int(a.shape[0])
+    return None
+
+
+def record(stage: str, seconds: float, kind: str = 'stage', rows_in: int | None = None, rows_out: int | None = None,
+           mem_delta_mb: float | None = None, compute_s: float | None = None) -> None:
+    rec = {
+        'time': datetime.now().isoformat(timespec='milliseconds'), 'session': _session.get(), 'run': _run.get(),
+        'stage': stage, 'kind': kind,
+        'ms': round(seconds * 1000, 2), 'compute_ms': None if compute_s is None else round(compute_s * 1000, 2),
+        'rows_in': rows_in, 'rows_out': rows_out, 'mem_delta_mb': mem_delta_mb,
+    }
+    with _LOG_LOCK:
+        STAGE_LOG.append(rec)
+        if PERF_LOG_PATH:
+            with open(PERF_LOG_PATH, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(rec) + '\n')
+
+
+class Stage:
+    """An open stage: set ``rows_in`` / ``rows_out`` while it runs, then finish() it."""
+    __slots__ = ('name', 'kind', 'rows_in', 'rows_out', '_t0', '_rss')
+
+    def __init__(self, name: str, rows_in: int | None, kind: str):
+        self.name, self.kind, self.rows_in, self.rows_out = name, kind, rows_in, None
+        self._t0 = None
+        if _enabled.get():
+            self._rss = _rss_mb()
+            self._t0 = time.perf_counter()
+
+    def finish(self) -> None:
+        if self._t0 is not None:
+            record(self.name, time.perf_counter() - self._t0, kind=self.kind, rows_in=self.rows_in, rows_out=self.rows_out, mem_delta_mb=_delta(self._rss))
+            self._t0 = None
+
+
+def start_stage(name: str, rows_in: int | None = None, kind: str = 'stage') -> Stage:
+    """stage() for code that cannot sit in a with block, such as a page body at the top level
+    of the script. Nothing is recorded unless recording was on when it started."""
+    return Stage(name, rows_in, kind)
+
+
+@contextmanager
+def stage(name: str, rows_in: int | None = None, kind: str = 'stage'):
+    """Record the block as a stage when recording is on; set ``.rows_out`` on the yielded
+    handle to report output rows."""
+    handle = Stage(name, rows_in, kind)
+    try:
+        yield handle
+    finally:
+        handle.finish()
+
+
+def run_records(run: int | None = None) -> list[dict]:
+    """Records of the current session's script run ``run`` (default: the current one)."""
+    session = _session.get()
+    run = _run.get() if run is None else run
+    return [r for r in list(STAGE_LOG) if r['session'] == session and r['run'] == run]
+
+
+def stage_log_jsonl(session: str | None = None) -> str:
+    """The records of ``session`` as JSON lines. Takes the session explicitly, as it may
+    be called from another thread (a deferred download)."""
+    return ''.join(json.dumps(r) + '\n' for r in list(STAGE_LOG) if r['session'] == session)
+
+
+def clear_stage_log(session: str | None = None) -> None:
+    """Drop the records of ``session``; other sessions' records are kept."""
+    with _LOG_LOCK:
+        keep = [r for r in STAGE_LOG if r['session'] != session]
+        STAGE_LOG.clear()
+        STAGE_LOG.extend(keep)
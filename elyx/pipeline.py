@@ -0,0 +1,131 @@
+# Lazy, memoized computation graph over one dataset.
+#
+# A Pipeline holds named nodes, each a function of the nodes it depends on. A node is
+# computed the first time something asks for it and then kept, so a caller pulls exactly
+# the outputs it asks for and no output is built twice. Values that are already known, such as tables read back from the parse cache
+# or produced by the streaming parser, are provided up front and are never recomputed.
+# Every computed node is recorded as a perf stage. Nodes can also be submitted to an
+# executor, so slow ones are computed in the background while a reader of the pipeline
+# renders what is already there (the app submits all of its extraction nodes this way as
+# soon as a dataset is loaded); whoever asks for a node that is in flight waits for it
+# rather than computing it again.
+
+from __future__ import annotations
+import contextvars
+import threading
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, NamedTuple
+
+from .dateindex import build_date_index
+from .extract import (Extraction, build_activity_minutes, build_decisions, build_events, build_labs,
+                      build_sleep_metrics, classify_messages)
+from .metrics import merge_biomarkers
+from .perf import row_count, stage
+from .search import build_text_index
+
+
+class Node(NamedTuple):
+    deps: tuple[str, ...]
+    fn: Callable[..., Any]
+
+
+class Pipeline:
+    """Memoized nodes over one dataset; ``pipeline['events']`` computes what it needs."""
+
+    def __init__(self, nodes: dict[str, Node], **provided):
+        self.nodes = nodes
+        self.values: dict[str, Any] = dict(provided)
+        # sessions and background workers share a dataset's pipeline; a node is computed once
+        self._lock = threading.Lock()
+        self._pending: dict[str, Future] = {}
+        self._submitted: dict[str, Future] = {}
+
+    def ready(self, *names: str) -> bool:
+        return all(n in self.values for n in names)
+
+    def __getitem__(self, name: str):
+        return self._get(name)
+
+    def _get(self, name: str, kind: str = 'stage'):
+        value = self.values.get(name, _MISSING)
+        if value is not _MISSING:
+            return value
+        with self._lock:
+            if name in self.values:
+                return self.values[name]
+            pending = self._pending.get(name)
+            owner = pending is None
+            if owner:
+                node = self.nodes.get(name)
+                if node is None:
+                    raise KeyError(f"pipeline node {name!r} is neither defined nor provided")
+                pending = self._pending[name] = Future()
+        if not owner:
+            return pending.result()
+        try:
+            args = [self._get(d, kind) for d in node.deps]
+            with stage(f'node: {name}', rows_in=row_count(args[0]) if args else None, kind=kind) as s:
+                value = node.fn(*args)
+                s.rows_out = row_count(value)
+        except BaseException as e:
+            # a failed node is retried by the next reader
+            with self._lock:
+                del self._pending[name]
+            pending.set_exception(e)
+            raise
+        with self._lock:
+            self.values[name] = value
+            del self._pending[name]
+        pending.set_result(value)
+        return value
+
+    def submit(self, executor: Executor, *names: str) -> dict[str, Future]:
+        """Compute ``names`` on ``executor``, in the order given; returns a future per name.
+        A name submitted before keeps its first future, so this is safe to call on every
+        rerun. Each job runs in a copy of the caller's context, so context variables such as
+        the perf session and recording flag carry over to the worker thread."""
+        with self._lock:
+            for n in names:
+                if n not in self._submitted:
+                    self._submitted[n] = executor.submit(contextvars.copy_context().run, self._get, n, 'background')
+            return {n: self._submitted[n] for n in names}
+
+    def get(self, *names: str) -> tuple:
+        return tuple(self[n] for n in names)
+
+
+_MISSING = object()
+
+
+def _date_index(column: str):
+    # extraction tables with no rows may have no columns at all
+    return lambda df: build_date_index(df.get(column, []))
+
+
+# The app's dataset graph. 'messages' (the compact frame) is always provided; the five
+# extraction tables are provided too when they come from the parse cache or the streaming
+# parser.
+DATASET_NODES = {
+    'features': Node(('messages',), classify_messages),
+    'events': Node(('messages', 'features'), build_events),
+    'labs': Node(('messages', 'features'), build_labs),
+    'sleep': Node(('messages', 'features'), build_sleep_metrics),
+    'activity': Node(('messages', 'features'), build_activity_minutes),
+    'decisions': Node(('messages', 'features'), build_decisions),
+    'extraction': Node(Extraction._fields, Extraction),
+    'biomarkers': Node(('labs', 'sleep', 'activity'), merge_biomarkers),
+    'text_index': Node(('messages',), lambda m: build_text_index(m['text'])),
+    'message_dates': Node(('messages',), _date_index('date')),
+    'message_times': Node(('messages',), _date_index('timestamp')),
+    'biomarker_dates': Node(('biomarkers',), _date_index('date')),
+    'sleep_dates': Node(('sleep',), _date_index('date')),
+    'activity_dates': Node(('activity',), _date_index('date')),
+}
+
+
+def dataset_pipeline(messages, extracted: Extraction | None = None) -> Pipeline:
+    """Pipeline over a compact messages frame, seeded with its extraction when known."""
+    provided = {'messages': messages}
+    if extracted is not None:
+        provided.update(extracted._asdict(), extraction=extracted)
+    return Pipeline(DATASET_NODES, **provided)
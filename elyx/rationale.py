@@ -0,0 +1,46 @@
+# Sorted-timestamp index over the "rationale candidate" messages used by extract_decisions.
+#
+# Each decision looks back over a fixed window for messages that explain it. Instead of
+# filtering the whole transcript per decision, the candidates are sorted once by timestamp
+# and every window becomes two binary searches plus a slice: O(log n + k).
+
+from __future__ import annotations
+from datetime import timedelta
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+
+class RationaleIndex(NamedTuple):
+    ts: np.ndarray          # candidate timestamps, ascending (NaT dropped)
+    pos: np.ndarray         # message positions, same order as ts
+    frame_ordered: bool     # True when timestamp order equals message order (sorted transcripts)
+
+
+def build_rationale_index(timestamps: pd.Series, candidate: np.ndarray) -> RationaleIndex:
+    ts = pd.to_datetime(timestamps).to_numpy().astype('datetime64[ns]')
+    pos = np.flatnonzero(np.asarray(candidate, dtype=bool) & ~pd.isna(ts))
+    cand_ts = ts[pos]
+    order = np.argsort(cand_ts, kind='stable')
+    frame_ordered = bool(np.all(order[1:] > order[:-1])) if len(order) > 1 else True
+    return RationaleIndex(ts=cand_ts[order], pos=pos[order], frame_ordered=frame_ordered)
+
+
+def window_bounds(index: RationaleIndex, ts: np.ndarray, lookback: timedelta) -> tuple[np.ndarray, np.ndarray]:
+    """Vectorized [lo, hi) slices into the index for windows ending at each of ``ts``."""
+    ts = np.asarray(ts, dtype='datetime64[ns]')
+    lo = np.searchsorted(index.ts, ts - np.timedelta64(lookback), side='left')
+    hi = np.searchsorted(index.ts, ts, side='right')
+    empty = np.isnat(ts)
+    lo[empty] = hi[empty] = 0
+    return lo, hi
+
+
+def window_slice(index: RationaleIndex, lo: int, hi: int, limit: int | None = None) -> np.ndarray:
+    """Message positions in index[lo:hi], in message order, capped at ``limit``."""
+    if index.frame_ordered:
+        return index.pos[lo:hi if limit is None else min(hi, lo + limit)]
+    hits = np.sort(index.pos[lo:hi])
+    return hits if limit is None else hits[:limit]
+
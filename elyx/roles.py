@@ -0,0 +1,154 @@
+# Role inference for message senders.
+#
+# Every sender normalization in the app goes through this module. A transcript has only a
+# handful of distinct people, so the vectorized helpers (split_senders, staff_roles, and
+# map_unique for custom rules) resolve each distinct sender string once and broadcast the
+# result back to every row. numpy/pandas are imported inside those helpers so the scalar
+# rules stay importable without them.
+
+from __future__ import annotations
+import re
+
+ROLE_KEYWORDS = {
+    'concierge':'Concierge','orchestrator':'Concierge','ruby':'Concierge',
+    'concierge lead':'Concierge Lead','neel':'Concierge Lead',
+    'physician':'Physician','doctor':'Physician','dr.':'Physician','warren':'Physician',
+    'performance':'Performance Scientist','advik':'Performance Scientist',
+    'nutrition':'Nutritionist','carla':'Nutritionist',
+    'physio':'Physiotherapist','physiotherapist':'Physiotherapist','pt':'Physiotherapist','rachel':'Physiotherapist',
+    'lab':'Lab','lab tech':'Lab'
+}
+
+# explicit exact-name map (covers cases where brackets are empty)
+NAME_ROLE_MAP = {
+    'ruby': 'Concierge',
+    'dr warren': 'Physician',
+    'dr. warren': 'Physician',
+    'warren': 'Physician',
+    'advik': 'Performance Scientist',
+    'carla': 'Nutritionist',
+    'rachel': 'Physiotherapist',
+    'neel': 'Concierge Lead',
+    'lab tech': 'Lab',
+    'lab': 'Lab'
+}
+
+
+def infer_sender_and_role(sender_field: str, existing_role: str | None) -> tuple[str,str]:
+    """Return (cleaned_sender_name, canonical_role).
+    Logic:
+     - If sender string contains parentheses, prefer the name inside/outside as before.
+     - If role text (from CSV role column or parentheses) contains keywords, use that.
+     - If role is missing, try exact-name mapping (Ruby, Dr Warren, Advik, Carla, Rachel, Neel).
+     - Otherwise fall back to keyword matching in name or role_text and finally 'Member'.
+    """
+    s = (sender_field or '').strip()
+    # normalize common "Dr." variants and remove trailing slashes
+    s_norm = re.sub(r"\bdr\.?\s+", "dr ", s, flags=re.IGNORECASE)
+    name = s_norm
+    role_text = (existing_role or '').strip()
+    # pull out parentheses if present
+    m = re.match(r"^([^\(]+)\(([\^)]+)\)", s_norm)
+    if m:
+        name = m.group(1).strip()
+        role_text = m.group(2).strip()
+    # clean name: remove honorifics like Dr., Mr., Ms.
+    clean_name = re.sub(r"\b(dr|mr|ms|mrs|prof)\.?\s*", "", name, flags=re.IGNORECASE).strip()
+    low_name = (clean_name or '').lower()
+    low_role_txt = (role_text or '').lower()
+
+    # check exact name matches first
+    for k, v in NAME_ROLE_MAP.items():
+        if low_name == k:
+            return (clean_name or k.title(), v)
+    # check if name contains one of the known names (partial match)
+    for k, v in NAME_ROLE_MAP.items():
+        if k in low_name:
+            return (clean_name or name, v)
+
+    # keyword mapping fallback
+    for k,v in ROLE_KEYWORDS.items():
+        if k in low_role_txt or k in low_name:
+            return (clean_name or name, v)
+
+    # if role_text looks meaningful, use it
+    if role_text:
+        if '/' in role_text:
+            role_text = role_text.split('/')[0].strip()
+        return (clean_name or name, role_text.title())
+
+    # fallback to Member
+    return (clean_name or name or 'Unknown', 'Member')
+
+
+def split_sender_role(s: str) -> tuple[str, str]:
+    """Split "Name (Role)" or "Name (Role / Other)" into (name, role); role is '' when absent."""
+    s = (s or '').strip()
+    if '(' in s and ')' in s:
+        try:
+            name = s[:s.find('(')].strip()
+            role_part = s[s.find('(')+1:s.rfind(')')].strip()
+            if '/' in role_part:
+                role_part = role_part.split('/')[0].strip()
+            return name, role_part
+        except Exception:
+            pass
+    return s, ''
+
+
+def infer_staff_role(sender: str, current_role: str) -> str:
+    """Role used for internal metrics: keep a meaningful existing role, otherwise infer it
+    from the sender string (keywords first, then the bracketed role text), else 'Member'."""
+    if current_role and current_role.lower() not in ['member','unknown','']:
+        return current_role
+    low = (sender or '').lower()
+    if '(' in sender and ')' in sender:
+        try:
+            role_text = sender[sender.find('(')+1:sender.rfind(')')].strip()
+            if '/' in role_text:
+                role_text = role_text.split('/')[0].strip()
+            for k,v in ROLE_KEYWORDS.items():
+                if k in role_text.lower() or k in low:
+                    return v
+            return role_text.title() if role_text else 'Member'
+        except Exception:
+            pass
+    for k, v in ROLE_KEYWORDS.items():
+        if k in low:
+            return v
+    return 'Member'
+
+
+def map_unique(fn, *columns) -> list[np.ndarray]:
+    """Call ``fn`` once per distinct row of ``columns`` and broadcast its results back.
+    ``fn`` returns a tuple; one object array per tuple element is returned."""
+    import numpy as np
+    import pandas as pd
+    n = len(columns[0])
+    code = np.zeros(n, dtype=np.int64)
+    uniques = []
+    for col in columns:
+        c, u = pd.factorize(col, use_na_sentinel=False)
+        code = code * len(u) + c
+        uniques.append((c, np.asarray(u, dtype=object)))
+    _, first, inverse = np.unique(code, return_index=True, return_inverse=True)
+    results = [fn(*args) for args in zip(*(u[c[first]] for c, u in uniques))]
+    width = len(results[0]) if results else 0
+    return [np.array([r[k] for r in results], dtype=object)[inverse] for k in range(width)]
+
+
+def split_senders(senders: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """Vectorized split_sender_role: (names, roles) for every row."""
+    import numpy as np
+    if len(senders) == 0:
+        return np.array([], dtype=object), np.array([], dtype=object)
+    names, roles = map_unique(split_sender_role, senders)
+    return names, roles
+
+
+def staff_roles(senders: pd.Series, roles: pd.Series) -> np.ndarray:
+    """Vectorized infer_staff_role."""
+    import numpy as np
+    if len(senders) == 0:
+        return np.array([], dtype=object)
+    return map_unique(lambda s, r: (infer_staff_role(s, r),), senders, roles)[0]
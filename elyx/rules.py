@@ -0,0 +1,63 @@
+# Keyword heuristics shared by the extractors.
+
+from datetime import timedelta
+
+ROLE_MAP = {
+    'Ruby': 'Concierge',
+    'Neel': 'Concierge Lead',
+    'Dr. Warren': 'Physician',
+    'Carla': 'Nutritionist',
+    'Rachel': 'Physiotherapist',
+    'Advik': 'Performance Scientist',
+    'Lab Tech': 'Lab',
+}
+
+LAB_PATTERNS = [
+    (r"LDL[^\d]*(\d{2,3})", "LDL"),
+    (r"HDL[^\d]*(\d{2,3})", "HDL"),
+    (r"Triglycerides?[^\d]*(\d{2,3})", "Triglycerides"),
+    (r"Total Cholesterol[^\d]*(\d{2,3})", "Total Cholesterol"),
+    (r"ApoB[^\d]*(\d{1,3})", "ApoB"),
+    (r"hs?-?CRP[^\d]*(\d+(?:\.\d+)?)", "hs-CRP"),
+    (r"BP[^\d]*(\d{2,3})/(\d{2,3})", "Blood Pressure"),
+    (r"VO[₂2]?max[^\d]*(\d+(?:\.\d+)?)", "VO2max"),
+    (r"HRV[^\d]*(\d+(?:\.\d+)?)", "HRV"),
+]
+
+DECISION_KEYWORDS = [
+    'start','add','begin','initiate','reduce','increase','switch','replace',
+    'schedule','book','recheck','test','panel','scan','session','hiit',
+    'supplement','vitamin','omega-3','d3','plan','target','goal','adjust','prescribe'
+]
+
+CITY_KEYWORDS = ["london","new york","nyc","jakarta","seoul","paris","dubai","tokyo","delhi","mumbai","bangkok","hong kong","sydney","los angeles","chicago","san francisco","toronto","berlin","rome","madrid","zurich","amsterdam","bali"]
+
+EXERCISE_WORDS = ['workout','exercise','training','session','gym','run','jog','walk','steps','cycle','cycling','ride','swim','swimming','row','rowing','elliptical','treadmill','yoga','pilates','hiit','strength','weights','lifting','hike','tennis','badminton','football','cricket']
+
+# Event triggers (Journey Timeline)
+DIAGNOSTIC_KEYWORDS = ['book','schedule','panel','test','scan','ecg','cimt','blood draw','mri','ct','ultrasound']
+INTERVENTION_KEYWORDS = ['diet','meal plan','hiit','supplement','omega-3','vitamin','workout','strength','cardio','mobility','plan','routine','session']
+SLEEP_EVENT_KEYWORDS = ['sleep', 'tst', 'garmin', 'advik']
+
+# Sleep metrics trigger
+SLEEP_KEYWORDS = ['sleep','slept','asleep','tst','garmin','advik','bedtime','woke up','wake up']
+
+# Context lines that explain a decision
+RATIONALE_KEYWORDS = ['because','so that','to ','due to','shows','panel','result','scan','ldl','crp','hrv','bp','sleep','jet lag','travel']
+
+# Categories scanned together by keywords.MATCHER (one pass per message)
+KEYWORD_CATEGORIES = {
+    'travel': ['travel'] + CITY_KEYWORDS,
+    'home_city': ['singapore'],   # member is based here, so it cancels a travel hit
+    'diagnostic': DIAGNOSTIC_KEYWORDS,
+    'intervention': INTERVENTION_KEYWORDS,
+    'sleep_event': SLEEP_EVENT_KEYWORDS,
+    'sleep': SLEEP_KEYWORDS,
+    'exercise': EXERCISE_WORDS,
+    'decision': DECISION_KEYWORDS,
+    'rationale': RATIONALE_KEYWORDS,
+}
+
+# Decision rationale window: how far back to look and how many snippets to keep
+DECISION_LOOKBACK = timedelta(days=3)
+MAX_RATIONALE_SNIPPETS = 6
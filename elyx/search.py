@@ -0,0 +1,133 @@
+# Inverted full-text index over message text, for the Conversation Viewer search.
+#
+# Messages are lowercased and split into word tokens once per dataset. Each distinct token
+# gets a posting list of the message positions that contain it, and the lists are stored
+# back to back in token (alphabetical) order, so every prefix query ("chol" -> cholesterol,
+# cholesterol's, ...) is a binary search on the vocabulary plus one contiguous slice of
+# postings. A query matches messages that contain every word (as a token prefix); quoted
+# phrases are checked as literal substrings on those candidates only, after the words inside
+# a phrase (which must be whole tokens) have narrowed them further.
+
+from __future__ import annotations
+import re
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+# a token is a run of letters and digits (RE2 syntax; applied with pyarrow.compute)
+TOKEN_SPLIT = r"[^\p{L}\p{N}]+"
+
+_PHRASE = re.compile(r'"([^"]*)"')
+
+
+class TextIndex(NamedTuple):
+    vocab: np.ndarray       # distinct tokens, ascending
+    offsets: np.ndarray     # postings of vocab[i] are postings[offsets[i]:offsets[i + 1]]
+    postings: np.ndarray    # message positions, ascending within each token
+    n: int                  # number of messages indexed
+
+
+def _tokens(texts) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(row of each token, token codes, vocabulary) for an iterable of strings."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    arr = pa.array(texts, type=pa.large_string())
+    if isinstance(arr, pa.ChunkedArray):
+        arr = arr.combine_chunks()
+    parts = pc.split_pattern_regex(pc.utf8_lower(arr), pattern=TOKEN_SPLIT)
+    toks = pc.list_flatten(parts)
+    keep = pc.not_equal(toks, '').to_numpy(zero_copy_only=False)
+    rows = pc.list_parent_indices(parts).to_numpy()[keep]
+    enc = pc.dictionary_encode(toks.filter(pa.array(keep)))
+    return rows, enc.indices.to_numpy(zero_copy_only=False), np.asarray(enc.dictionary.to_pylist(), dtype=object)
+
+
+def build_text_index(texts: pd.Series) -> TextIndex:
+    n = len(texts)
+    texts = pd.Series(texts, dtype='str').fillna('')
+    rows, codes, vocab = _tokens(texts)
+    order = np.argsort(vocab, kind='stable')
+    rank = np.empty(len(vocab), dtype=np.int64)
+    rank[order] = np.arange(len(vocab))
+    # one key per (token, message): sorting by it groups postings by token, in message order
+    # (np.sort plus an adjacent-duplicate drop; np.unique is many times slower at this size)
+    keys = np.sort(rank[codes] * max(n, 1) + rows)
+    keys = keys[np.r_[True, keys[1:] != keys[:-1]]]
+    token = keys // max(n, 1)
+    postings = (keys % max(n, 1)).astype(np.int32 if n < 2**31 else np.int64)
+    offsets = np.searchsorted(token, np.arange(len(vocab) + 1))
+    return TextIndex(vocab=vocab[order], offsets=offsets, postings=postings, n=n)
+
+
+def query_terms(query: str) -> tuple[list[str], list[str]]:
+    """(word tokens, quoted phrases) of a search box query. Phrase words count as terms too,
+    so phrases only need checking on messages that already contain their words."""
+    phrases = [p.strip() for p in _PHRASE.findall(query) if p.strip()]
+    _, codes, vocab = _tokens([query.replace('"', ' ')])
+    return list(dict.fromkeys(vocab[codes].tolist())), phrases
+
+
+def prefix_mask(index: TextIndex, term: str) -> np.ndarray:
+    """Boolean mask of the messages with a token starting with ``term``."""
+    lo = np.searchsorted(index.vocab, term, side='left')
+    hi = np.searchsorted(index.vocab, term + '\U0010ffff', side='left')
+    mask = np.zeros(index.n, dtype=bool)
+    mask[index.postings[index.offsets[lo]:index.offsets[hi]]] = True
+    return mask
+
+
+def token_mask(index: TextIndex, token: str) -> np.ndarray:
+    """Boolean mask of the messages containing exactly ``token``."""
+    i = np.searchsorted(index.vocab, token, side='left')
+    mask = np.zeros(index.n, dtype=bool)
+    if i < len(index.vocab) and index.vocab[i] == token:
+        mask[index.postings[index.offsets[i]:index.offsets[i + 1]]] = True
+    return mask
+
+
+def phrase_mask(texts: pd.Series, rows: np.ndarray, phrase: str) -> np.ndarray:
+    """Which of the messages at ``rows`` (ascending positions) contain ``phrase``, ignoring
+    case. Arrow-backed text is taken chunk by chunk, which costs a fraction of a take across
+    the chunks."""
+    if not hasattr(texts.array, '__arrow_array__'):
+        return texts.iloc[rows].astype('str').str.contains(phrase, case=False, regex=False).to_numpy(dtype=bool, na_value=False)
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    arr = pa.array(texts.array)
+    chunks = arr.chunks if isinstance(arr, pa.ChunkedArray) else [arr]
+    ends = np.cumsum([len(c) for c in chunks])
+    out, lo, start = [], 0, 0
+    for chunk, end, hi in zip(chunks, ends, np.searchsorted(rows, ends)):
+        if hi > lo:
+            found = pc.match_substring(chunk.take(pa.array(rows[lo:hi] - start)), phrase, ignore_case=True)
+            out.append(found.fill_null(False).to_numpy(zero_copy_only=False))
+        lo, start = hi, end
+    return np.concatenate(out) if out else np.zeros(0, dtype=bool)
+
+
+def search(index: TextIndex, texts: pd.Series, query: str, within: np.ndarray | None = None) -> np.ndarray:
+    """Positions (ascending) of the messages matching ``query``, restricted to the ``within``
+    mask (e.g. a role filter) when given. A query with no word characters at all falls back
+    to a literal, case-insensitive substring scan."""
+    terms, phrases = query_terms(query)
+    if within is not None:
+        mask = np.asarray(within, dtype=bool).copy()
+    else:
+        mask = np.ones(index.n, dtype=bool)
+    if not terms:
+        if query.strip():
+            mask &= texts.astype('str').str.contains(query.strip(), case=False, regex=False).to_numpy(dtype=bool, na_value=False)
+        return np.flatnonzero(mask)
+    # a phrase's inner words are delimited on both sides, so they must be whole tokens
+    inner = {t for p in phrases for t in query_terms(p)[0][1:-1]}
+    for term in terms:
+        mask &= token_mask(index, term) if term in inner else prefix_mask(index, term)
+        if not mask.any():
+            return np.flatnonzero(mask)
+    hits = np.flatnonzero(mask)
+    for phrase in phrases:
+        hits = hits[phrase_mask(texts, hits, phrase)]
+    return hits
@@ -0,0 +1,196 @@
+# Seeded synthetic transcripts, for benchmarks and load testing.
+#
+# Rows come out in the `Messages Database.csv` format (date, time, sender "Name (Role)",
+# message) with the message mix of a real journey: lab reports that LAB_PATTERNS reads,
+# Garmin sleep lines, exercise logs, travel in the CITY_KEYWORDS cities, staff decisions
+# with their rationale, weekly summaries and everyday chat, between the member and the
+# ROLE_MAP cast. Generation is chunked and vectorized per message kind, so 10M rows stream
+# to disk in bounded memory, and a (rows, seed) pair always gives the same transcript.
+
+from __future__ import annotations
+import csv
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+from .rules import CITY_KEYWORDS, ROLE_MAP
+
+MEMBER = 'Rohan (Member)'
+STAFF = [f'{name} ({role})' for name, role in ROLE_MAP.items()]
+SYNTH_CHUNK_ROWS = 100_000
+MESSAGES_PER_DAY = 30
+MAX_DAYS = 3650     # longer transcripts get busier days rather than a longer journey
+START_DATE = '2025-08-15'
+
+_CITIES = [c.title() if len(c) > 3 else c.upper() for c in CITY_KEYWORDS]
+_ACTIVITIES = ['run', 'walk', 'cycling', 'swim', 'treadmill', 'yoga', 'strength', 'rowing', 'hike', 'tennis']
+_CHAT = [
+    'Thanks, noted.', 'Sounds good, see you then.', 'Can we move the call to tomorrow?',
+    'Quick question about my meal timing this week.', 'Feeling good today, energy is up.',
+    'Work has been hectic, will catch up tonight.', 'Got it, I will share the details later.',
+    'Thanks for checking in!', 'Please send over the report when ready.', 'All set for the week.',
+]
+_INTERVENTIONS = ['a Mediterranean-style meal plan', 'omega-3 supplement, 2 g daily', 'vitamin D3 2000 IU',
+                  'one weekly HIIT session', 'a 10-minute mobility routine', 'zone 2 cardio twice a week']
+_TESTS = ['a repeat lipid panel', 'an ECG', 'a CIMT scan', 'a fasting blood draw', 'a DEXA scan', 'an OGTT test']
+
+
+def _clock(minutes: np.ndarray) -> list[str]:
+    m = np.asarray(minutes) % (24 * 60)
+    return [f'{h:02d}:{mm:02d}' for h, mm in zip((m // 60).tolist(), (m % 60).tolist())]
+
+
+# Each kind: (weight, who sends it, text builder over a random generator and a row count)
+def _labs(rng, n):
+    ldl, hdl, tg, tc = rng.integers(80, 160, n), rng.integers(35, 70, n), rng.integers(80, 200, n), rng.integers(150, 240, n)
+    apob, crp = rng.integers(60, 120, n), rng.uniform(0.4, 3.5, n).round(1)
+    sbp, dbp = rng.integers(112, 142, n), rng.integers(70, 92, n)
+    style = rng.integers(0, 3, n)
+    out = []
+    for s, a, b, c, d, e, f, g, h in zip(style.tolist(), ldl.tolist(), hdl.tolist(), tg.tolist(), tc.tolist(), apob.tolist(), crp.tolist(), sbp.tolist(), dbp.tolist()):
+        if s == 0:
+            out.append(f'Results are in: Total Cholesterol {d}, LDL {a}, HDL {b}, Triglycerides {c}, ApoB {e}, hs-CRP {f}, BP {g}/{h}.')
+        elif s == 1:
+            out.append(f'LDL dropped from {a + 12} to {a} mg/dL. hs-CRP down from {f + 0.5:.1f} to {f} mg/L.')
+        else:
+            out.append(f'Clinic BP today {g}/{h}; ApoB {e} on the last panel.')
+    return out
+
+
+def _wearables(rng, n):
+    hrv, vo2 = rng.integers(38, 75, n), rng.uniform(32, 48, n).round(1)
+    return [f'Garmin HRV {a} ms this week, VO2max {b}.' for a, b in zip(hrv.tolist(), vo2.tolist())]
+
+
+def _sleep(rng, n):
+    bed = rng.integers(22 * 60, 25 * 60 + 30, n)
+    dur = rng.integers(4 * 60 + 30, 8 * 60 + 30, n)
+    style = rng.integers(0, 3, n)
+    beds, wakes = _clock(bed), _clock(bed + dur)
+    out = []
+    for s, b, w, d in zip(style.tolist(), beds, wakes, dur.tolist()):
+        if s == 0:
+            out.append(f'Garmin sleep last night {b}-{w} (TST {d // 60}h {d % 60}m).')
+        elif s == 1:
+            out.append(f'Slept {d // 60}h {d % 60}m, woke up at {w}. Sleep score {60 + d % 35}.')
+        else:
+            out.append(f'Bedtime {b}, up at {w}. Felt rested.')
+    return out
+
+
+def _exercise(rng, n):
+    a, b = rng.integers(15, 75, n), rng.integers(10, 40, n)
+    act = rng.integers(0, len(_ACTIVITIES), n)
+    return [f'{x} min {_ACTIVITIES[k]} + {y} min strength. Good session.' for x, y, k in zip(a.tolist(), b.tolist(), act.tolist())]
+
+
+def _travel(rng, n):
+    city = rng.integers(0, len(_CITIES), n)
+    flight = rng.integers(100, 999, n)
+    style = rng.integers(0, 2, n)
+    return [f'Heading to airport, boarding SQ{f} to {_CITIES[c]}.' if s == 0 else f'Landed in {_CITIES[c]}, hotel check-in done.'
+            for s, f, c in zip(style.tolist(), flight.tolist(), city.tolist())]
+
+
+def _decisions(rng, n):
+    what = rng.integers(0, len(_INTERVENTIONS), n)
+    test = rng.integers(0, len(_TESTS), n)
+    weeks = rng.integers(2, 13, n)
+    style = rng.integers(0, 2, n)
+    return [f'Start {_INTERVENTIONS[w]} because your LDL and hs-CRP are above target.' if s == 0 else f'Schedule {_TESTS[t]} in {k} weeks to recheck progress.'
+            for s, w, t, k in zip(style.tolist(), what.tolist(), test.tolist(), weeks.tolist())]
+
+
+def _rationale(rng, n):
+    hrv = rng.integers(38, 75, n)
+    return [f'Your panel shows HRV at {h} due to travel and jet lag, so sleep comes first.' for h in hrv.tolist()]
+
+
+def _summaries(rng, n):
+    wk = rng.integers(1, 53, n)
+    return [f'Weekly summary (week {w}): adherence good, sleep improving, next check-in Monday.' for w in wk.tolist()]
+
+
+def _chat(rng, n):
+    return [_CHAT[k] for k in rng.integers(0, len(_CHAT), n).tolist()]
+
+
+KINDS = [
+    (0.32, 'any', _chat),
+    (0.06, 'staff', _labs),
+    (0.04, 'member', _wearables),
+    (0.10, 'member', _sleep),
+    (0.10, 'member', _exercise),
+    (0.06, 'member', _travel),
+    (0.14, 'staff', _decisions),
+    (0.14, 'staff', _rationale),
+    (0.04, 'staff', _summaries),
+]
+
+
+def iter_synthetic_messages(rows: int, seed: int = 0, chunksize: int = SYNTH_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Yield the transcript in chunks of at most ``chunksize`` rows: date, time, sender,
+    message (string columns). Every SYNTH_CHUNK_ROWS block is seeded by (seed, block
+    number), so the output does not depend on ``chunksize``."""
+    per_day = max(MESSAGES_PER_DAY, -(-rows // MAX_DAYS))
+    start = np.datetime64(START_DATE, 'D')
+    weights = np.array([w for w, _, _ in KINDS])
+    for first in range(0, rows, SYNTH_CHUNK_ROWS):
+        rng = np.random.default_rng([seed, first // SYNTH_CHUNK_ROWS])
+        n = min(SYNTH_CHUNK_ROWS, rows - first)
+        pos = np.arange(first, first + n)
+        # messages of a day spread over 06:00-23:59, in order
+        day = pos // per_day
+        minute = 6 * 60 + (pos % per_day) * (18 * 60) // per_day + rng.integers(0, max(18 * 60 // per_day, 1), n)
+        kind = rng.choice(len(KINDS), size=n, p=weights / weights.sum())
+        staff = rng.integers(0, len(STAFF), n)
+        member_turn = rng.random(n) < 0.5
+        text = np.empty(n, dtype=object)
+        sender = np.empty(n, dtype=object)
+        for k, (_, who, build) in enumerate(KINDS):
+            idx = np.flatnonzero(kind == k)
+            if not len(idx):
+                continue
+            text[idx] = build(rng, len(idx))
+            from_member = np.full(len(idx), who == 'member') if who != 'any' else member_turn[idx]
+            sender[idx] = np.where(from_member, MEMBER, np.array(STAFF, dtype=object)[staff[idx]])
+        chunk = pd.DataFrame({
+            'date': np.datetime_as_string(start + day, unit='D'),
+            'time': _clock(minute),
+            'sender': sender,
+            'message': text,
+        }, dtype='str')
+        for part in range(0, n, chunksize):
+            yield chunk.iloc[part:part + chunksize].reset_index(drop=True)
+
+
+def synthetic_messages(rows: int, seed: int = 0) -> pd.DataFrame:
+    """The whole transcript as one frame (see iter_synthetic_messages)."""
+    parts = list(iter_synthetic_messages(rows, seed))
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=['date', 'time', 'sender', 'message'], dtype='str')
+
+
+def write_synthetic_csv(path: str, rows: int, seed: int = 0) -> int:
+    """Stream a transcript to ``path`` in the Messages Database.csv format; returns rows."""
+    written = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        for chunk in iter_synthetic_messages(rows, seed):
+            chunk.to_csv(f, index=False, header=written == 0, quoting=csv.QUOTE_MINIMAL)
+            written += len(chunk)
+        if written == 0:
+            f.write('date,time,sender,message\n')
+    return written
+
+
+def transcript_lines(messages: pd.DataFrame) -> list[str]:
+    """The transcript as converter input lines: a [dd/mm/yyyy] header whenever the date
+    changes, then "HH:MM – Sender: message" lines."""
+    out = []
+    last = None
+    for d, t, s, m in zip(messages['date'].tolist(), messages['time'].tolist(), messages['sender'].tolist(), messages['message'].tolist()):
+        if d != last:
+            out.append(f'[{d[8:10]}/{d[5:7]}/{d[:4]}]')
+            last = d
+        out.append(f'{t} – {s}: {m}')
+    return out
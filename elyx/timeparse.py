@@ -0,0 +1,168 @@
+# Time parsing for sleep windows ("23:45-06:30") and durations ("6h 45m", "40 min").
+
+from __future__ import annotations
+import functools
+import re
+
+import numpy as np
+import pandas as pd
+
+# pyarrow runs the column-level regexes natively (RE2); without it they run through re
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pragma: no cover
+    pa = pc = None
+
+TIME_RANGE_SEP = r"(?:\-|\u2013|\u2014|to)"
+TIME_TOKEN = r"(?:\d{1,2}(?::|\.)\d{2}(?:\s*(?:am|pm))?|\d{1,2}\s*(?:am|pm)|\d{2}:\d{2}|\d{1,2})"
+RANGE_RE = re.compile(fr"(?i)\b({TIME_TOKEN})\s*{TIME_RANGE_SEP}\s*({TIME_TOKEN})\b")
+HMS_RE = re.compile(r"(?i)\b(\d{1,2})\s*h(?:ours?)?\s*(\d{1,2})\s*m(?:in(?:s|utes)?)?\b")
+HOUR_ONLY_RE = re.compile(r"(?i)\b(\d+(?:\.\d+)?)\s*h(?:(?:ours?)|rs|r)?\b")
+MIN_ONLY_RE = re.compile(r"(?i)\b(\d{1,3})\s*m(?:in(?:s|utes)?)?\b")
+
+
+def _parse_time_token(tok: str) -> int | None:
+    if not tok:
+        return None
+    s = tok.strip().lower().replace('.', ':')
+    ampm = None
+    m = re.search(r"\b(am|pm)\b", s)
+    if m:
+        ampm = m.group(1)
+        s = re.sub(r"\s*(am|pm)\b", "", s)
+    if ':' in s:
+        parts = s.split(':')
+        try:
+            h = int(parts[0]); mnt = int(parts[1]) if len(parts) > 1 else 0
+        except Exception:
+            return None
+    else:
+        try:
+            h = int(re.findall(r"\d+", s)[0]); mnt = 0
+        except Exception:
+            return None
+    if ampm:
+        h = h % 12
+        if ampm == 'pm':
+            h += 12
+    if 0 <= h <= 23 and 0 <= mnt <= 59:
+        return h*60 + mnt
+    return None
+
+
+def parse_time_range_minutes(text: str) -> tuple[int | None, int | None, int | None]:
+    for m in RANGE_RE.finditer(text):
+        a, b = m.group(1), m.group(2)
+        sa = _parse_time_token(a); sb = _parse_time_token(b)
+        if sa is None or sb is None:
+            continue
+        dur = sb - sa
+        if dur <= 0:
+            dur += 24*60
+        return sa, sb, dur
+    return None, None, None
+
+
+def parse_duration_minutes(text: str) -> int | None:
+    m = HMS_RE.search(text)
+    if m:
+        h, mm = int(m.group(1)), int(m.group(2))
+        return h*60 + mm
+    m = HOUR_ONLY_RE.search(text)
+    if m:
+        h = float(m.group(1))
+        return int(round(h*60))
+    m = MIN_ONLY_RE.search(text)
+    if m:
+        return int(m.group(1))
+    return None
+
+
+# Column-level parsing: the same rules applied to a whole column at once. Each regex runs
+# once over the column (str.extract semantics; RE2 through pyarrow where that gives re's
+# answer) and the tokens become minutes with NumPy arithmetic.
+TIME_COLUMNS = ['bedtime', 'waketime', 'range_minutes', 'duration']
+
+# a TIME_TOKEN split into hour, minutes, the gap before am/pm, and am/pm
+_TOKEN_PARTS = re.compile(r"^\s*(\d{1,2})(?:[:.](\d{2}))?(\s*)(am|pm)?\s*$")
+
+# RE2 and re read the patterns above alike unless the text has a character that only re
+# counts as a word, digit or space character (non-ASCII letters, digits and spaces, \v,
+# \x1c-\x1f, \x85); such rows go through re. Punctuation, symbols and emoji are safe.
+_RE2_UNSAFE = r"[\x0b\x1c-\x1f\x{85}]|[^\x00-\x7f\p{P}\p{S}\p{M}\p{C}]"
+
+
+@functools.lru_cache(maxsize=None)
+def _re2_pattern(pattern: str) -> str:
+    # RE2 spells \u2013 as \x{2013}, and pyarrow's extract_regex wants named groups
+    pattern = re.sub(r"\\u([0-9a-fA-F]{4})", r"\\x{\1}", pattern)
+    names = iter(range(pattern.count('(')))
+    return re.sub(r"(?<!\\)\((?!\?)", lambda m: f"(?P<g{next(names)}>", pattern)
+
+
+def _extract(texts: pd.Series, *patterns: re.Pattern) -> list[list[np.ndarray]]:
+    """For each pattern, the capture groups of its first match in each text as object arrays
+    (None where nothing matched), like texts.str.extract(pattern)."""
+    if pc is None:
+        found = [texts.str.extract(p) for p in patterns]
+        return [[f[c].to_numpy(dtype=object, na_value=None) for c in f] for f in found]
+    arr = pa.array(texts.to_numpy(), type=pa.large_string())
+    unsafe = np.flatnonzero(pc.match_substring_regex(arr, _RE2_UNSAFE).to_numpy(zero_copy_only=False))
+    out = []
+    for pattern in patterns:
+        groups = [g.to_numpy(zero_copy_only=False) for g in pc.extract_regex(arr, _re2_pattern(pattern.pattern)).flatten()]
+        # RE2 reports an optional group that took no part in the match as ''
+        groups = [np.where(g == '', None, g) for g in groups]
+        if len(unsafe):
+            found = texts.iloc[unsafe].str.extract(pattern)
+            for g, c in zip(groups, found):
+                g[unsafe] = found[c].to_numpy(dtype=object, na_value=None)
+        out.append(groups)
+    return out
+
+
+def _numbers(values: np.ndarray) -> np.ndarray:
+    # float() semantics, as the row-wise parsers use (digits in any script)
+    return pd.Series(values, dtype=object).astype(np.float64).to_numpy()
+
+
+def _token_minutes(tokens: np.ndarray) -> np.ndarray:
+    """_parse_time_token over an array of tokens (NaN where a token is invalid)."""
+    (hour, minute, gap, suffix), = _extract(pd.Series(tokens, dtype=object).str.lower(), _TOKEN_PARTS)
+    h, mnt = _numbers(hour), _numbers(minute)
+    has_suffix = pd.notna(suffix)
+    pm = suffix == 'pm'
+    spaced = pd.notna(gap) & (gap != '')
+    # am/pm only counts after a space ("9 pm"); glued to the minutes ("9:30pm") the token is
+    # rejected, glued to a bare hour ("9pm") it is ignored
+    bad = has_suffix & ~spaced & ~np.isnan(mnt)
+    mnt = np.nan_to_num(mnt)
+    h = np.where(has_suffix & spaced, h % 12 + 12 * pm, h)
+    ok = ~bad & (h >= 0) & (h <= 23) & (mnt <= 59)
+    return np.where(ok, h * 60 + mnt, np.nan)
+
+
+def parse_time_columns(texts: pd.Series) -> pd.DataFrame:
+    """parse_time_range_minutes and parse_duration_minutes for every row of ``texts``, as
+    nullable integer columns on the same index: 'bedtime' and 'waketime' (minutes after
+    midnight) and 'range_minutes' from the first valid time range, and the stated
+    'duration'."""
+    texts = texts.astype(object)
+    n = len(texts)
+    start, end = np.full(n, np.nan), np.full(n, np.nan)
+    (first, second), (h, m), (hours,), (minutes,) = _extract(texts, RANGE_RE, HMS_RE, HOUR_ONLY_RE, MIN_ONLY_RE)
+    matched = np.flatnonzero(pd.notna(first))
+    start[matched], end[matched] = _token_minutes(first[matched]), _token_minutes(second[matched])
+    # a first range with an invalid end point falls back to the scan over later matches
+    retry = matched[np.isnan(start[matched]) | np.isnan(end[matched])]
+    for i in retry.tolist():
+        a, b, _ = parse_time_range_minutes(texts.iloc[i])
+        start[i], end[i] = (np.nan, np.nan) if a is None else (a, b)
+    length = end - start
+    length = np.where(length <= 0, length + 24 * 60, length)
+    duration = _numbers(h) * 60 + _numbers(m)
+    duration = np.where(np.isnan(duration), np.round(_numbers(hours) * 60), duration)
+    duration = np.where(np.isnan(duration), _numbers(minutes), duration)
+    columns = {'bedtime': start, 'waketime': end, 'range_minutes': length, 'duration': duration}
+    return pd.DataFrame({name: pd.array(values, dtype='Int64') for name, values in columns.items()}, index=texts.index)
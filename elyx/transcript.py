@@ -0,0 +1,119 @@
+# Line rules for chat transcripts exported from Word.
+#
+# Shared by the in-app .docx reader (docxparse) and the command-line converter
+# (Supporting flies/converter.py), so both turn the same lines into the same rows. Only the
+# standard library is used here, which keeps the converter free of pandas unless it writes
+# Parquet.
+
+from __future__ import annotations
+import re
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+# Date header like: [15/08/2025]  or [15/08/2025] (later in the day)
+RE_DATE_HEADER = re.compile(r'^\s*\[(\d{1,2}[\/\-]\d{1,2}[\/\-]\d{4})\]')
+
+# Message line like: 09:02 – Rohan (Member): Hi Ruby, ...
+# Accepts different dashes and colon after sender.
+RE_MESSAGE_LINE = re.compile(
+    r'''^\s*(?P<time>\d{1,2}:\d{2})\s*[\u2013\u2014\-–—]?\s*(?P<sender>[^:]{1,120}?)\s*:\s*(?P<message>.*\S.*)$'''
+)
+
+_RE_NEWLINE = re.compile(r"\r?\n")
+
+
+def normalize_date_str(date_str: str, date_format: Optional[str] = None) -> str:
+    """Normalize date string like '15/08/2025' into ISO '2025-08-15'.
+
+    If date_format is provided, datetime.strptime will use it. Otherwise try
+    common day-first formats, returning the string unchanged if none fits.
+    """
+    if date_format:
+        dt = datetime.strptime(date_str, date_format)
+    else:
+        dt = None
+        for fmt in ["%d/%m/%Y", "%d-%m-%Y", "%Y/%m/%d", "%Y-%m-%d"]:
+            try:
+                dt = datetime.strptime(date_str, fmt)
+                break
+            except Exception:
+                continue
+        if dt is None:
+            return date_str
+    return dt.strftime("%Y-%m-%d")
+
+
+def iter_lines(paragraphs: Iterable[str]) -> Iterator[str]:
+    """Split paragraphs on embedded newlines and yield the non-empty, stripped lines.
+
+    Word exports sometimes pack several logical lines into one long paragraph.
+    """
+    for p in paragraphs:
+        for sub in _RE_NEWLINE.split(p):
+            s = sub.strip()
+            if s:
+                yield s
+
+
+def iter_message_rows(lines: Iterable[str], date_format: Optional[str] = None, current_date: Optional[str] = None) -> Iterator[Dict[str, str]]:
+    """Parse text lines into {date, time, sender, message} rows, yielding each row as soon
+    as it is complete.
+
+    A row is complete when the next message (or the end of input) is reached, since
+    lines that follow it without a leading time are continuations of its message.
+    Continuations are collected in a list and joined once, so long multi-paragraph
+    messages cost linear time. ``current_date`` seeds the date for input that starts
+    mid-log (see the converter's parse_lines_parallel).
+    """
+    pending: Optional[Dict[str, str]] = None
+    parts: List[str] = []
+    last_date = current_date or ''
+    match_date, match_message = RE_DATE_HEADER.match, RE_MESSAGE_LINE.match
+
+    for raw in lines:
+        line = raw.strip()
+        if not line:
+            continue
+
+        # Cheap dispatch on the first character: date headers start with '[', message
+        # lines with a digit; anything else can only be a continuation.
+        first = line[0]
+        if first == '[':
+            mdate = match_date(line)
+            if mdate:
+                current_date = normalize_date_str(mdate.group(1), date_format)
+                # Date header lines don't produce rows directly
+                continue
+        m = match_message(line) if first.isdigit() else None
+        if m:
+            if pending is not None:
+                pending['message'] = '\n'.join(parts)
+                yield pending
+            time, sender, message = m.group('time', 'sender', 'message')
+            # If there's no current_date, use the last row's date
+            date_to_use = current_date if current_date else last_date
+            pending = {'date': date_to_use or '', 'time': time, 'sender': sender.strip()}
+            parts = [message.strip()]
+            last_date = pending['date']
+            continue
+
+        # If the line doesn't match a new message, treat it as a continuation of the last message
+        if pending is not None:
+            parts.append(line)
+        else:
+            # No previous message to append to: create a placeholder row with unknown time/sender
+            pending = {'date': current_date if current_date else '', 'time': '', 'sender': ''}
+            parts = [line]
+            last_date = pending['date']
+
+    if pending is not None:
+        pending['message'] = '\n'.join(parts)
+        yield pending
+
+
+def parse_lines(lines: Iterable[str], date_format: Optional[str] = None) -> List[Dict[str, str]]:
+    """Parse text lines into conversation rows.
+
+    Returns a list of dicts with keys: date, time, sender, message
+    """
+    return list(iter_message_rows(lines, date_format))
@@ -0,0 +1,50 @@
+# Timestamp parsing in normalize_messages (one detected format, each distinct date and time
+# parsed once) against the row-wise dayfirst pd.to_datetime it replaced.
+
+import warnings
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from elyx.ingest import normalize_messages
+from elyx.synth import synthetic_messages
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def legacy_timestamps(df: pd.DataFrame) -> pd.Series:
+    if 'timestamp' in df:
+        s = df['timestamp']
+    else:
+        s = df['date'].astype(str).str.strip() + ' ' + df['time'].astype(str).str.strip()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning)  # pandas' dayfirst/format-inference notices
+        return pd.to_datetime(s, errors='coerce', dayfirst=True)
+
+
+def same_instants(a: pd.Series, b: pd.Series) -> bool:
+    a, b = a.reset_index(drop=True), b.reset_index(drop=True)
+    return bool(((a.isna() & b.isna()) | (a == b)).all())
+
+
+@pytest.mark.parametrize('raw', [
+    pytest.param(lambda: pd.read_csv(ROOT / 'Messages Database.csv', dtype=str, keep_default_na=False), id='database'),
+    pytest.param(lambda: synthetic_messages(5_000, seed=11), id='synthetic'),
+    pytest.param(lambda: synthetic_messages(5_000, seed=11).assign(
+        date=lambda d: pd.to_datetime(d['date']).dt.strftime('%d/%m/%Y')), id='synthetic-dayfirst'),
+    pytest.param(lambda: pd.DataFrame({'timestamp': ['2025-08-15 09:02:11', '2025-08-16 10:00:00', '2025-08-17 23:59:59']}),
+                 id='timestamp-column'),
+])
+def test_matches_legacy_parse(raw):
+    raw = raw()
+    assert same_instants(normalize_messages(raw.copy())['timestamp'], legacy_timestamps(raw))
+
+
+@pytest.mark.filterwarnings('ignore::UserWarning')
+def test_unparseable_rows_become_nat():
+    raw = pd.DataFrame({'date': ['15/08/2025', 'garbage', '', '17/08/2025'], 'time': ['09:02', '10:00', '', '25:99'],
+                        'sender': 'A', 'message': 'x'})
+    ts = normalize_messages(raw)['timestamp']
+    assert ts.iloc[0] == pd.Timestamp('2025-08-15 09:02')
+    assert ts.iloc[1:].isna().all()
@@ -0,0 +1,106 @@
+# Regression tests for the column-wise lab extractor (elyx/labs.py) against the row-wise
+# extract_labs it replaced, kept below as the reference.
+
+import random
+import re
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from elyx import extract
+from elyx.ingest import parse_csv_messages
+from elyx.labs import lab_readings
+from elyx.rules import LAB_PATTERNS
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# the app's mock transcript (app2.load_mock_messages): timestamp and text
+MOCK = [
+    (datetime(2025, 8, 15, 9, 2), "Hi Ruby, I’m Rohan Patel. Just signed up yesterday."),
+    (datetime(2025, 8, 19, 9, 12), "Your results are in. LDL is borderline high, CRP mildly raised."),
+    (datetime(2025, 8, 20, 14, 30), "Start Mediterranean-style diet and 30–40 mins brisk walking 5 days/week."),
+    (datetime(2025, 9, 1, 22, 45), "Garmin sleep last night 23:45-06:30 (TST 6h 45m)."),
+    (datetime(2025, 9, 2, 6, 10), "Heading to airport, boarding SQ322 to London."),
+    (datetime(2025, 9, 2, 13, 45), "Landed LHR, long immigration lines."),
+    (datetime(2025, 9, 3, 8, 10), "40 min treadmill + 20 min strength. Good sweat."),
+    (datetime(2025, 9, 17, 9, 12), "LDL dropped from 140 to 132 mg/dL. hs-CRP down from 2.9 to 2.4 mg/L."),
+    (datetime(2025, 10, 14, 9, 42), "Total Cholesterol 197, LDL 126, HDL 44, Triglycerides 148, hs-CRP 1.4, BP 126/82."),
+    (datetime(2025, 10, 16, 7, 50), "Adding 1 weekly HIIT session to improve HDL and heart efficiency."),
+    (datetime(2025, 10, 28, 22, 15), "On the way to airport for Seoul – gate A12, boarding soon."),
+    (datetime(2025, 12, 10, 10, 30), "LDL down to 118, CRP at 1.2, Thyroid panel normal, ECG clear, CIMT healthy."),
+    (datetime(2026, 1, 11, 11, 2), "LDL 92, HDL 56, Triglycerides 102, ApoB 78, Lp(a) optimal. OGTT normal."),
+    (datetime(2026, 1, 12, 7, 35), "Sleep 00:15-06:45 (~6h30m). Jet lag ok."),
+    (datetime(2026, 1, 25, 5, 55), "Departed SIN, in-flight to Jakarta. See you on Monday."),
+    (datetime(2026, 2, 2, 19, 5), "Arrived in New York; hotel check-in done."),
+    (datetime(2026, 2, 3, 9, 15), "HIIT 22 min + walk 35 min."),
+]
+
+
+def legacy_readings(messages: pd.DataFrame) -> list[tuple[int, str, float]]:
+    """(position, marker, value) of the previous extract_labs: the first match of each
+    pattern per message, before HRV normalisation."""
+    out = []
+    for pos, txt in enumerate(messages['text'].astype(str)):
+        for pat, name in LAB_PATTERNS:
+            m = re.search(pat, txt, flags=re.IGNORECASE)
+            if not m:
+                continue
+            if name == 'Blood Pressure' and len(m.groups()) == 2:
+                out += [(pos, 'SBP', float(m.group(1))), (pos, 'DBP', float(m.group(2)))]
+            else:
+                out.append((pos, name, float(m.group(1))))
+    return out
+
+
+def mock_messages() -> pd.DataFrame:
+    return pd.DataFrame(MOCK, columns=['timestamp', 'text'])
+
+
+def database_messages() -> pd.DataFrame:
+    return parse_csv_messages(str(ROOT / 'Messages Database.csv'))
+
+
+@pytest.fixture(params=['mock', 'database'])
+def messages(request):
+    return mock_messages() if request.param == 'mock' else database_messages()
+
+
+def test_keeps_every_legacy_reading(messages):
+    new = lab_readings(messages['text'])
+    new = Counter(zip(new['pos'].tolist(), new['marker'].tolist(), new['value'].tolist()))
+    missing = Counter(legacy_readings(messages)) - new
+    assert not missing
+
+
+def test_first_reading_per_message_and_marker_unchanged(messages):
+    new = lab_readings(messages['text']).drop_duplicates(['pos', 'marker'], keep='first')
+    new = sorted(zip(new['pos'].tolist(), new['marker'].tolist(), new['value'].tolist()))
+    assert new == sorted(legacy_readings(messages))
+
+
+def test_extract_labs_with_seeded_hrv(messages, monkeypatch):
+    # HRV substitution pinned, so the table only depends on the readings
+    monkeypatch.setattr(random, 'randint', lambda a, b: a)
+    labs = extract.extract_labs(messages)
+    legacy = Counter((messages['timestamp'].iloc[p], m, 50.0 if m == 'HRV' and v < 40 else v)
+                     for p, m, v in legacy_readings(messages))
+    assert not legacy - Counter(zip(labs['timestamp'], labs['marker'], labs['value']))
+    assert labs['timestamp'].is_monotonic_increasing
+
+
+@pytest.mark.parametrize('text, marker, values', [
+    ("LDL dropped from 140 to 132 mg/dL.", 'LDL', [140, 132]),
+    ("hs-CRP down from 2.9 to 2.4 mg/L.", 'hs-CRP', [2.9, 2.4]),
+    ("BP 138/88 → 126/82 after the change.", 'SBP', [138, 126]),
+    ("BP 138/88 → 126/82 after the change.", 'DBP', [88, 82]),
+    ("LDL 126, HDL 44", 'LDL', [126]),
+    # durations after an arrow or "to" are not follow-up readings
+    ("ApoB 95 -> 12 weeks recheck", 'ApoB', [95]),
+    ("hs-CRP 2.1 to 3 months", 'hs-CRP', [2.1]),
+])
+def test_follow_up_values(text, marker, values):
+    readings = lab_readings(pd.Series([text]))
+    assert readings.loc[readings['marker'] == marker, 'value'].tolist() == values
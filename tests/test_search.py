@@ -0,0 +1,50 @@
+# The inverted-index search (elyx/search.py) against a brute-force scan of the same rules:
+# every query word is a prefix of some token of the message, every quoted phrase is a
+# case-insensitive substring, and only rows inside the role filter count.
+
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from elyx.ingest import compact_messages, normalize_messages
+from elyx.search import build_text_index, search
+from elyx.synth import synthetic_messages
+
+_SPLIT = re.compile(r'[\W_]+')
+
+
+@pytest.fixture(scope='module')
+def messages():
+    return compact_messages(normalize_messages(synthetic_messages(20_000, seed=7)))
+
+
+@pytest.fixture(scope='module')
+def index(messages):
+    return build_text_index(messages['text'])
+
+
+def brute_force(messages: pd.DataFrame, query: str, within: np.ndarray) -> np.ndarray:
+    phrases = [p.strip().lower() for p in re.findall(r'"([^"]*)"', query) if p.strip()]
+    terms = [t for t in _SPLIT.split(query.replace('"', ' ').lower()) if t]
+    out = []
+    for pos, text in enumerate(messages['text'].astype(str)):
+        if not within[pos]:
+            continue
+        low = text.lower()
+        tokens = [t for t in _SPLIT.split(low) if t]
+        if all(any(tok.startswith(t) for tok in tokens) for t in terms) and all(p in low for p in phrases):
+            out.append(pos)
+    return np.array(out, dtype=np.int64)
+
+
+@pytest.mark.parametrize('query', [
+    'session', 'good session', '"good session"', 'ldl', 'sleep 6h', '"this week"', 'hs-crp',
+    '"hiit session because"', '"hrv at 4" jet', '"Feeling good" energy', 'the', 'zzzz',
+])
+@pytest.mark.parametrize('role', [None, 'Member', 'Nutritionist'])
+def test_matches_brute_force(messages, index, query, role):
+    within = np.ones(len(messages), dtype=bool) if role is None else (messages['role'] == role).to_numpy()
+    hits = search(index, messages['text'], query, within=None if role is None else within)
+    assert hits.tolist() == brute_force(messages, query, within).tolist()
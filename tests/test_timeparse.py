@@ -0,0 +1,50 @@
+# Column-wise time parsing (timeparse.parse_time_columns) against the scalar
+# parse_time_range_minutes / parse_duration_minutes it replaced in classify_messages, on
+# seeded fuzz strings and on the synthetic transcript.
+
+import random
+
+import pandas as pd
+import pytest
+
+from elyx.synth import synthetic_messages
+from elyx.timeparse import TIME_COLUMNS, parse_duration_minutes, parse_time_columns, parse_time_range_minutes
+
+# fragments that exercise every branch: clocks, am/pm, ranges and dashes, durations and
+# units, out-of-range values, and non-ASCII text that the RE2 path must hand to re
+ATOMS = ['23:45', '06:30', '9', '9 pm', '9pm', '9:30pm', '9:30 pm', '11.15', '25:00', '99', '7 am', '12 am',
+         '12 pm', '-', '–', '—', ' to ', 'to', ' ', 'h', '6h 45m', '6 hours', '7.5 hrs', '2.5h', '40 min',
+         '45 minutes', '1000m', 'x', 'é', '٣:٣٠', 'sleep', '00:00', '0-0', '12:60', '3', '.', ':', 'am', 'pm',
+         '1h', 'm', '\v', '\x1c', '\xa0', 'PM', 'AM', 'H', 'MIN', '\t', '\n', 'K', '\u212a', '_', '١٢', '’',
+         '“', '•', '😀', '\u200b', '\u2009', '\u3000', 'ſ', 'İ', '\u0301', '²', '½', 'Ⅻ', '\x85']
+
+
+def scalar(texts: list[str]) -> list[tuple]:
+    return [(*parse_time_range_minutes(t), parse_duration_minutes(t)) for t in texts]
+
+
+def columns(texts: list[str]) -> list[tuple]:
+    df = parse_time_columns(pd.Series(texts, dtype='str'))
+    assert list(df.columns) == TIME_COLUMNS
+    return [tuple(None if pd.isna(v) else int(v) for v in row) for row in df.itertuples(index=False)]
+
+
+def fuzz(seed: int, n: int, atoms: list[str]) -> list[str]:
+    rng = random.Random(seed)
+    return [''.join(rng.choice(atoms) for _ in range(rng.randint(0, 8))) for _ in range(n)]
+
+
+@pytest.mark.parametrize('texts', [
+    pytest.param(fuzz(5, 20_000, ATOMS), id='fuzz'),
+    pytest.param(fuzz(6, 20_000, [a for a in ATOMS if a.isascii()]), id='fuzz-ascii'),
+    pytest.param(['', 'garmin sleep last night 23:45-06:30 (tst 6h 45m).', 'bed 25:00-26:00 then 22:00-06:00',
+                  '9:30pm-6 am', 'hello'], id='examples'),
+    pytest.param([], id='empty'),
+])
+def test_matches_scalar_parsers(texts):
+    assert columns(texts) == scalar(texts)
+
+
+def test_matches_scalar_parsers_on_transcript():
+    texts = synthetic_messages(5_000, seed=3)['message'].str.lower().tolist()
+    assert columns(texts) == scalar(texts)